@@ -0,0 +1,275 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from app.agent.metrics import Counter, Gauge, Histogram, register_metric
+
+# /agent/chat 입장 제어 (백프레셔)
+#   - 동시에 처리하는 채팅 수 상한 (ADMISSION_MAX_ACTIVE), 넘으면 대기열
+#   - 대기열도 상한 (ADMISSION_QUEUE_SIZE), 넘으면 SSE 시작 전에 바로 429
+#   - 대기 중에는 순번을 status 이벤트로 알림
+#   - 세션 간 라운드로빈: 한 세션이 요청을 몰아 보내도 다른 세션 차례가 밀리지 않음
+#     (세션별 동시 처리 / 대기 수 상한도 따로)
+#   - provider별 LLM 동시 호출 상한은 콜백(ProviderGate)으로 모델 호출 직전에 대기
+
+ADMISSION_MAX_ACTIVE = int(os.getenv("ADMISSION_MAX_ACTIVE", "64"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "128"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))  # 초, 넘으면 포기
+ADMISSION_SESSION_MAX_ACTIVE = int(os.getenv("ADMISSION_SESSION_MAX_ACTIVE", "2"))
+ADMISSION_SESSION_MAX_QUEUED = int(os.getenv("ADMISSION_SESSION_MAX_QUEUED", "2"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))  # 429 응답의 Retry-After(초)
+
+# provider별 LLM 동시 호출 상한 (LLM_<PROVIDER>_MAX_CONCURRENCY로 덮어쓰기, 0이면 제한 없음)
+PROVIDER_CONCURRENCY = {
+    "google": 48,
+    "anthropic": 16,
+    "openai": 32,
+}
+# 모델 콜백 metadata의 ls_provider → registry provider 이름
+_LS_PROVIDERS = {"google_genai": "google", "google_vertexai": "google", "anthropic": "anthropic", "openai": "openai"}
+
+queue_depth = register_metric(Gauge("grogi_admission_queue_depth", "입장 대기 중인 채팅 수", ()))
+active_chats = register_metric(Gauge("grogi_admission_active", "처리 중인 채팅 수", ()))
+queue_wait = register_metric(Histogram("grogi_admission_wait_seconds", "입장 대기 시간", ("result",)))
+rejected = register_metric(Counter("grogi_admission_rejected_total", "입장 거절 수", ("reason",)))
+provider_inflight = register_metric(Gauge("grogi_provider_inflight", "provider별 진행 중인 LLM 호출", ("provider",)))
+provider_wait = register_metric(Histogram("grogi_provider_wait_seconds", "provider 동시 호출 상한 대기 시간", ("provider",)))
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Ticket:
+    """입장권 하나. wait()로 차례를 기다리고, 끝나면 반드시 release()"""
+
+    def __init__(self, controller: "AdmissionController", session_id: str):
+        self.controller = controller
+        self.session_id = session_id
+        self.enqueued_at = time.perf_counter()
+        self.admitted = asyncio.get_running_loop().create_future()
+        self.changed = asyncio.Event()  # 대기열이 움직이면 set → 순번 다시 계산
+        self.released = False
+
+    def position(self) -> int:
+        return self.controller.position(self)
+
+    async def wait(self, timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        """
+        차례가 올 때까지 순번 변화를 yield (이미 입장했으면 바로 끝)
+        timeout이 지나면 대기열에서 빠지고 AdmissionRejected("timeout")
+        """
+        deadline = self.enqueued_at + timeout
+        last = None
+        while not self.admitted.done():
+            position = self.position()
+            if position != last:
+                last = position
+                yield position
+            self.changed.clear()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                self.controller.cancel(self)
+                rejected.inc("timeout")
+                queue_wait.observe("timeout", value=time.perf_counter() - self.enqueued_at)
+                raise AdmissionRejected("timeout")
+            changed = asyncio.ensure_future(self.changed.wait())
+            try:
+                await asyncio.wait({changed, self.admitted}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                changed.cancel()
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller.release(self)
+
+
+class AdmissionController:
+    def __init__(self, max_active: int = ADMISSION_MAX_ACTIVE, queue_size: int = ADMISSION_QUEUE_SIZE,
+                 session_max_active: int = ADMISSION_SESSION_MAX_ACTIVE,
+                 session_max_queued: int = ADMISSION_SESSION_MAX_QUEUED):
+        self.max_active = max_active
+        self.queue_size = queue_size
+        self.session_max_active = session_max_active
+        self.session_max_queued = session_max_queued
+        self.active = 0
+        self._session_active: Dict[str, int] = {}
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()  # 세션 → 대기 Ticket (세션 순서 = 라운드로빈 순서)
+        self._queued = 0
+
+    def enter(self, session_id: str) -> Ticket:
+        """
+        바로 입장시키거나 대기열에 넣은 Ticket 반환. 대기열이 꽉 찼으면 AdmissionRejected
+        (SSE 시작 전에 호출해서 429로 응답할 수 있도록 동기 함수)
+        """
+        ticket = Ticket(self, session_id)
+        waiting = self._queues.get(session_id)
+        if waiting is not None and len(waiting) >= self.session_max_queued:
+            rejected.inc("session_queue_full")
+            raise AdmissionRejected("session_queue_full")
+        if self._queued == 0 and self._can_admit(session_id):
+            self._admit(ticket)
+            return ticket
+        if self._queued >= self.queue_size:
+            rejected.inc("queue_full")
+            raise AdmissionRejected("queue_full")
+        self._queues.setdefault(session_id, deque()).append(ticket)
+        self._queued += 1
+        queue_depth.set(value=self._queued)
+        return ticket
+
+    def _can_admit(self, session_id: str) -> bool:
+        return self.active < self.max_active and self._session_active.get(session_id, 0) < self.session_max_active
+
+    def _admit(self, ticket: Ticket):
+        self.active += 1
+        self._session_active[ticket.session_id] = self._session_active.get(ticket.session_id, 0) + 1
+        active_chats.set(value=self.active)
+        if not ticket.admitted.done():
+            ticket.admitted.set_result(True)
+        queue_wait.observe("admitted", value=time.perf_counter() - ticket.enqueued_at)
+
+    def _dispatch(self):
+        """빈 자리만큼 대기열에서 세션 라운드로빈으로 꺼내서 입장"""
+        progressed = False
+        while self._queued and self.active < self.max_active:
+            for session_id in list(self._queues):
+                if self._can_admit(session_id):
+                    break
+            else:
+                break  # 대기 중인 세션이 전부 세션 상한에 걸림
+            waiting = self._queues.pop(session_id)
+            ticket = waiting.popleft()
+            self._queued -= 1
+            if waiting:
+                self._queues[session_id] = waiting  # 맨 뒤로 → 다른 세션 먼저
+            self._admit(ticket)
+            progressed = True
+        queue_depth.set(value=self._queued)
+        if progressed:
+            for waiting in self._queues.values():
+                for ticket in waiting:
+                    ticket.changed.set()
+
+    def position(self, ticket: Ticket) -> int:
+        """라운드로빈 기준 예상 순번 (1부터). 이미 입장했으면 0"""
+        if ticket.admitted.done():
+            return 0
+        waiting = self._queues.get(ticket.session_id)
+        if not waiting or ticket not in waiting:
+            return 0
+        # 한 바퀴에 세션마다 하나씩: 내 앞 세션은 rank+1개, 뒤 세션은 rank개까지 먼저 들어감
+        rank = waiting.index(ticket)
+        ahead, before_me = rank, True
+        for session_id, other in self._queues.items():
+            if session_id == ticket.session_id:
+                before_me = False
+                continue
+            ahead += min(len(other), rank + 1 if before_me else rank)
+        return ahead + 1
+
+    def cancel(self, ticket: Ticket):
+        """대기 중에 포기(시간 초과 / 연결 끊김)"""
+        waiting = self._queues.get(ticket.session_id)
+        if waiting is not None and ticket in waiting:
+            waiting.remove(ticket)
+            self._queued -= 1
+            if not waiting:
+                del self._queues[ticket.session_id]
+            queue_depth.set(value=self._queued)
+            for others in self._queues.values():
+                for other in others:
+                    other.changed.set()
+
+    def release(self, ticket: Ticket):
+        if not ticket.admitted.done():
+            self.cancel(ticket)
+            return
+        self.active -= 1
+        remaining = self._session_active.get(ticket.session_id, 1) - 1
+        if remaining:
+            self._session_active[ticket.session_id] = remaining
+        else:
+            self._session_active.pop(ticket.session_id, None)
+        active_chats.set(value=self.active)
+        self._dispatch()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self._queued,
+            "sessions_waiting": len(self._queues),
+            "max_active": self.max_active,
+            "queue_size": self.queue_size,
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
+
+
+# ── provider 동시 호출 상한 ──
+
+def provider_limit(provider: str) -> int:
+    override = os.getenv(f"LLM_{provider.upper()}_MAX_CONCURRENCY")
+    return int(override) if override else PROVIDER_CONCURRENCY.get(provider, 0)
+
+
+class ProviderGate(AsyncCallbackHandler):
+    """
+    chat model 호출 시작 콜백에서 provider 세마포어를 잡고, 끝/오류 콜백에서 놓음
+    (LangChain은 async 콜백을 모델 호출 전에 await하므로 호출 자체가 대기함.
+     취소돼도 on_llm_error가 불리므로 세마포어가 새지 않음)
+    """
+
+    def __init__(self):
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._held: Dict[object, str] = {}  # run_id → provider
+
+    def _semaphore(self, provider: str) -> Optional[asyncio.Semaphore]:
+        limit = provider_limit(provider)
+        if limit <= 0:
+            return None
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            semaphore = self._semaphores[provider] = asyncio.Semaphore(limit)
+        return semaphore
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        provider = _LS_PROVIDERS.get((metadata or {}).get("ls_provider"), "")
+        semaphore = self._semaphore(provider) if provider else None
+        if semaphore is None:
+            return
+        start = time.perf_counter()
+        await semaphore.acquire()
+        self._held[run_id] = provider
+        provider_wait.observe(provider, value=time.perf_counter() - start)
+        provider_inflight.inc(provider)
+
+    def _release(self, run_id):
+        provider = self._held.pop(run_id, None)
+        if provider is not None:
+            self._semaphores[provider].release()
+            provider_inflight.inc(provider, amount=-1)
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        self._release(run_id)
+
+    async def on_llm_error(self, error, *, run_id, **kwargs):
+        self._release(run_id)
+
+
+provider_gate = ProviderGate()
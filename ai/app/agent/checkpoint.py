@@ -0,0 +1,125 @@
+import os
+from collections import OrderedDict
+from typing import Optional
+
+# 세션 체크포인트: 그래프를 LangGraph 체크포인터와 컴파일해서 session_id(thread_id)별 마지막 턴의 최종 상태를 저장
+# → 다음 턴에 백엔드는 새 메시지 + history_version만 보내고, history는 저장된 상태에서 이어받음
+#   off    : 체크포인트 없음, 매 턴 history 전체를 받음 (기본)
+#   memory : 프로세스 메모리 (워커마다 따로 → 다른 워커로 가면 버전 불일치 → 전체 history로 폴백)
+#   sqlite : langgraph-checkpoint-sqlite, CHECKPOINT_PATH 파일 (같은 호스트 워커끼리 공유)
+#
+# history_version: 이 턴의 user 메시지 전까지 백엔드에 저장된 메시지 수
+#   저장된 상태의 history_version + 그 턴에 백엔드가 저장한 메시지 수(user + 답변)와 같으면 이어받고,
+#   다르거나 저장된 상태가 없으면 409 HISTORY_MISMATCH → 백엔드가 history 전체로 다시 요청 (그 턴부터 다시 저장)
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "off")
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "/tmp/grogi_checkpoints.db")
+CHECKPOINT_MAX_SESSIONS = int(os.getenv("CHECKPOINT_MAX_SESSIONS", "10000"))  # 워커별, 넘으면 오래된 세션부터 삭제
+
+# 이어받은 history 길이 상한 (이번 user 메시지 포함 창). 전체 history 모드에서 백엔드가 보내는 최근 메시지 수
+# (backend chat.service.ts ensureSessionForChat의 take: 20)와 같게 → 두 모드에서 모델이 보는 history가 같음
+# 세션이 이보다 길면 창 앞부분이 턴마다 밀림 → history 요약은 위치가 아니라 메시지 내용으로 이어 씀 (history._load_summary)
+CHECKPOINT_HISTORY_MESSAGES = int(os.getenv("CHECKPOINT_HISTORY_MESSAGES", "20"))
+
+# 이어받을 때 읽는 값. 나머지(이미지 base64, PDF 등)는 그래프 끝의 trim_checkpoint 노드가 비워서 저장 크기를 줄임
+RESUME_FIELDS = frozenset(("history", "user_message", "diagnosis", "crisis_level", "history_version"))
+
+stats = {"resumed": 0, "new": 0, "missing": 0, "mismatch": 0, "full": 0, "evicted": 0}
+
+_conn = None  # sqlite 백엔드의 aiosqlite 연결 (종료 시 닫음)
+_threads: "OrderedDict[str, None]" = OrderedDict()  # 이 워커가 저장한 thread_id (LRU)
+
+
+async def open_checkpointer():
+    """CHECKPOINT_BACKEND에 맞는 체크포인터 (off면 None). lifespan에서 그래프 컴파일 전에 호출"""
+    global _conn
+    if CHECKPOINT_BACKEND not in ("memory", "sqlite"):
+        return None
+    if CHECKPOINT_BACKEND == "sqlite":
+        try:
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError as e:
+            print(f"[Checkpoint] langgraph-checkpoint-sqlite 로드 실패 → memory: {e}")
+        else:
+            _conn = await aiosqlite.connect(CHECKPOINT_PATH)
+            await _conn.execute("PRAGMA journal_mode=WAL")
+            saver = AsyncSqliteSaver(_conn)
+            await saver.setup()
+            print(f"[Checkpoint] sqlite ({CHECKPOINT_PATH})")
+            return saver
+
+    from langgraph.checkpoint.memory import InMemorySaver
+
+    return InMemorySaver()
+
+
+async def close_checkpointer():
+    global _conn
+    if _conn is not None:
+        await _conn.close()
+        _conn = None
+
+
+def thread_config(session_id: str) -> dict:
+    return {"configurable": {"thread_id": session_id}}
+
+
+def trimmed(values: dict) -> dict:
+    """저장 직전 상태 업데이트: RESUME_FIELDS 외의 값은 None으로"""
+    return {key: None for key, value in values.items() if key not in RESUME_FIELDS and value is not None}
+
+
+def _turn_messages(values: dict, unclear_reply: str) -> list:
+    """저장된 턴에서 백엔드가 DB에 남긴 메시지 (user + 답변, 위기 안내는 답변 저장 안 됨)"""
+    messages = [{"role": "user", "content": values.get("user_message", "")}]
+    level = values.get("crisis_level")
+    if level == "unclear":
+        messages.append({"role": "assistant", "content": unclear_reply})
+    elif level != "crisis" and values.get("diagnosis"):
+        messages.append({"role": "assistant", "content": values["diagnosis"]})
+    return messages
+
+
+async def load_history(executor, session_id: str, version: int, unclear_reply: str) -> Optional[list]:
+    """
+    저장된 상태 + 그 턴의 메시지 = 이번 턴의 history (최근 CHECKPOINT_HISTORY_MESSAGES - 1개, 이번 user 메시지 자리 제외)
+    저장된 버전과 이어지지 않으면 None (→ 전체 history 필요)
+    """
+    if version == 0:  # 백엔드에 메시지가 하나도 없던 새 세션
+        stats["new"] += 1
+        return []
+    snapshot = await executor.aget_state(thread_config(session_id))
+    values = snapshot.values if snapshot else None
+    if not values or values.get("history_version") is None:
+        stats["missing"] += 1
+        return None
+
+    turn = _turn_messages(values, unclear_reply)
+    if values["history_version"] + len(turn) != version:
+        stats["mismatch"] += 1
+        print(f"[Checkpoint] {session_id} 버전 불일치 (저장 {values['history_version']}+{len(turn)}, 요청 {version})")
+        return None
+    stats["resumed"] += 1
+    history = values.get("history") or []
+    # 전체 history 모드에서 백엔드가 현재 user 메시지까지 history에 넣어 보낸 경우 중복 방지
+    if history and history[-1] == turn[0]:
+        turn = turn[1:]
+    # 상한 없이 이어 붙이면 세션이 길어질수록 저장 크기와 프롬프트가 계속 커짐
+    history = history + turn
+    keep = max(CHECKPOINT_HISTORY_MESSAGES - 1, 0)
+    return history[-keep:] if keep else []
+
+
+async def start_turn(executor, session_id: str):
+    """
+    이번 턴 실행 전에 이전 상태 삭제 (입력에 history를 다시 넣으므로 이전 턴 값(image_urls 등)이 섞이지 않게,
+    세션당 저장 크기도 마지막 턴 하나로 제한)
+    """
+    checkpointer = executor.checkpointer
+    await checkpointer.adelete_thread(session_id)
+    _threads[session_id] = None
+    _threads.move_to_end(session_id)
+    while len(_threads) > CHECKPOINT_MAX_SESSIONS:
+        stale, _ = _threads.popitem(last=False)
+        await checkpointer.adelete_thread(stale)
+        stats["evicted"] += 1
@@ -1,20 +1,37 @@
-import base64
-from io import BytesIO
-from typing import TypedDict, List
-from pathlib import Path
-
-from dotenv import load_dotenv
+import asyncio
+from collections import OrderedDict
+import os
+import time
+import uuid
+from typing import List, Literal, Optional, TypedDict
+
+from langchain_core.callbacks.manager import adispatch_custom_event
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.output_parsers import PydanticOutputParser, StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
-
-from app.prompts.system_prompts import LEVEL_PROMPTS, SYSTEM_PROMPT_BASE
-from app.tools.calculator import calculate_reality_score_logic
-from app.tools.search import get_search_tool
+from pydantic import BaseModel, Field
+
+from app.agent import checkpoint
+from app.agent.history import compact_history, count_tokens
+from app.agent.metrics import Counter, Histogram, instrument, record_cache, record_error, register_metric
+from app.agent.prompt_cache import build_prompt, merge_usage, record_usage, volatile_context
+from app.agent.registry import get_llm, get_search_tool, with_overrides
+from app.agent.session_store import get_session_store
+from app.prompts.node_prompts import (
+    CATEGORIES,
+    CATEGORY_PROMPT,
+    CRISIS_PROMPT,
+    SEARCH_QUERY_PROMPT,
+    TRIAGE_PROMPT,
+)
+from app.tools.calculator import calculate_reality_score_logic, score_user_message
+from app.tools.crisis_classifier import classify_crisis_local
+from app.tools.keyword_matcher import classify_crisis_keywords, parse_followup
+from app.tools.image_pipeline import prepare_images, vision_cache, vision_key
+from app.tools.pdf_extractor import extract_pdfs
+from app.tools.pdf_retriever import aget_index as build_pdf_index, aselect_context as select_pdf_context
+from app.tools.query_filter import memo_key, prefilter_search_query, query_memo
 
 
 class AgentState(TypedDict):
@@ -33,103 +50,115 @@ class AgentState(TypedDict):
     crisis_level: str  # "safe" | "unclear" | "crisis"
     images: List[str]
     image_analysis: str
+    image_urls: List[str]  # 전처리(축소/중복 제거)된 main 모델용 data URL
     pdfs: List[dict]
     pdf_text: str
     pdf_images: List[str]
-
-
-# ai/.env를 명시 로드하여 상위 쉘 환경변수보다 우선 적용
-AI_ROOT = Path(__file__).resolve().parents[2]
-load_dotenv(dotenv_path=AI_ROOT / ".env", override=True)
-
-llm_haiku = ChatAnthropic(model="claude-3-haiku-20240307", temperature=0.3)
-llm_gemini = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.3)
-
-# 현재 사용 중: gemini (haiku로 바꾸려면 llm = llm_haiku)
-llm = llm_gemini
-llm_mini = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
-
-
-_pdf_cache: dict[str, dict] = {}
-_crisis_pending: dict[str, str] = {}  # session_id → 원본 위기 메시지
-
-
-def extract_pdf_text(state: AgentState):
+    triaged: bool  # triage 노드가 위기/카테고리/검색어를 한 번에 판정했는지
+    search_query: str
+    prompt_cache: dict  # 본 응답 호출의 provider 프롬프트 캐시 사용량
+    score_task: str  # concurrent 채점 모드의 선채점 태스크 id
+    tools_task: str  # speculative 생성 모드의 검색 결정 태스크 id
+    history_version: Optional[int]  # 이 턴 전까지 백엔드에 저장된 메시지 수 (세션 체크포인트 이어받기용)
+
+
+# 모델은 app.agent.registry에서 슬롯별로 재사용 (main / mini / vision / score)
+# 본 응답 모델 변경: LLM_MAIN_PROVIDER=anthropic LLM_MAIN_MODEL=claude-3-haiku-20240307
+
+
+# 세션 상태 저장소 네임스페이스
+#   pdf    : session_id → {"pdf_text", "pdf_images"} (PDF 없는 후속 턴에서 재사용)
+#   crisis : session_id → 원본 위기 메시지 (unclear 확인 질문 후 다음 턴에서 사용)
+PDF_NAMESPACE = "pdf"
+CRISIS_NAMESPACE = "crisis"
+CRISIS_PENDING_TTL = float(os.getenv("CRISIS_PENDING_TTL", str(30 * 60)))
+UNCLEAR_REPLY = "야 잠만.\n지금 그거 진심이야?"  # unclear 판정 시 되묻는 답변 (체크포인트 history에도 같은 문장)
+
+# split: crisis_check / analyze_input / 검색어 추출을 노드별 LLM 호출로 (기본)
+# fused: triage 노드에서 구조화 출력 한 번으로 판정, 파싱 실패 시 split 경로로 폴백
+#   → LLM 호출 수(비용)를 줄이는 모드이지 TTFT를 줄이는 모드가 아님. 기본은 split
+#     split에서 없어지는 호출(카테고리 / 검색어)은 원래 fan-out 안에서 검색·이미지 분석과 병렬이거나 memo 히트라
+#     critical path에 없었고, triage의 JSON 출력은 "SAFE" 한 단어보다 길어서 fan-out 전 직렬 구간이 늘어남
+#     (bench.ttft: 턴당 LLM 호출 5 → 4, TTFT p50 1123ms → 1305ms)
+TRIAGE_MODE = os.getenv("TRIAGE_MODE", "split")
+
+# sequential: 응답 생성이 끝난 뒤 채점 (기본)
+# concurrent: safe 판정 직후 사용자 입력만으로 채점을 시작해 응답 생성과 겹침,
+#             문맥이 필요하다고 판단되면 응답까지 넣어 다시 채점
+SCORE_MODE = os.getenv("SCORE_MODE", "sequential")
+SCORE_TASKS_MAX = 1000
+_score_tasks: "OrderedDict[str, asyncio.Task]" = OrderedDict()  # score_task id → 선채점 태스크
+
+# sequential : 검색어 추출(+검색)이 끝나야 응답 생성 시작 (기본)
+# speculative: 검색 결정은 백그라운드로 돌리고, 나머지 준비가 끝나면 factcheck 없이 응답 생성부터 시작
+#              검색 불필요(NONE)로 나오면 그 스트림을 그대로 쓰고(hit), 검색어가 나오면 버리고 검색 결과로 재생성(miss)
+#              추측 생성 청크는 결정 전까지 클라이언트에 안 보냄 (main.py가 SPECULATION_EVENT를 받을 때까지 보류)
+# SPECULATIVE_HOLD_CHARS: 결정 전에 미리 받아둘 최대 글자 수 → 넘으면 스트림을 멈추고 결정을 기다림 (miss 때 버리는 양 상한, 0이면 제한 없음)
+GENERATE_MODE = os.getenv("GENERATE_MODE", "sequential")
+SPECULATIVE_HOLD_CHARS = int(os.getenv("SPECULATIVE_HOLD_CHARS", "600"))
+SPECULATIVE_TAG = "speculative"
+SPECULATION_EVENT = "speculation"
+NO_SEARCH_RESULTS = "검색 결과 없음"
+_tools_tasks: "OrderedDict[str, asyncio.Task]" = OrderedDict()  # tools_task id → 검색 결정 태스크
+
+speculation_total = register_metric(Counter(
+    "grogi_speculation_total", "추측 생성 결과 (hit: 그대로 사용, miss: 버리고 재생성, skipped: 생성 전에 검색 결정 완료)", ("result",)))
+speculation_wasted_tokens = register_metric(Counter(
+    "grogi_speculation_wasted_tokens_total", "miss로 버린 추측 생성 출력 토큰 (tiktoken 추정)", ()))
+speculation_lead_seconds = register_metric(Histogram(
+    "grogi_speculation_lead_seconds", "추측 생성 시작부터 검색 결정까지 시간 (hit면 앞당긴 시간)", ("result",)))
+
+# 키워드 사전은 crisis 쪽으로만 단축 (사전에 없는 표현의 위기 메시지가 있으므로 "위험 단어 없음"을 safe 근거로 쓰지 않음)
+# 1이면 위험 단어가 없을 때 사전 결과를 분류기에 넘겨 safe 확정을 허용 (명시적으로 켤 때만, 기본 꺼짐)
+CRISIS_KEYWORD_SAFE_FASTPATH = os.getenv("CRISIS_KEYWORD_SAFE_FASTPATH", "0") == "1"
+
+
+class TriageResult(BaseModel):
+    crisis_level: Literal["SAFE", "UNCLEAR", "CRISIS"] = Field(..., description="자살/자해 위험도")
+    category: Literal["career", "love", "finance", "self", "etc"] = Field(..., description="고민 카테고리")
+    search_query: str = Field(..., description='검색 쿼리 하나, 검색할 게 없으면 "NONE"')
+
+
+async def extract_pdf_text(state: AgentState):
     session_id = state.get("session_id", "")
     pdfs = state.get("pdfs", [])
+    store = get_session_store()
     if not pdfs:
         # PDF 없으면 캐시에서 가져오기
-        if session_id and session_id in _pdf_cache:
-            cached = _pdf_cache[session_id]
+        cached = await store.get(PDF_NAMESPACE, session_id) if session_id else None
+        if cached:
+            if cached["pdf_text"]:
+                await build_pdf_index(cached["pdf_text"])  # 다른 워커가 추출했거나 색인 캐시에서 밀려난 경우
             return {"pdf_text": cached["pdf_text"], "pdf_images": cached.get("pdf_images", [])}
         return {"pdf_text": "", "pdf_images": []}
 
-    import fitz  # PyMuPDF
-
-    extracted = []
-    pdf_page_images = []
-
-    for pdf in pdfs:
-        filename = pdf.get("filename", "문서")
-        content = pdf.get("content", "")
-        try:
-            pdf_bytes = base64.b64decode(content)
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            page_count = min(len(doc), 10)
-
-            # 텍스트 추출 시도
-            pages = []
-            for i in range(page_count):
-                text = doc[i].get_text() or ""
-                if text.strip():
-                    pages.append(f"[{i+1}페이지]\n{text}")
-
-            full_text = "\n".join(pages)
-            print(f"[PDF 추출] {filename}: {len(doc)}페이지, 텍스트 {len(full_text)}자")
-
-            if full_text.strip():
-                extracted.append(f"[문서: {filename}]\n{full_text}")
-            else:
-                # 텍스트 없으면 페이지를 이미지로 변환
-                print(f"[PDF 추출] 이미지 기반 PDF → 비전 모델로 전환")
-                for i in range(min(page_count, 5)):
-                    pix = doc[i].get_pixmap(dpi=150)
-                    img_base64 = base64.b64encode(pix.tobytes("png")).decode()
-                    pdf_page_images.append(img_base64)
-                extracted.append(f"[문서: {filename}] 이미지 기반 PDF - 비전으로 분석")
-
-            doc.close()
-        except Exception as e:
-            print(f"[PDF 추출 오류] {filename}: {e}")
-            extracted.append(f"[문서: {filename}] 읽기 실패: {str(e)}")
-
-    result = {
-        "pdf_text": "\n\n---\n\n".join(extracted),
-        "pdf_images": pdf_page_images,
-    }
+    # 페이지 단위 병렬 추출 (프로세스 풀, 내용 해시 캐시)
+    result = await extract_pdfs(pdfs)
+    # 응답 생성 때 검색만 하도록 발췌용 색인을 여기서 미리 (스레드, 다른 준비 노드와 동시에)
+    if result["pdf_text"]:
+        await build_pdf_index(result["pdf_text"])
 
     # 세션별 캐시 저장
     if session_id:
-        _pdf_cache[session_id] = result
+        await store.set(PDF_NAMESPACE, session_id, result)
 
     return result
 
 
-def crisis_check(state: AgentState):
+async def crisis_check(state: AgentState):
     user_msg = state.get("user_message", "")
     session_id = state.get("session_id", "")
 
-    # 0차: 이전 턴에서 unclear → 확인 질문 던진 상태인지 체크
-    if session_id and session_id in _crisis_pending:
-        original_msg = _crisis_pending.pop(session_id)  # 캐시에서 제거
-
-        affirm = ["ㅇㅇ", "응", "어", "진심", "맞아", "그래", "진짜", "ㅇ"]
-        deny = ["아니", "ㄴㄴ", "장난", "그냥", "아닌데", "ㄴ", "아님"]
+    store = get_session_store()
 
-        msg_stripped = user_msg.strip()
-        if any(kw in msg_stripped for kw in affirm):
+    # 0차: 이전 턴에서 unclear → 확인 질문 던진 상태인지 체크
+    original_msg = await store.pop(CRISIS_NAMESPACE, session_id) if session_id else None  # 꺼내면서 제거
+    if original_msg is not None:
+        # 토큰 경계 기준 매칭 ("ㅇ", "ㄴ"이 아무 단어에나 걸리지 않도록)
+        answer = parse_followup(user_msg.strip())
+        if answer == "affirm":
             return {"crisis_level": "crisis"}
-        elif any(kw in msg_stripped for kw in deny):
+        elif answer == "deny":
             return {"crisis_level": "safe"}
         else:
             # 모호한 답변 → LLM으로 한 번 더 판별
@@ -139,87 +168,121 @@ def crisis_check(state: AgentState):
 애매하면 SAFE로 판단해."""),
                 ("user", "{input}"),
             ])
-            chain = followup_prompt | llm_mini | StrOutputParser()
-            result = chain.invoke({"input": user_msg}).strip().upper()
+            chain = followup_prompt | get_llm("mini") | StrOutputParser()
+            result = (await chain.ainvoke({"input": user_msg})).strip().upper()
             return {"crisis_level": "crisis" if "CRISIS" in result else "safe"}
 
-    # 1차: 구체적 방법 언급 키워드 → 즉시 crisis
-    hard_crisis = ["번개탄", "유서", "약 모으", "뛰어내리", "목을 매", "손목을 그"]
-    if any(kw in user_msg for kw in hard_crisis):
+    # 1차: 키워드 사전 (Aho–Corasick) → 구체적 방법 언급은 즉시 crisis
+    keyword_level = classify_crisis_keywords(user_msg)
+    if keyword_level == "crisis":
         return {"crisis_level": "crisis"}
-
-    # 2차: LLM 판별
+    risk_hit = keyword_level is None  # [risk] 단어가 걸림 (관용 표현일 수도 있음)
+    if not CRISIS_KEYWORD_SAFE_FASTPATH:
+        keyword_level = None
+
+    # 2차: 로컬 분류기 (문자 n-gram) → 확신이 충분할 때만 확정
+    #   위험 단어가 없어도 분류기가 위험 쪽으로 보면 LLM으로 확인, 위험 단어가 있으면 safe는 LLM으로 확인
+    local_level = classify_crisis_local(user_msg, keyword_level, risk_hit)
+    if local_level is not None:
+        if local_level == "unclear" and session_id:
+            await store.set(CRISIS_NAMESPACE, session_id, user_msg, ttl=CRISIS_PENDING_TTL)
+        return {"crisis_level": local_level}
+
+    # 3차: LLM 판별
     crisis_prompt = ChatPromptTemplate.from_messages(
         [
             (
                 "system",
-                """사용자의 입력에서 실제 자살/자해 위험도를 판별해. 반드시 SAFE, UNCLEAR, CRISIS 중 하나로만 답해.
-
-한국어에서 아래 표현들은 일상적 감탄사로 자주 쓰인다:
-- "아 죽고 싶다", "자살마렵다", "뒤지겠다", "죽을 것 같아"
-- "미쳐버리겠다", "환장하겠네", "죽여줘"
-- 이런 표현이 불만, 짜증, 피곤, 스트레스 맥락에서 나오면 → SAFE
-
-SAFE (대부분 이쪽이다):
-- 일상적 도움 요청 ("도와줘", "나좀도와줘", "어떻게해", "힘들어", "지쳤어")
-- 욕설, 비속어, 분노 표현 ("뒤질래", "죽여버린다", "미치겠다")
-- 장난, 시비, 도발, 과장 표현
-- 일상적 불만, 짜증, 스트레스에서 나온 관용적 표현
-- 상대방에게 하는 말 ("뒤질래?", "죽을래?")
-- 자살/자해와 무관한 고민 상담 요청
-
-UNCLEAR (모호한 경우):
-- 위기 신호가 직접적이진 않지만 반복적 절망감이 느껴질 때
-- "사는 게 의미가 없다", "없어져도 아무도 모를 거야" 같은 고립감 표현
-- 맥락상 진짜 힘든 건지 그냥 한 말인지 구분이 안 될 때
-
-CRISIS (매우 드물다):
-- 구체적 방법 언급 ("XX층에서 뛰어내리고 싶다", "약을 모으고 있어")
-- 유서/마지막 인사 맥락 ("다 정리했다", "마지막으로 하고 싶은 말")
-- 자해 경험/계획 언급 ("또 그었어", "이번엔 진짜로")
-
-애매하면 SAFE로 판단하라. UNCLEAR는 정말 모호할 때만.""",
+                CRISIS_PROMPT,
             ),
             ("user", "{input}"),
         ]
     )
-    chain = crisis_prompt | llm_mini | StrOutputParser()
-    result = chain.invoke({"input": user_msg}).strip().upper()
+    chain = crisis_prompt | get_llm("mini") | StrOutputParser()
+    result = (await chain.ainvoke({"input": user_msg})).strip().upper()
 
     if "CRISIS" in result:
         return {"crisis_level": "crisis"}
     elif "UNCLEAR" in result:
         # unclear → 세션에 원본 메시지 저장 (다음 턴에서 확인용)
         if session_id:
-            _crisis_pending[session_id] = user_msg
+            await store.set(CRISIS_NAMESPACE, session_id, user_msg, ttl=CRISIS_PENDING_TTL)
         return {"crisis_level": "unclear"}
     return {"crisis_level": "safe"}
 
 
-def analyze_input(state: AgentState):
+async def triage(state: AgentState):
+    """
+    crisis_check + analyze_input + 검색어 추출을 구조화 출력 LLM 호출 한 번으로 합친 노드.
+    위기 확인 후속 턴이거나 출력 파싱에 실패하면 triaged=False → 기존 노드별 경로로 폴백
+    fan-out 전에 구조화 출력 전체를 기다리므로 TTFT는 crisis_check보다 늦음 (호출 수만 줄어듦, TRIAGE_MODE 참고)
+    """
+    user_msg = state.get("user_message", "")
+    session_id = state.get("session_id", "")
+    store = get_session_store()
+
+    # 이전 턴에서 "진심이야?" 물어본 상태면 후속 답변 판별은 crisis_check에 맡김
+    if session_id and await store.get(CRISIS_NAMESPACE, session_id) is not None:
+        return {"triaged": False}
+
+    if classify_crisis_keywords(user_msg) == "crisis":
+        return {"triaged": True, "crisis_level": "crisis"}
+
+    parser = PydanticOutputParser(pydantic_object=TriageResult)
+    triage_prompt = ChatPromptTemplate.from_messages([
+        ("system", TRIAGE_PROMPT),
+        ("user", "{input}"),
+    ])
+    chain = triage_prompt | get_llm("mini") | parser
+    try:
+        result = await chain.ainvoke({
+            "input": user_msg,
+            "format_instructions": parser.get_format_instructions(),
+        })
+    except Exception as e:
+        print(f"[Triage] 구조화 출력 실패 → 노드별 경로로 폴백: {e}")
+        record_error("triage_parse")
+        return {"triaged": False}
+
+    crisis_level = result.crisis_level.lower()
+    if crisis_level == "unclear" and session_id:
+        await store.set(CRISIS_NAMESPACE, session_id, user_msg, ttl=CRISIS_PENDING_TTL)
+
+    return {
+        "triaged": True,
+        "crisis_level": crisis_level,
+        "category": result.category,
+        "search_query": result.search_query.strip() or "NONE",
+    }
+
+
+async def analyze_input(state: AgentState):
+    # 병렬 브랜치에서 실행되므로 전체 state를 되돌려주면 다른 노드 출력과 충돌함
     if state.get("crisis_level") in ("crisis", "unclear"):
-        return state
+        return {}
+    # triage에서 이미 카테고리 판정
+    if state.get("triaged"):
+        return {}
 
     analysis_prompt = ChatPromptTemplate.from_messages(
         [
             (
                 "system",
-                "사용자의 입력을 분석하여 다음 중 가장 적절한 카테고리를 하나만 선택하세요: career, love, finance, self, etc",
+                CATEGORY_PROMPT,
             ),
             ("user", "{input}"),
         ]
     )
-    chain = analysis_prompt | llm_mini | StrOutputParser()
-    category = chain.invoke({"input": state["user_message"]}).strip().lower()
+    chain = analysis_prompt | get_llm("mini") | StrOutputParser()
+    category = (await chain.ainvoke({"input": state["user_message"]})).strip().lower()
 
-    valid_categories = ["career", "love", "finance", "self", "etc"]
-    if category not in valid_categories:
+    if category not in CATEGORIES:
         category = "etc"
 
     return {"category": category}
 
 
-def analyze_images(state: AgentState):
+async def analyze_images(state: AgentState):
     images = state.get("images", [])
     if not images:
         return {"image_analysis": "이미지 없음"}
@@ -231,58 +294,68 @@ def analyze_images(state: AgentState):
 
 분석 결과는 팩트 위주로 건조하게 서술하십시오."""
 
+    # 한 번 디코딩해서 vision / main 슬롯 크기로 같이 축소 (main용은 generate_response에서 재사용)
+    prepared = await prepare_images(images, ("vision", "main"))
+    image_urls = [item["main"] for item in prepared]
+
+    key = vision_key(prepared)
+    cached = await vision_cache.get("vision", key) if key else None
+    if key:
+        record_cache("vision", cached is not None)
+    if cached is not None:
+        print(f"[Image] vision 분석 캐시 히트 ({key[:12]})")
+        return {"image_analysis": cached, "image_urls": image_urls}
+
     messages = [
         SystemMessage(content=system_msg),
         HumanMessage(content=[{"type": "text", "text": "이 이미지를 분석해줘."}]),
     ]
+    for item in prepared:
+        messages[1].content.append({"type": "image_url", "image_url": {"url": item["vision"]}})
 
-    for img in images:
-        if img.startswith("http"):
-            img_url = img
-        elif img.startswith("data:image/"):
-            img_url = img
-        else:
-            # 기본값 jpeg, 하지만 png일 수도 있음 -> 헤더 보고 판별 시도
-            # 간단히: /9j/ -> jpg, iVBORw0KGgo -> png
-            if img.startswith("/9j/"):
-                mime = "image/jpeg"
-            elif img.startswith("iVBORw0KGgo"):
-                mime = "image/png"
-            elif img.startswith("R0lGOD"):
-                mime = "image/gif"
-            elif img.startswith("UklGR"):
-                mime = "image/webp"
-            else:
-                mime = "image/jpeg" # fallback
-            img_url = f"data:{mime};base64,{img}"
-
-        messages[1].content.append({"type": "image_url", "image_url": {"url": img_url}})
+    result = await get_llm("vision").ainvoke(messages)
+    if key:
+        await vision_cache.set("vision", key, result.content)
+    return {"image_analysis": result.content, "image_urls": image_urls}
 
-    vision_llm = ChatAnthropic(model="claude-haiku-4-5-20251001")
-    result = vision_llm.invoke(messages)
-    return {"image_analysis": result.content}
 
-
-def select_tools(state: AgentState):
-    return {"status": "selecting_tools"}
-
-
-def execute_tools(state: AgentState):
+async def _extract_search_query(user_message: str) -> str:
+    """
+    검색 쿼리 추출: 로컬 사전 필터 → 메모 캐시 → LLM 순서
+    반환값이 "NONE"이면 검색 불필요
+    """
+    # 검색 필요 없는 게 뻔한 메시지는 LLM 호출 없이 바로 NONE
+    search_query = prefilter_search_query(user_message)
+    if search_query is not None:
+        return search_query
+
+    key = memo_key(user_message)
+    cached = await query_memo.get("query", key)
+    record_cache("search_query", cached is not None)
+    if cached is not None:
+        return cached
+
+    # LLM으로 검색이 필요한 키워드 추출
+    extract_prompt = ChatPromptTemplate.from_messages([
+        ("system", SEARCH_QUERY_PROMPT),
+        ("user", "{input}")
+    ])
+    extract_chain = extract_prompt | get_llm("mini") | StrOutputParser()
+    search_query = (await extract_chain.ainvoke({"input": user_message})).strip()
+
+    await query_memo.set("query", key, search_query)
+    return search_query
+
+
+async def execute_tools(state: AgentState):
     search_tool = get_search_tool()
     search_results = "검색 결과 없음"
 
     if search_tool:
-        # LLM으로 검색이 필요한 키워드 추출
-        extract_prompt = ChatPromptTemplate.from_messages([
-            ("system", """사용자 메시지에서 실시간 정보나 최신 유행어 검색이 필요한 키워드를 추출해.
-- 모르는 단어, 유행어(예: 두쫀쿠, 슬릭백 등), 특정 브랜드명, 사건 사고, 논문/자료 링크, 도서 정보 등.
-- 사용자가 구체적인 정보(링크, 제목, 출처)를 요구하거나 실시간 확인이 필요한 모든 상황.
-- 검색할 게 없으면 "NONE"이라고만 답해.
-- 검색할 게 있으면 검색 쿼리 하나만 짧게 답해. (예: "자연어 처리 감성 분석 논문")"""),
-            ("user", "{input}")
-        ])
-        extract_chain = extract_prompt | llm_mini | StrOutputParser()
-        search_query = extract_chain.invoke({"input": state["user_message"]}).strip()
+        if state.get("triaged"):
+            search_query = state.get("search_query", "NONE")
+        else:
+            search_query = await _extract_search_query(state["user_message"])
 
         if search_query and search_query.upper() != "NONE":
             print(f"[Search] Query extracted: {search_query}")
@@ -291,57 +364,38 @@ def execute_tools(state: AgentState):
                 if len(search_query.split()) == 1 and not any(kw in search_query for kw in ["뜻", "의미", "뭐야"]):
                     search_query += " 뜻 의미"
                 
-                results = search_tool.invoke({"query": search_query})
+                results = await search_tool.ainvoke({"query": search_query})
                 if results:
                     search_results = str(results)
                 else:
                     search_results = f"'{search_query}'에 대한 검색 결과가 없습니다."
             except Exception as e:
                 print(f"[Search Error] {e}")
+                record_error("search")
                 search_results = f"검색 중 오류 발생: {str(e)}"
 
     return {"factcheck": search_results, "status": "executing_tools"}
 
 
-async def generate_response(state: AgentState):
-    from datetime import datetime
-
-    # 게이지를 쓰지 않고, 항상 spicy 톤 고정
-    level_prompt = LEVEL_PROMPTS["spicy"]
-    today = datetime.now().strftime("%Y년 %m월 %d일")
-
-    full_system_prompt = f"""{SYSTEM_PROMPT_BASE}
-{level_prompt}
-
-[현재 상황]
-오늘 날짜: {today}
-카테고리: {state['category']}
-실시간 정보: {state['factcheck']}
-이미지 분석(팩트): {state.get('image_analysis', '없음')}
-문서 내용: {state.get('pdf_text', '없음')}
-
-[응답 규칙]
-1. 한 문장 최대 20자. 문장마다 반드시 줄바꿈. 카톡처럼 짧게 툭툭.
-2. 서술형 금지. 카톡 말투로.
-3. 매번 해결책 던지지 마. 대화하듯이 티키타카 해. 상황 파악 먼저.
-4. 해결책은 문제 파악 됐을 때만. A안 B안 형식 금지. 대화체로 자연스럽게.
-5. 실시간 검색 기능을 적극적으로 사용하여 사용자에게 객관적으로 유용한 정보나 링크를 제공해라. 너는 실시간 검색이 가능하며, 사용자에게 검색 결과를 바로 전달해줄 수 있다. "실시간 검색이 안 된다"는 말은 절대 하지 마.
-6. JSON, 코드블록, 마크다운(링크 제외) 쓰지 마.
-7. 이미지 분석 결과 있으면 자연스럽게 녹여서.
-8. 문서 내용이 제공되면 "뭘 분석해?" 같은 되물음 없이 바로 비평 시작해. 문서를 읽었으니까 내용에 대해 바로 말해.
-9. 문서 비평할 때도 한꺼번에 다 쏟지 말고 핵심부터 하나씩.
-10. 문서에 실제로 있는 내용만 언급해. 없는 페이지, 없는 텍스트를 지어내면 안 됨. 확인 안 된 건 말하지 마.
-11. 사용자의 말을 그대로 따라하며 시작하는 행위(앵무새)를 **절대 금지**한다. (예: "7캔 마셨네.", "XX했구나.")
-12. 어떤 상황에서도 사용자가 방금 입력한 수치나 핵심 키워드를 확인하며 대화를 시작하지 마라.
-13. 확인 절차 없이 바로 네 분석 결과나 질문으로 훅 들어가라.
-14. 문서/포트폴리오 분석 중 사용자가 "알려줘" 등 모호한 반응일 때만 다음 섹션으로 이동해라. 특정 섹션에 대한 수정 요청이 있으면 그게 끝날 때까지 머물러라.
-15. 다음 단계를 제안하되, 사용자가 거부하거나 다른 걸 요구하면 바로 꺾어라. 니 논리보다 사용자 요구가 우선이다.
-16. 사용자가 제공하지 않은 구체적인 수치(%, 시간 등)를 마치 사실인 양 지어내지 마라. 지표 중심의 비평은 하되, 숫자는 사용자의 데이터로만 말하거나 물어봐라.
-"""
-
-    messages = [SystemMessage(content=full_system_prompt)]
-
-    for msg in state.get("history", []):
+async def start_tools(state: AgentState):
+    """
+    speculative 모드: 검색어 추출 + 검색(execute_tools)을 백그라운드로 시작만 하고 바로 반환
+    (fan-in이 검색 결정을 기다리지 않도록 → generate_response가 추측 생성과 겹쳐서 기다림)
+    """
+    task = asyncio.create_task(instrument("execute_tools", execute_tools)(state))
+    return {"tools_task": _track_task(_tools_tasks, task)}
+
+
+async def _response_messages(state: dict, summary: Optional[str], history: List[dict]) -> tuple:
+    # 문서는 전체 대신 이번 메시지 + 최근 대화와 관련된 부분만 토큰 예산 안에서 (pdf_retriever)
+    if state.get("pdf_text"):
+        state = {**state, "pdf_text": await select_pdf_context(state["pdf_text"], state["user_message"], history)}
+
+    # 고정 prefix(캐시 대상) + 매 턴 바뀌는 [현재 상황] suffix
+    llm = get_llm("main")
+    messages, llm_kwargs = await build_prompt("main", llm, volatile_context(state, summary))
+
+    for msg in history:
         content = msg["content"]
         if msg["role"] == "user":
             if "[이미지" in content:
@@ -352,44 +406,136 @@ async def generate_response(state: AgentState):
             messages.append(AIMessage(content=content))
 
     current_content = [{"type": "text", "text": state["user_message"]}]
-    for img in state.get("images", []):
-        if img.startswith("http"):
-            img_url = img
-        elif img.startswith("data:image/"):
-            img_url = img
-        else:
-            if img.startswith("/9j/"):
-                mime = "image/jpeg"
-            elif img.startswith("iVBORw0KGgo"):
-                mime = "image/png"
-            elif img.startswith("R0lGOD"):
-                mime = "image/gif"
-            elif img.startswith("UklGR"):
-                mime = "image/webp"
-            else:
-                mime = "image/jpeg"
-            img_url = f"data:{mime};base64,{img}"
-
+    image_urls = state.get("image_urls")
+    if image_urls is None and state.get("images"):
+        image_urls = [item["main"] for item in await prepare_images(state["images"], ("main",))]
+    for img_url in image_urls or []:
         current_content.append({"type": "image_url", "image_url": {"url": img_url}})
     for img in state.get("pdf_images", []):
         current_content.append({"type": "image_url", "image_url": {"url": f"data:image/png;base64,{img}"}})
 
     messages.append(HumanMessage(content=current_content))
+    return llm, messages, llm_kwargs
+
 
-    content = ""
-    async for chunk in llm.astream(messages):
-        content += chunk.content
+async def _speculate(state: dict, summary: Optional[str], history: List[dict], tools_task: asyncio.Task) -> tuple:
+    """
+    검색 결정(tools_task)을 기다리는 동안 factcheck 없이 응답 생성
+    → (execute_tools 결과, hit면 (본문, usage) / miss면 None)
+    """
+    llm, messages, llm_kwargs = await _response_messages({**state, "factcheck": NO_SEARCH_RESULTS}, summary, history)
+    decided = asyncio.Event()
+    parts: list = []
+
+    async def stream():
+        usage = None
+        size = 0
+        async for chunk in llm.astream(messages, {"tags": [SPECULATIVE_TAG]}, **llm_kwargs):
+            parts.append(chunk.content)
+            size += len(chunk.content)
+            usage = merge_usage(usage, chunk)
+            if SPECULATIVE_HOLD_CHARS > 0 and size >= SPECULATIVE_HOLD_CHARS and not decided.is_set():
+                await decided.wait()
+        return "".join(parts), usage
+
+    started = time.perf_counter()
+    speculative = asyncio.create_task(stream())
+    try:
+        tools = await tools_task
+        hit = tools.get("factcheck") == NO_SEARCH_RESULTS
+        result = "hit" if hit else "miss"
+        speculation_lead_seconds.observe(result, value=time.perf_counter() - started)
+        speculation_total.inc(result)
+        # main.py: hit면 보류한 청크를 내보내고 이어서 스트리밍, miss면 버림
+        await adispatch_custom_event(SPECULATION_EVENT, {"result": result})
+        decided.set()
+        if hit:
+            return tools, await speculative
+    finally:
+        if not speculative.done():
+            speculative.cancel()
+
+    try:
+        await speculative
+    except (asyncio.CancelledError, Exception):
+        pass
+    wasted = count_tokens("".join(parts))
+    speculation_wasted_tokens.inc(amount=wasted)
+    print(f"[Speculation] 검색 필요 → 추측 생성 폐기 (출력 약 {wasted}토큰)")
+    return tools, None
+
+
+async def generate_response(state: AgentState):
+    """speculative 모드면 검색 결정과 겹쳐서 추측 생성 (_speculate), 아니면 준비 결과로 바로 생성"""
+    # 히스토리 토큰 예산: 오래된 턴은 세션별 요약으로, 최근 턴만 원문으로
+    summary, history = await compact_history(state.get("session_id", ""), state.get("history", []))
+
+    tools: dict = {}
+    generated = None
+    tools_task = _tools_tasks.pop(state.get("tools_task") or "", None)
+    if tools_task is not None:
+        try:
+            if tools_task.done():
+                speculation_total.inc("skipped")
+                tools = tools_task.result()
+                await adispatch_custom_event(SPECULATION_EVENT, {"result": "skipped"})
+            else:
+                tools, generated = await _speculate(state, summary, history, tools_task)
+        except asyncio.CancelledError:
+            tools_task.cancel()
+            raise
+        state = {**state, **tools}
+
+    if generated is None:
+        llm, messages, llm_kwargs = await _response_messages(state, summary, history)
+        content = ""
+        usage = None
+        async for chunk in llm.astream(messages, **llm_kwargs):
+            content += chunk.content
+            usage = merge_usage(usage, chunk)
+        generated = content, usage
 
     return {
-        "diagnosis": content,
+        **({"factcheck": tools["factcheck"]} if tools else {}),
+        "diagnosis": generated[0],
+        "prompt_cache": record_usage("main", generated[1]),
         "status": "generated"
     }
 
-def calculate_score(state: AgentState):
+def _track_task(tasks: "OrderedDict[str, asyncio.Task]", task: asyncio.Task) -> str:
+    task_id = uuid.uuid4().hex
+    tasks[task_id] = task
+    # 태스크를 꺼내 쓰는 노드까지 못 가고 끝난 요청(에러/취소)의 태스크가 쌓이지 않도록
+    while len(tasks) > SCORE_TASKS_MAX:
+        _, stale = tasks.popitem(last=False)
+        stale.cancel()
+    return task_id
+
+
+async def start_scoring(state: AgentState):
+    """
+    concurrent 모드: 사용자 입력 기준 채점을 백그라운드로 시작만 하고 바로 반환
+    (fan-out 단계를 붙잡지 않도록 기다리지 않음 → 응답 생성과 동시에 진행)
+    """
+    task = asyncio.create_task(score_user_message(state["user_message"]))
+    return {"score_task": _track_task(_score_tasks, task)}
+
+
+async def calculate_score(state: AgentState):
     """
     AG-12: 별도 노드로 분리하여 스트리밍 누수 방지
+    concurrent 모드면 먼저 시작한 선채점 결과를 쓰고, 응답까지 봐야 할 때만 다시 채점
     """
-    reality_score = calculate_reality_score_logic(state["user_message"], state["diagnosis"])
+    reality_score = None
+    task = _score_tasks.pop(state.get("score_task") or "", None)
+    if task is not None:
+        early = await task
+        if early is not None and not early.pop("needs_context", False):
+            reality_score = early
+        else:
+            print("[Score] 선채점 결과 없음/문맥 필요 → 응답 포함 재채점")
+    if reality_score is None:
+        reality_score = await calculate_reality_score_logic(state["user_message"], state["diagnosis"])
 
     share_card = {
         "summary": reality_score.get("summary", "팩폭 요약: 현실 도피 그만하고 정신 차려!"),
@@ -404,40 +550,81 @@ def calculate_score(state: AgentState):
     }
 
 
-def build_graph():
-    workflow = StateGraph(AgentState)
+async def trim_checkpoint(state: AgentState):
+    # 체크포인터가 있을 때 마지막 노드: 이어받기에 필요 없는 큰 값(첨부 base64 등)을 비운 상태로 저장되게
+    return checkpoint.trimmed(state)
 
-    workflow.add_node("crisis_check", crisis_check)
-    workflow.add_node("extract_pdf_text", extract_pdf_text)
-    workflow.add_node("analyze_images", analyze_images)
-    workflow.add_node("analyze_input", analyze_input)
-    workflow.add_node("select_tools", select_tools)
-    workflow.add_node("execute_tools", execute_tools)
-    workflow.add_node("generate_response", generate_response)
-    workflow.add_node("calculate_score", calculate_score)
 
-    workflow.set_entry_point("crisis_check")
+def build_graph(triage_mode: str = TRIAGE_MODE, score_mode: str = SCORE_MODE, overrides: Optional[dict] = None,
+                generate_mode: str = GENERATE_MODE, checkpointer=None):
+    """
+    overrides: {"main": 모델, "search": 검색 도구, ...} → 이 그래프의 노드에서만 레지스트리 슬롯 대신 사용
+               (벤치마크용 가짜 모델 주입. 프로세스 전역을 바꾸는 registry.override와 달리 다른 그래프에 영향 없음)
+    checkpointer: 세션별 최종 상태 저장 (app.agent.checkpoint, 없으면 매 턴 history 전체 필요)
+    """
+    workflow = StateGraph(AgentState)
+
+    def add_node(name: str, fn):
+        # 모든 노드는 계측 래퍼를 거쳐 등록 (/agent/metrics)
+        if overrides:
+            fn = with_overrides(fn, overrides)
+        workflow.add_node(name, instrument(name, fn))
+
+    add_node("crisis_check", crisis_check)
+    add_node("extract_pdf_text", extract_pdf_text)
+    add_node("analyze_images", analyze_images)
+    add_node("analyze_input", analyze_input)
+    add_node("generate_response", generate_response)
+    add_node("calculate_score", calculate_score)
+
+    # safe 판정 후 서로 의존성 없는 준비 노드들을 동시에 실행 (fan-out)
+    # → generate_response 직전에 모두 합류 (fan-in)
+    # TTFT가 준비 단계 LLM/검색 호출의 합이 아니라 가장 느린 하나로 줄어듦
+    # (LangGraph는 superstep 단위로 동기화되므로 execute_tools도 같은 단계에 둬야 함)
+    prepare_nodes = ["extract_pdf_text", "analyze_images", "analyze_input"]
+    if generate_mode == "speculative":
+        # 검색 결정 태스크만 띄우고 즉시 끝남 → generate_response가 기다림
+        add_node("start_tools", start_tools)
+        prepare_nodes.append("start_tools")
+    else:
+        add_node("execute_tools", execute_tools)
+        prepare_nodes.append("execute_tools")
+    if score_mode == "concurrent":
+        # 채점 태스크만 띄우고 즉시 끝나는 노드라 fan-in을 늦추지 않음
+        add_node("start_scoring", start_scoring)
+        prepare_nodes.append("start_scoring")
+
+    # 체크포인터가 있으면 끝나기 전에 trim_checkpoint를 거침 (저장되는 상태 크기 제한)
+    finish = END
+    if checkpointer is not None:
+        add_node("trim_checkpoint", trim_checkpoint)
+        workflow.add_edge("trim_checkpoint", END)
+        finish = "trim_checkpoint"
 
     def route_crisis(x):
         level = x.get("crisis_level", "safe")
-        if level == "crisis":
-            return "crisis"
-        elif level == "unclear":
-            return "unclear"
-        return "safe"
-
-    workflow.add_conditional_edges(
-        "crisis_check",
-        route_crisis,
-        {"crisis": END, "unclear": END, "safe": "extract_pdf_text"},
-    )
+        if level in ("crisis", "unclear"):
+            return finish
+        return prepare_nodes
+
+    workflow.add_conditional_edges("crisis_check", route_crisis, prepare_nodes + [finish])
+
+    if triage_mode == "fused":
+        # triage 한 번으로 판정 → 성공하면 바로 fan-out, 실패하면 crisis_check부터 기존 경로
+        add_node("triage", triage)
+        workflow.set_entry_point("triage")
+
+        def route_triage(x):
+            if not x.get("triaged"):
+                return "crisis_check"
+            return route_crisis(x)
+
+        workflow.add_conditional_edges("triage", route_triage, prepare_nodes + ["crisis_check", finish])
+    else:
+        workflow.set_entry_point("crisis_check")
 
-    workflow.add_edge("extract_pdf_text", "analyze_images")
-    workflow.add_edge("analyze_images", "analyze_input")
-    workflow.add_edge("analyze_input", "select_tools")
-    workflow.add_edge("select_tools", "execute_tools")
-    workflow.add_edge("execute_tools", "generate_response")
+    workflow.add_edge(prepare_nodes, "generate_response")
     workflow.add_edge("generate_response", "calculate_score")
-    workflow.add_edge("calculate_score", END)
+    workflow.add_edge("calculate_score", finish)
 
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import List, Optional
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.agent.registry import get_llm, model_config
+from app.agent.session_store import get_session_store
+from app.prompts.node_prompts import HISTORY_SUMMARY_PROMPT
+
+# 대화 히스토리 토큰 예산 관리
+# 백엔드가 매 턴 세션 전체 히스토리를 보내므로, 그대로 넣으면 턴마다 프롬프트가 길어짐
+#   - 최근 메시지는 원문 유지
+#   - 예산을 넘기면 오래된 턴을 세션별 요약에 증분으로 접어 넣음 (이미 접은 부분은 다시 요약 안 함)
+#   - 요약은 응답 생성과 겹치도록 백그라운드에서 갱신, 따라잡기 전까지는 오래된 원문을 잘라냄
+#   - 어디까지 요약했는지는 위치가 아니라 마지막으로 요약한 메시지 내용으로 찾음
+#     (백엔드는 최근 N개 창만 보내서 세션이 길어지면 앞부분이 턴마다 밀려남)
+
+HISTORY_NAMESPACE = "history"  # session_id → {"summary", "anchor", "seen"}
+
+# 모델별 히스토리 토큰 예산 (모델 이름 접두사 매칭, 위에서부터)
+HISTORY_BUDGETS = (
+    ("gemini", 8000),
+    ("claude", 6000),
+    ("gpt-4o-mini", 4000),
+    ("gpt", 6000),
+)
+HISTORY_DEFAULT_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "4000"))
+HISTORY_RECENT_MESSAGES = int(os.getenv("HISTORY_RECENT_MESSAGES", "6"))  # 요약할 때 원문으로 남길 최근 메시지 수
+HISTORY_MIN_MESSAGES = int(os.getenv("HISTORY_MIN_MESSAGES", "2"))  # 예산이 모자라도 최소한 남길 원문
+HISTORY_FOLD_AT = float(os.getenv("HISTORY_FOLD_AT", "0.8"))  # 예산의 이 비율을 넘으면 요약 갱신 시작
+HISTORY_TOKEN_CACHE_SIZE = int(os.getenv("HISTORY_TOKEN_CACHE_SIZE", "20000"))
+HISTORY_ENCODING = os.getenv("HISTORY_ENCODING", "cl100k_base")
+
+MESSAGE_OVERHEAD = 4  # 역할 구분 등 메시지당 고정 토큰
+ANCHOR_MESSAGES = 2  # 요약 끝 지점을 찾을 때 맞춰보는 마지막 요약 메시지 수 ("ㅇㅇ" 같은 짧은 답이 겹쳐도 구분되게)
+SEEN_KEYS = 200  # 요약에 들어간 메시지 키를 최근 몇 개까지 기억할지 (히스토리 수정 감지용)
+
+_encoding = None
+_encoding_failed = False
+_token_cache: "OrderedDict[str, int]" = OrderedDict()  # sha1(content) → 토큰 수
+_folding: dict = {}  # session_id → 진행 중인 요약 Task
+
+stats = {"compacted": 0, "folds": 0, "truncated": 0, "summary_resets": 0, "token_cache_hits": 0,
+         "token_cache_misses": 0}
+
+_HANGUL = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ]")
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding(HISTORY_ENCODING)
+        except Exception as e:
+            # BPE 파일을 받을 수 없는 환경(오프라인 등) → 글자 수 기반 추정
+            _encoding_failed = True
+            print(f"[History] tiktoken 로드 실패 → 글자 수로 토큰 추정: {e}")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # 한글은 음절당 1토큰 이상, 그 외는 4글자당 1토큰 정도로 보수적으로 추정
+    hangul = len(_HANGUL.findall(text))
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+def message_tokens(message: dict) -> int:
+    """메시지 한 개의 토큰 수 (내용 해시 기준 캐시, 긴 세션에서도 새 메시지만 계산)"""
+    content = message.get("content", "")
+    key = hashlib.sha1(f"{message.get('role')}:{content}".encode("utf-8")).hexdigest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        stats["token_cache_hits"] += 1
+        _token_cache.move_to_end(key)
+        return cached
+    stats["token_cache_misses"] += 1
+    tokens = count_tokens(content) + MESSAGE_OVERHEAD
+    _token_cache[key] = tokens
+    while len(_token_cache) > HISTORY_TOKEN_CACHE_SIZE:
+        _token_cache.popitem(last=False)
+    return tokens
+
+
+def history_budget(slot: str = "main") -> int:
+    """
+    슬롯 모델의 히스토리 예산
+    우선순위: LLM_<SLOT>_HISTORY_BUDGET > HISTORY_BUDGETS(모델 접두사) > HISTORY_TOKEN_BUDGET
+    """
+    override = os.getenv(f"LLM_{slot.upper()}_HISTORY_BUDGET")
+    if override:
+        return int(override)
+    _, model, _ = model_config(slot)
+    for prefix, budget in HISTORY_BUDGETS:
+        if model.startswith(prefix):
+            return budget
+    return HISTORY_DEFAULT_BUDGET
+
+
+def _message_key(message: dict) -> str:
+    return hashlib.sha1(f"{message.get('role')}:{message.get('content', '')}".encode("utf-8")).hexdigest()[:16]
+
+
+async def _summarize(summary: Optional[str], messages: List[dict]) -> str:
+    transcript = "\n".join(
+        f"{'사용자' if m.get('role') == 'user' else '그로기'}: {m.get('content', '')}" for m in messages
+    )
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", HISTORY_SUMMARY_PROMPT),
+        ("user", "[기존 요약]\n{summary}\n\n[새 대화]\n{transcript}"),
+    ])
+    chain = prompt | get_llm("mini") | StrOutputParser()
+    return (await chain.ainvoke({"summary": summary or "없음", "transcript": transcript})).strip()
+
+
+async def _fold(session_id: str, history: List[dict], summary: Optional[str], covered: int, seen: List[str]):
+    """history[covered:cut] 만 기존 요약에 접어 넣고, 마지막으로 접은 메시지(anchor)와 함께 저장"""
+    cut = len(history) - HISTORY_RECENT_MESSAGES
+    try:
+        new_summary = await _summarize(summary, history[covered:cut])
+        keys = [_message_key(m) for m in history[:cut]]
+        await get_session_store().set(HISTORY_NAMESPACE, session_id, {
+            "summary": new_summary,
+            "anchor": keys[-ANCHOR_MESSAGES:],
+            "seen": (seen + keys[covered:])[-SEEN_KEYS:],
+        })
+        stats["folds"] += 1
+        print(f"[History] {session_id}: 메시지 {covered}~{cut} 요약에 반영")
+    except Exception as e:
+        print(f"[History] 요약 실패 (다음 턴에 재시도): {e}")
+    finally:
+        _folding.pop(session_id, None)
+
+
+def _schedule_fold(session_id: str, history: List[dict], summary: Optional[str], covered: int, seen: List[str]):
+    if session_id in _folding:
+        return
+    _folding[session_id] = asyncio.create_task(_fold(session_id, list(history), summary, covered, seen))
+
+
+def _find_covered(keys: List[str], anchor: List[str]) -> Optional[int]:
+    """anchor(마지막으로 요약한 메시지들)가 끝나는 위치. 창 맨 앞에서 anchor 뒷부분만 남은 경우도 찾음"""
+    for end in range(len(keys), 0, -1):
+        size = min(end, len(anchor))
+        if keys[end - size:end] == anchor[len(anchor) - size:]:
+            return end
+    return None
+
+
+async def _load_summary(session_id: str, history: List[dict]) -> tuple:
+    """
+    저장된 요약 → (summary, covered, seen). covered = 지금 history에서 요약이 끝나는 위치
+    anchor가 창 밖으로 밀려났으면 history 전체가 요약 이후 메시지 → 요약 유지, covered 0
+    """
+    if not session_id:
+        return None, 0, []
+    saved = await get_session_store().get(HISTORY_NAMESPACE, session_id)
+    if not saved or "anchor" not in saved:
+        return None, 0, []
+    keys = [_message_key(m) for m in history]
+    covered = _find_covered(keys, saved["anchor"])
+    if covered is not None:
+        return saved["summary"], covered, saved["seen"]
+    # 창 맨 앞이 이미 요약한 메시지인데 anchor가 없음 → 히스토리가 수정/삭제됨 → 요약을 버리고 처음부터
+    if keys and keys[0] in set(saved["seen"]):
+        stats["summary_resets"] += 1
+        print(f"[History] {session_id}: 히스토리 변경 감지 → 요약 초기화")
+        return None, 0, []
+    return saved["summary"], 0, saved["seen"]
+
+
+async def compact_history(session_id: str, history: List[dict], slot: str = "main") -> tuple:
+    """
+    예산 안에 들어가는 (이전 대화 요약 또는 None, 원문으로 넣을 메시지 목록)
+    """
+    budget = history_budget(slot)
+    summary, covered, seen = await _load_summary(session_id, history)
+    recent = history[covered:]
+
+    tokens = [message_tokens(m) for m in recent]
+    used = sum(tokens) + (count_tokens(summary) if summary else 0)
+
+    if used > budget * HISTORY_FOLD_AT and len(recent) > HISTORY_RECENT_MESSAGES and session_id:
+        _schedule_fold(session_id, history, summary, covered, seen)
+
+    # 요약이 따라잡기 전까지 예산 초과분은 오래된 원문부터 잘라냄
+    start = 0
+    while used > budget and len(recent) - start > HISTORY_MIN_MESSAGES:
+        used -= tokens[start]
+        start += 1
+    if start:
+        stats["truncated"] += 1
+    if summary or start:
+        stats["compacted"] += 1
+
+    return summary, recent[start:]
@@ -0,0 +1,255 @@
+import contextvars
+import functools
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+# 노드 단위 계측 → /agent/metrics (Prometheus 텍스트 포맷)
+#   - build_graph()에 등록하는 모든 노드를 instrument()로 감싸서 벽시계 시간 / 예외
+#   - LLM 호출은 콜백(LLMMetricsHandler)으로 노드별 호출 시간 / 첫 토큰 / 토큰 수
+#   - 이미지·PDF 바이트, 캐시 히트는 각 도구에서 record_bytes() / record_cache()
+# 노드 안에서 도는 코드는 current_node 컨텍스트 변수로 어느 노드인지 구분
+# 요청마다 trace_id를 만들고, 노드별 시간은 요청 끝에 한 줄로 로그 (start_trace / end_trace)
+#   - 같은 값이 /agent/metrics에 있으므로 줄 로그는 METRICS_TRACE_LOG=1일 때만 (실패한 요청은 항상)
+#
+# prometheus_client 없이 직접 텍스트를 만듦 (uvicorn 워커별 값, 워커 합산은 수집 쪽에서)
+
+METRICS_TRACE_LOG = os.getenv("METRICS_TRACE_LOG", "0") == "1"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+current_node: contextvars.ContextVar[str] = contextvars.ContextVar("current_node", default="-")
+_trace: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("trace", default=None)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple):
+        self.name, self.help, self.labels = name, help_text, labels
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0):
+        self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {_num(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, *label_values, value: float):
+        self.values[label_values] = value
+
+    def render(self) -> list:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple, buckets: tuple = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        self.values: Dict[tuple, list] = {}  # label → [버킷별 개수..., 합계, 개수]
+
+    def observe(self, *label_values, value: float):
+        row = self.values.get(label_values)
+        if row is None:
+            row = self.values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                row[i] += 1
+        row[-2] += value
+        row[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, row in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, row):
+                le = _labels(self.labels + ("le",), label_values + (_num(bound),))
+                lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), label_values + ('+Inf',))} {row[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {_num(row[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {row[-1]}")
+        return lines
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+requests_total = Counter("grogi_requests_total", "채팅 요청 수", ("outcome",))
+request_seconds = Histogram("grogi_request_duration_seconds", "채팅 요청 전체 시간", ())
+node_seconds = Histogram("grogi_node_duration_seconds", "노드 벽시계 시간", ("node",))
+node_errors = Counter("grogi_node_errors_total", "노드/도구 오류 수", ("node", "error"))
+llm_seconds = Histogram("grogi_llm_duration_seconds", "LLM 호출 시간", ("node", "model"))
+llm_ttft_seconds = Histogram("grogi_llm_first_token_seconds", "스트리밍 LLM 첫 토큰까지 시간", ("node", "model"))
+llm_tokens = Counter("grogi_llm_tokens_total", "LLM 토큰 수", ("node", "model", "kind"))
+bytes_processed = Counter("grogi_bytes_processed_total", "처리한 첨부 바이트", ("node", "kind"))
+cache_requests = Counter("grogi_cache_requests_total", "캐시 조회 결과", ("cache", "result"))
+
+_METRICS = [requests_total, request_seconds, node_seconds, node_errors, llm_seconds, llm_ttft_seconds,
+             llm_tokens, bytes_processed, cache_requests]
+
+
+def register_metric(metric):
+    """다른 모듈에서 만든 Counter / Gauge / Histogram도 /agent/metrics에 포함"""
+    _METRICS.append(metric)
+    return metric
+
+# 다른 모듈의 stats dict / 함수 → grogi_component_stat 게이지로 함께 노출
+_stats_sources: Dict[str, Callable[[], dict]] = {}
+
+
+def register_stats(component: str, source):
+    _stats_sources[component] = source if callable(source) else (lambda: source)
+
+
+# ── 요청 / 노드 ──
+
+def start_trace(trace_id: Optional[str] = None) -> dict:
+    """요청 시작. 같은 컨텍스트(그래프 노드 태스크 포함)에서 current_trace()로 조회"""
+    trace = {"trace_id": trace_id or uuid.uuid4().hex[:16], "start": time.perf_counter(), "nodes": {}}
+    _trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[dict]:
+    return _trace.get()
+
+
+def end_trace(trace: dict, outcome: str = "ok"):
+    elapsed = time.perf_counter() - trace["start"]
+    requests_total.inc(outcome)
+    request_seconds.observe(value=elapsed)
+    if not METRICS_TRACE_LOG and outcome == "ok":
+        return
+    nodes = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in trace["nodes"].items())
+    print(f"[Metrics] trace={trace['trace_id']} {outcome} {elapsed * 1000:.0f}ms | {nodes}")
+
+
+def instrument(name: str, fn):
+    """그래프 노드 래퍼: 벽시계 시간, 예외 수, 노드 안에서 호출되는 도구의 current_node 설정"""
+
+    @functools.wraps(fn)
+    async def wrapper(state):
+        token = current_node.set(name)
+        start = time.perf_counter()
+        try:
+            return await fn(state)
+        except Exception as e:
+            node_errors.inc(name, type(e).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            node_seconds.observe(name, value=elapsed)
+            trace = _trace.get()
+            if trace is not None:
+                trace["nodes"][name] = trace["nodes"].get(name, 0.0) + elapsed
+            current_node.reset(token)
+
+    return wrapper
+
+
+def record_error(kind: str):
+    """노드 안에서 잡아서 처리한 오류 (폴백으로 넘어간 경우 등)"""
+    node_errors.inc(current_node.get(), kind)
+
+
+def record_bytes(kind: str, nbytes: int):
+    bytes_processed.inc(current_node.get(), kind, amount=nbytes)
+
+
+def record_cache(cache: str, hit: bool):
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+# ── LLM 콜백 ──
+
+class LLMMetricsHandler(AsyncCallbackHandler):
+    """
+    chat model 호출 시간 / 첫 토큰 / usage_metadata 토큰 수를 노드별로 기록
+    그래프 호출 config의 callbacks에 넣으면 노드 안의 모든 체인/모델 호출에 전파됨
+    """
+
+    def __init__(self):
+        self._runs: Dict[Any, list] = {}  # run_id → [node, model, 시작 시각, 첫 토큰 기록 여부]
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node") or current_node.get()
+        model = metadata.get("ls_model_name") or (serialized or {}).get("name") or "unknown"
+        self._runs[run_id] = [node, model, time.perf_counter(), False]
+
+    async def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None and not run[3]:
+            run[3] = True
+            llm_ttft_seconds.observe(run[0], run[1], value=time.perf_counter() - run[2])
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        node, model = run[0], run[1]
+        llm_seconds.observe(node, model, value=time.perf_counter() - run[2])
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                llm_tokens.inc(node, model, "input", amount=usage.get("input_tokens", 0))
+                llm_tokens.inc(node, model, "output", amount=usage.get("output_tokens", 0))
+                cache_read = (usage.get("input_token_details") or {}).get("cache_read") or 0
+                if cache_read:
+                    llm_tokens.inc(node, model, "cache_read", amount=cache_read)
+
+    async def on_llm_error(self, error, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            node_errors.inc(run[0], f"llm:{type(error).__name__}")
+
+
+llm_metrics_handler = LLMMetricsHandler()
+
+
+def render() -> str:
+    lines: list = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    lines.append("# HELP grogi_component_stat 모듈별 내부 통계 (stats dict)")
+    lines.append("# TYPE grogi_component_stat gauge")
+    for component, source in sorted(_stats_sources.items()):
+        try:
+            flat = _flatten(source())
+        except Exception as e:
+            print(f"[Metrics] {component} 통계 수집 실패: {e}")
+            continue
+        for key, value in sorted(flat.items()):
+            lines.append(f'grogi_component_stat{{component="{_escape(component)}",name="{_escape(key)}"}} {_num(value)}')
+    return "\n".join(lines) + "\n"
+
+
+def _flatten(stats: dict, prefix: str = "") -> dict:
+    """중첩 dict에서 숫자 값만 "a.b" 키로"""
+    flat = {}
+    for key, value in (stats or {}).items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import os
+import time
+from typing import Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages.ai import add_usage
+
+from app.agent.metrics import record_cache
+from app.agent.registry import model_config
+from app.prompts.system_prompts import LEVEL_PROMPTS, RESPONSE_RULES, SYSTEM_PROMPT_BASE
+
+# 본 응답 프롬프트 = 고정 prefix + 매 턴 바뀌는 suffix
+#   prefix : 페르소나 / 톤 / 응답 규칙 → 바이트 단위로 매 턴 동일해야 provider 캐시가 맞음
+#   suffix : 날짜 / 카테고리 / 검색 결과 / 이미지·문서 / 이전 대화 요약
+# provider별 캐시
+#   anthropic : prefix 블록에 cache_control (ephemeral)
+#   openai    : 1024 토큰 이상 동일 prefix 자동 캐시 → prefix를 맨 앞에 두는 것으로 충분
+#   google    : Gemini 2.5 암묵적(implicit) 캐시는 openai와 같음.
+#               GEMINI_CONTEXT_CACHE=1 이면 prefix로 명시적 context cache를 만들어 cached_content로 참조
+
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "0") == "1"
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", "3600"))  # 초
+GEMINI_CACHE_REFRESH_MARGIN = 120  # 만료 이만큼 전에 새로 만듦
+GEMINI_CACHE_RETRY_MIN = 30  # 일시적 생성 실패(타임아웃 / 429 / 5xx) 후 다시 시도까지 (초), 연속 실패마다 2배
+GEMINI_CACHE_RETRY_MAX = 600
+
+# 게이지를 쓰지 않고, 항상 spicy 톤 고정
+STATIC_SYSTEM_PROMPT = f"""{SYSTEM_PROMPT_BASE}
+{LEVEL_PROMPTS["spicy"]}
+
+{RESPONSE_RULES}"""
+
+_gemini_caches: dict = {}  # (model, prefix sha) → (cache name, expires_at)
+_gemini_lock: Optional[asyncio.Lock] = None
+_gemini_disabled = False  # 모델 미지원 / prefix가 최소 토큰 수 미만 → 프로세스 동안 암묵적 캐시만
+_gemini_retry_at = 0.0  # 일시적 실패 후 이 시각까지는 생성 시도 안 함
+_gemini_failures = 0
+
+stats = {
+    "requests": 0,
+    "hits": 0,
+    "input_tokens": 0,
+    "cache_read_tokens": 0,
+    "cache_creation_tokens": 0,
+}
+
+
+def volatile_context(state: dict, summary: Optional[str] = None) -> str:
+    from datetime import datetime
+
+    today = datetime.now().strftime("%Y년 %m월 %d일")
+    return f"""[현재 상황]
+오늘 날짜: {today}
+카테고리: {state['category']}
+실시간 정보: {state['factcheck']}
+이미지 분석(팩트): {state.get('image_analysis', '없음')}
+문서 내용: {state.get('pdf_text', '없음')}
+이전 대화 요약: {summary or '없음'}"""
+
+
+def _is_permanent(error: Exception) -> bool:
+    """다시 시도해도 같은 실패인지: 모델 미지원(404) / prefix가 최소 토큰 수 미만 등 잘못된 요청(400)"""
+    return getattr(error, "code", None) in (400, 404)
+
+
+async def _gemini_cache_name(llm, model: str) -> Optional[str]:
+    """prefix용 Gemini context cache 이름 (프로세스당 모델별 하나, TTL 전에 갱신)"""
+    global _gemini_lock, _gemini_disabled, _gemini_retry_at, _gemini_failures
+    client = getattr(llm, "client", None)
+    if _gemini_disabled or client is None or time.time() < _gemini_retry_at:
+        return None
+    key = (model, hashlib.sha256(STATIC_SYSTEM_PROMPT.encode("utf-8")).hexdigest())
+    cached = _gemini_caches.get(key)
+    if cached and cached[1] - GEMINI_CACHE_REFRESH_MARGIN > time.time():
+        return cached[0]
+
+    if _gemini_lock is None:
+        _gemini_lock = asyncio.Lock()
+    async with _gemini_lock:
+        cached = _gemini_caches.get(key)
+        if cached and cached[1] - GEMINI_CACHE_REFRESH_MARGIN > time.time():
+            return cached[0]
+        if _gemini_disabled or time.time() < _gemini_retry_at:
+            return None
+        try:
+            from google.genai import types
+
+            cache = await client.aio.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    display_name="grogi-system-prompt",
+                    system_instruction=STATIC_SYSTEM_PROMPT,
+                    ttl=f"{GEMINI_CACHE_TTL}s",
+                ),
+            )
+        except Exception as e:
+            if _is_permanent(e):
+                # 모델이 미지원이거나 prefix가 최소 토큰 수보다 짧으면 암묵적 캐시만 사용
+                _gemini_disabled = True
+                print(f"[PromptCache] Gemini context cache 생성 불가 → 암묵적 캐시만 사용: {e}")
+                return None
+            # 일시적 실패 → 그동안 암묵적 캐시로, 백오프 후 다시 시도
+            delay = min(GEMINI_CACHE_RETRY_MIN * 2 ** _gemini_failures, GEMINI_CACHE_RETRY_MAX)
+            _gemini_failures += 1
+            _gemini_retry_at = time.time() + delay
+            print(f"[PromptCache] Gemini context cache 생성 실패 → {delay}s 뒤 재시도: {e}")
+            return None
+        _gemini_failures = 0
+        _gemini_caches[key] = (cache.name, time.time() + GEMINI_CACHE_TTL)
+        print(f"[PromptCache] Gemini context cache 생성: {cache.name}")
+        return cache.name
+
+
+async def build_prompt(slot: str, llm, volatile: str) -> tuple:
+    """
+    provider에 맞게 캐시 표시한 앞부분 메시지와 호출 kwargs
+    반환: ([SystemMessage 또는 HumanMessage...], {"cached_content": ...})
+    """
+    provider, model, _ = model_config(slot)
+
+    if provider == "anthropic":
+        return [SystemMessage(content=[
+            {"type": "text", "text": STATIC_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": volatile},
+        ])], {}
+
+    if provider == "google" and GEMINI_CONTEXT_CACHE:
+        cache_name = await _gemini_cache_name(llm, model)
+        if cache_name:
+            # cached_content와 system_instruction은 같이 못 씀 → suffix는 첫 user 턴으로
+            return [HumanMessage(content=volatile)], {"cached_content": cache_name}
+
+    return [SystemMessage(content=f"{STATIC_SYSTEM_PROMPT}\n\n{volatile}")], {}
+
+
+def merge_usage(usage: Optional[dict], chunk) -> Optional[dict]:
+    """스트리밍 청크의 usage_metadata 누적"""
+    chunk_usage = getattr(chunk, "usage_metadata", None)
+    if not chunk_usage:
+        return usage
+    return chunk_usage if usage is None else add_usage(usage, chunk_usage)
+
+
+def record_usage(slot: str, usage: Optional[dict]) -> dict:
+    """응답 메타데이터로 내보낼 캐시 사용량 + 누적 통계 갱신"""
+    provider, model, _ = model_config(slot)
+    details = (usage or {}).get("input_token_details") or {}
+    result = {
+        "provider": provider,
+        "model": model,
+        "input_tokens": (usage or {}).get("input_tokens", 0),
+        "cache_read": details.get("cache_read", 0) or 0,
+        "cache_creation": details.get("cache_creation", 0) or 0,
+    }
+    result["hit"] = result["cache_read"] > 0
+    record_cache(f"prompt:{provider}", result["hit"])
+
+    stats["requests"] += 1
+    stats["hits"] += int(result["hit"])
+    stats["input_tokens"] += result["input_tokens"]
+    stats["cache_read_tokens"] += result["cache_read"]
+    stats["cache_creation_tokens"] += result["cache_creation"]
+    return result
@@ -0,0 +1,163 @@
+import contextvars
+import functools
+import os
+from typing import Any, Optional
+
+import httpx
+
+from app.tools.search import CachedSearchTool, get_search_tool as _build_search_tool
+
+# provider SDK(langchain_anthropic / langchain_google_genai / langchain_openai)는 import만 수백 ms~초 단위라
+# 모듈 맨 위가 아니라 _create_llm()에서 실제로 설정된 provider만 import
+
+# 모델 슬롯별 기본 설정: (provider, model, temperature)
+#   main   : generate_response 본 응답
+#   mini   : 위기 판별 / 카테고리 / 검색어 추출 / 제목
+#   vision : analyze_images
+#   score  : 현실회피지수 채점
+MODEL_DEFAULTS = {
+    "main": ("google", "gemini-2.5-flash", 0.3),
+    "mini": ("google", "gemini-2.5-flash", 0),
+    "vision": ("anthropic", "claude-haiku-4-5-20251001", None),
+    "score": ("openai", "gpt-4o-mini", 0),
+}
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+_instances: dict[str, Any] = {}
+# build_graph(overrides=...)로 만든 그래프의 노드 안에서만 적용되는 슬롯 교체 (프로세스 전체 override와 별개)
+_scoped: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("registry_overrides", default=None)
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+
+
+def model_config(name: str) -> tuple:
+    """
+    슬롯 설정 (env로 덮어쓰기 가능)
+    예) LLM_MAIN_PROVIDER=anthropic LLM_MAIN_MODEL=claude-3-haiku-20240307
+    """
+    provider, model, temperature = MODEL_DEFAULTS[name]
+    prefix = f"LLM_{name.upper()}"
+    provider = os.getenv(f"{prefix}_PROVIDER", provider)
+    model = os.getenv(f"{prefix}_MODEL", model)
+    if os.getenv(f"{prefix}_TEMPERATURE"):
+        temperature = float(os.getenv(f"{prefix}_TEMPERATURE"))
+    return provider, model, temperature
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    """프로세스 전체가 공유하는 커넥션 풀 (keep-alive 유지)"""
+    global _http_client, _http_async_client
+    if _http_client is None:
+        _http_client = httpx.Client(limits=_limits(), timeout=LLM_TIMEOUT)
+    if _http_async_client is None:
+        _http_async_client = httpx.AsyncClient(limits=_limits(), timeout=LLM_TIMEOUT)
+    return _http_client, _http_async_client
+
+
+def _create_llm(provider: str, model: str, temperature: Optional[float]):
+    kwargs = {"model": model}
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+
+        http_client, http_async_client = get_http_clients()
+        return ChatOpenAI(
+            **kwargs,
+            timeout=LLM_TIMEOUT,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=http_client,
+            http_async_client=http_async_client,
+        )
+    # Anthropic / Gemini SDK는 인스턴스마다 자체 커넥션 풀을 들고 있으므로
+    # 인스턴스를 재사용하는 것만으로 keep-alive가 유지됨
+    if provider == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+
+        return ChatAnthropic(**kwargs, default_request_timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES)
+    if provider == "google":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        return ChatGoogleGenerativeAI(**kwargs, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES)
+    raise ValueError(f"지원하지 않는 LLM provider: {provider}")
+
+
+def get_llm(name: str):
+    """슬롯 이름으로 장수명(long-lived) 모델 인스턴스 반환"""
+    scoped = _scoped.get()
+    if scoped and name in scoped:
+        return scoped[name]
+    llm = _instances.get(name)
+    if llm is None:
+        llm = _instances[name] = _create_llm(*model_config(name))
+    return llm
+
+
+def get_search_tool():
+    """검색 도구도 요청마다 만들지 않고 재사용 (쿼리 캐시 포함)"""
+    scoped = _scoped.get()
+    if scoped and "search" in scoped:
+        return scoped["search"]
+    tool = _instances.get("search")
+    if tool is None:
+        tool = _instances["search"] = CachedSearchTool(_build_search_tool())
+    return tool
+
+
+def peek(name: str) -> Optional[Any]:
+    """이미 만들어진 인스턴스만 (없으면 None, 새로 만들지 않음). 헬스체크/통계용"""
+    return _instances.get(name)
+
+
+def override(name: str, instance: Any):
+    """테스트/벤치마크용: 슬롯을 다른 인스턴스(가짜 모델 등)로 교체"""
+    _instances[name] = instance
+
+
+def with_overrides(fn, overrides: dict):
+    """
+    async 함수 실행 동안만 슬롯을 교체하는 래퍼 (그래프 노드 주입용)
+    노드 안에서 띄운 태스크(선채점, 히스토리 요약)도 컨텍스트를 물려받으므로 같은 인스턴스 사용
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = _scoped.set({**(_scoped.get() or {}), **overrides})
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _scoped.reset(token)
+
+    return wrapper
+
+
+def warmup():
+    """설정된 슬롯의 클라이언트를 미리 생성 (provider SDK import 포함, 블로킹이므로 스레드에서 호출)"""
+    for name in MODEL_DEFAULTS:
+        get_llm(name)
+    get_search_tool()
+    get_http_clients()
+
+
+async def aclose():
+    global _http_client, _http_async_client
+    if _http_async_client is not None:
+        await _http_async_client.aclose()
+    if _http_client is not None:
+        _http_client.close()
+    _http_client = _http_async_client = None
+    _instances.clear()
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+# 세션 상태 저장소 설정
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory")  # memory | sqlite
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "/tmp/grogi_session_state.db")
+SESSION_STORE_MAX_ENTRIES = int(os.getenv("SESSION_STORE_MAX_ENTRIES", "5000"))
+SESSION_STORE_MAX_BYTES = int(os.getenv("SESSION_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+SESSION_STORE_TTL = float(os.getenv("SESSION_STORE_TTL", str(6 * 60 * 60)))  # 초
+
+
+class SessionStateStore(ABC):
+    """
+    세션별 상태(PDF 추출 결과, 위기 확인 대기 메시지 등) 저장소.
+    값은 JSON 직렬화 가능해야 함 (sqlite 백엔드와 호환)
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @abstractmethod
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    async def pop(self, namespace: str, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "entries": self.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class InMemorySessionStore(SessionStateStore):
+    """프로세스 내 LRU. 항목 수 / 대략적인 바이트 수 / TTL로 제한"""
+
+    def __init__(self, max_entries: int = SESSION_STORE_MAX_ENTRIES,
+                 max_bytes: int = SESSION_STORE_MAX_BYTES, ttl: float = SESSION_STORE_TTL):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.total_bytes = 0
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()  # (ns, key) → (value, expires_at, nbytes)
+
+    def _lookup(self, namespace: str, key: str):
+        entry = self._data.get((namespace, key))
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            self._remove((namespace, key))
+            self.expirations += 1
+            return None
+        return entry
+
+    def _remove(self, item_key: tuple):
+        _, _, nbytes = self._data.pop(item_key)
+        self.total_bytes -= nbytes
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        entry = self._lookup(namespace, key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end((namespace, key))
+        return entry[0]
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        item_key = (namespace, key)
+        if item_key in self._data:
+            self._remove(item_key)
+        nbytes = len(json.dumps(value, ensure_ascii=False))
+        self._data[item_key] = (value, time.time() + (ttl or self.ttl), nbytes)
+        self.total_bytes += nbytes
+
+        while self._data and (len(self._data) > self.max_entries or self.total_bytes > self.max_bytes):
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    async def pop(self, namespace: str, key: str) -> Optional[Any]:
+        entry = self._lookup(namespace, key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remove((namespace, key))
+        return entry[0]
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class SqliteSessionStore(SessionStateStore):
+    """
+    같은 호스트의 uvicorn 워커들이 공유하는 sqlite 저장소 (WAL 모드).
+    위기 확인 후속 턴이 다른 워커로 가도 상태가 유지됨
+    """
+
+    def __init__(self, path: str = SESSION_STORE_PATH, max_entries: int = SESSION_STORE_MAX_ENTRIES,
+                 ttl: float = SESSION_STORE_TTL):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS session_state (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_session_state_accessed ON session_state (accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite 연결은 스레드마다 따로 (to_thread 워커 스레드에서 호출됨)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, namespace: str, key: str, delete: bool) -> Optional[Any]:
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at FROM session_state WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        if row[1] <= now:
+            conn.execute("DELETE FROM session_state WHERE namespace = ? AND key = ?", (namespace, key))
+            self.expirations += 1
+            self.misses += 1
+            return None
+        if delete:
+            # 다른 워커가 먼저 가져갔으면 rowcount 0 → miss 처리
+            deleted = conn.execute(
+                "DELETE FROM session_state WHERE namespace = ? AND key = ?", (namespace, key)
+            ).rowcount
+            if not deleted:
+                self.misses += 1
+                return None
+        else:
+            conn.execute(
+                "UPDATE session_state SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key),
+            )
+        self.hits += 1
+        return json.loads(row[0])
+
+    def _set(self, namespace: str, key: str, value: Any, ttl: Optional[float]):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO session_state (namespace, key, value, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, ensure_ascii=False), now + (ttl or self.ttl), now),
+        )
+        self.expirations += conn.execute("DELETE FROM session_state WHERE expires_at <= ?", (now,)).rowcount
+        self.evictions += conn.execute(
+            "DELETE FROM session_state WHERE rowid IN ("
+            "SELECT rowid FROM session_state ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self._get, namespace, key, False)
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        await asyncio.to_thread(self._set, namespace, key, value, ttl)
+
+    async def pop(self, namespace: str, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self._get, namespace, key, True)
+
+    def size(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM session_state").fetchone()[0]
+
+
+_store: Optional[SessionStateStore] = None
+
+
+def get_session_store() -> SessionStateStore:
+    """SESSION_STORE_BACKEND 설정에 맞는 저장소 (프로세스당 하나)"""
+    global _store
+    if _store is None:
+        if SESSION_STORE_BACKEND == "sqlite":
+            _store = SqliteSessionStore()
+        else:
+            _store = InMemorySessionStore()
+    return _store
@@ -0,0 +1,15 @@
+from pathlib import Path
+
+# ai/.env 로드. app 모듈들이 import 시점에 env 설정(모듈 상수)을 읽으므로
+# 진입점(app.main, scripts)에서 app 모듈 import보다 먼저 한 번 호출
+AI_ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_env():
+    """ai/.env를 상위 쉘 환경변수보다 우선 적용 (파일이 없으면 아무것도 안 함)"""
+    env_path = AI_ROOT / ".env"
+    if not env_path.exists():
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=env_path, override=True)
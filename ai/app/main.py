@@ -1,19 +1,95 @@
+import asyncio
 import json
 import os
 import sys
+import time
+from contextlib import asynccontextmanager
 from typing import List, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from sse_starlette.sse import EventSourceResponse
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.agent.graph import build_graph, llm_mini
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from app.env import load_env
+
+load_env()  # 아래 app 모듈들의 설정 상수보다 먼저
+
+from app.agent import admission, checkpoint, history, metrics, prompt_cache
+from app.agent.graph import SPECULATION_EVENT, SPECULATIVE_TAG, UNCLEAR_REPLY, build_graph
+from app.agent.registry import aclose as close_clients, peek, warmup as warmup_clients
+from app.agent.session_store import get_session_store
+from app.tools import (
+    batch_scorer,
+    crisis_classifier,
+    heuristic_scorer,
+    image_pipeline,
+    pdf_retriever,
+    query_filter,
+    title_generator,
+)
+from app.tools.calculator import score_stats
+from app.tools.image_pipeline import shutdown_pool as shutdown_image_pool
+from app.tools.pdf_extractor import shutdown_pool as shutdown_pdf_pool
+from app.tools.query_filter import load_vocab
+
+# 시작 직후 LLM 클라이언트 미리 만들기 (provider SDK import + 커넥션 풀)
+#   background : 서버는 바로 ready, 워밍업은 뒤에서 스레드로 (기본)
+#   blocking   : 워밍업이 끝나야 ready (예전 동작)
+#   off        : 첫 요청에서 필요한 provider만 로드
+AI_WARMUP = os.getenv("AI_WARMUP", "background")
+
+startup_stats = {"ready": False, "graph_ms": None, "warmup": "pending", "warmup_ms": None}
+
 
-app = FastAPI(title="Grogi AI Agent Server")
+async def _warmup():
+    startup_stats["warmup"] = "running"
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(warmup_clients)
+        startup_stats["warmup"] = "done"
+    except Exception as e:
+        startup_stats["warmup"] = "failed"
+        print(f"[Startup] 워밍업 실패 (첫 요청에서 다시 생성): {e}")
+    startup_stats["warmup_ms"] = round((time.perf_counter() - start) * 1000)
+    print(f"[Startup] 워밍업 {startup_stats['warmup']} {startup_stats['warmup_ms']}ms")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global agent_executor
+    start = time.perf_counter()
+    if agent_executor is None:
+        agent_executor = build_graph(checkpointer=await checkpoint.open_checkpointer())
+    startup_stats["graph_ms"] = round((time.perf_counter() - start) * 1000)
+    # 검색어 사전 필터 어휘 로드 (첫 요청에서 루프 막지 않도록)
+    load_vocab()
+
+    warmup_task = None
+    if AI_WARMUP == "blocking":
+        await _warmup()
+    elif AI_WARMUP == "background":
+        warmup_task = asyncio.create_task(_warmup())
+    else:
+        startup_stats["warmup"] = "off"
+    startup_stats["ready"] = True
+    print(f"[Startup] ready (그래프 컴파일 {startup_stats['graph_ms']}ms, 워밍업 {AI_WARMUP})")
+
+    yield
+
+    startup_stats["ready"] = False
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await close_clients()
+    await checkpoint.close_checkpointer()
+    shutdown_image_pool()
+    shutdown_pdf_pool()
+
+
+app = FastAPI(title="Grogi AI Agent Server", lifespan=lifespan)
 
 ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -51,22 +127,76 @@ class ChatRequest(BaseModel):
     user_message: str
     level: str
     category: str
-    history: List[ChatMessage]
+    history: List[ChatMessage] = []  # history_version으로 이어받을 때는 비워서 보냄
+    history_version: Optional[int] = None  # 이 턴의 user 메시지 전까지 백엔드에 저장된 메시지 수 (세션 체크포인트)
     images: Optional[List[str]] = None
     ocr_text: Optional[str] = None
     pdfs: Optional[List[PdfAttachment]] = None
+    trace_id: Optional[str] = None  # 백엔드에서 넘기면 그대로 사용, 없으면 새로 생성
 
 
 class TitleRequest(BaseModel):
     message: str
 
 
+class ScoreBatchItem(BaseModel):
+    id: str  # 백엔드 메시지 id (결과를 다시 매칭하는 키)
+    user_message: str
+    ai_response: str = ""
+
+
+class ScoreBatchRequest(BaseModel):
+    items: List[ScoreBatchItem]
+    job_id: Optional[str] = None  # 있으면 체크포인트 저장 + 같은 job_id 재요청 시 이어서 채점
+    concurrency: Optional[int] = None
+    batch_size: Optional[int] = None
+
+
 @app.get("/agent/health")
 async def health_check():
-    return {"status": "ok", "model": "gpt-4o", "tavily": "ok"}
+    return {
+        "status": "ok" if startup_stats["ready"] else "starting",
+        "model": "gpt-4o",
+        "tavily": "ok",
+        "startup": startup_stats,
+        "session_store": get_session_store().stats(),
+        "search_cache": getattr(peek("search"), "stats", dict)(),
+        "prompt_cache": prompt_cache.stats,
+        "images": image_pipeline.stats,
+        "score": score_stats,
+        "score_batch": batch_scorer.stats,
+        "admission": admission.get_admission_controller().stats(),
+        "title": title_generator.stats,
+        "checkpoint": {"backend": checkpoint.CHECKPOINT_BACKEND, **checkpoint.stats},
+        "pdf_retrieval": pdf_retriever.stats,
+    }
+
+
+agent_executor = None  # lifespan에서 컴파일 (벤치마크는 그 전에 바꿔 끼울 수 있음)
+
+
+def get_agent_executor():
+    global agent_executor
+    if agent_executor is None:
+        agent_executor = build_graph()
+    return agent_executor
 
 
-agent_executor = build_graph()
+# /agent/metrics 에 grogi_component_stat 으로 같이 내보낼 모듈 통계
+metrics.register_stats("session_store", lambda: get_session_store().stats())
+metrics.register_stats("search_cache", lambda: getattr(peek("search"), "stats", dict)())
+metrics.register_stats("prompt_cache", prompt_cache.stats)
+metrics.register_stats("images", image_pipeline.stats)
+metrics.register_stats("history", history.stats)
+metrics.register_stats("query_filter", query_filter.stats)
+metrics.register_stats("crisis_classifier", crisis_classifier.stats)
+metrics.register_stats("score", score_stats)
+metrics.register_stats("score_heuristic", heuristic_scorer.stats)
+metrics.register_stats("score_batch", batch_scorer.stats)
+metrics.register_stats("title", lambda: {**title_generator.stats, "cache": title_generator.title_cache.stats()})
+metrics.register_stats("admission", lambda: admission.get_admission_controller().stats())
+metrics.register_stats("checkpoint", checkpoint.stats)
+metrics.register_stats("pdf_retrieval", pdf_retriever.stats)
 
 ANALYSIS_PREVIEW_PAYLOAD = {
     "goal_realism": None,
@@ -79,6 +209,25 @@ ANALYSIS_PREVIEW_PAYLOAD = {
 }
 
 
+# token 묶기: 모델 청크마다 SSE 이벤트를 보내지 않고 STREAM_COALESCE_MS 동안(또는 STREAM_COALESCE_BYTES까지) 모아서 한 번에
+#   - 첫 token은 바로 보냄 (TTFT 그대로)
+#   - token이 아닌 이벤트(done, score 등)가 오면 모아둔 token을 먼저 보내서 순서 유지
+#   - 0이면 묶지 않음 (청크마다 전송)
+STREAM_COALESCE_MS = float(os.getenv("STREAM_COALESCE_MS", "30"))
+STREAM_COALESCE_BYTES = int(os.getenv("STREAM_COALESCE_BYTES", "1024"))
+
+# astream_events에서 실제로 쓰는 이벤트 종류 / 노드 (나머지는 dict 조회 없이 바로 버림)
+_HANDLED_EVENTS = frozenset(("on_chain_start", "on_chain_end", "on_chat_model_start", "on_chat_model_stream",
+                             "on_custom_event"))
+_HANDLED_NODES = frozenset(("crisis_check", "triage", "execute_tools", "generate_response", "calculate_score"))
+_STREAM_END = object()
+_FLUSH = object()
+
+
+def _sse(event: str, payload) -> dict:
+    return {"event": event, "data": json.dumps(payload, ensure_ascii=False, separators=(",", ":"))}
+
+
 def _is_generate_response_event(event: dict) -> bool:
     tags = event.get("tags", [])
     metadata = event.get("metadata", {})
@@ -102,45 +251,219 @@ def _extract_text(value: object) -> str:
     return str(value)
 
 
-async def real_agent_generator(request: ChatRequest):
+async def real_agent_generator(request: ChatRequest, ticket: Optional[admission.Ticket] = None,
+                              history: Optional[list] = None):
+    """
+    /agent/chat SSE 이벤트 (본문 token은 STREAM_COALESCE_MS 단위로 묶어서)
+    history: 세션 체크포인트에서 이어받은 history (None이면 request.history)
+    """
+    events = _agent_events(request, ticket, history)
+    if STREAM_COALESCE_MS <= 0:
+        async for item in events:
+            yield _sse("token", {"content": item[1]}) if isinstance(item, tuple) else item
+        return
+    async for item in _coalesce_tokens(events, STREAM_COALESCE_MS / 1000, STREAM_COALESCE_BYTES):
+        yield item
+
+
+async def _coalesce_tokens(events, window: float, max_bytes: int):
+    """
+    _agent_events의 ("token", text)를 window초 / max_bytes 단위로 합쳐 token 이벤트로
+    다음 청크가 늦게 와도 window가 지나면 보내야 하므로 이벤트는 별도 태스크가 큐로 넘기고,
+    첫 청크를 모으기 시작할 때 call_later로 _FLUSH 표시를 예약 (이벤트마다 타이머/태스크를 만들지 않음)
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for item in events:
+                queue.put_nowait(item)
+        except Exception as e:  # 취소는 그대로 전파 (받는 쪽이 이미 끝났으므로 큐에 넣지 않음)
+            queue.put_nowait(e)
+            return
+        queue.put_nowait(_STREAM_END)
+
+    producer = asyncio.create_task(pump())
+    loop = asyncio.get_running_loop()
+    parts: list = []
+    size = 0
+    timer: Optional[asyncio.TimerHandle] = None
+    first = True
+
+    def flush() -> dict:
+        nonlocal parts, size, timer
+        if timer is not None:
+            timer.cancel()
+            timer = None
+        event = _sse("token", {"content": "".join(parts)})
+        parts, size = [], 0
+        return event
+
+    try:
+        while True:
+            item = await queue.get()
+            if isinstance(item, tuple):
+                if first:  # 첫 token은 기다리지 않음
+                    first = False
+                    yield _sse("token", {"content": item[1]})
+                    continue
+                if not parts:
+                    timer = loop.call_later(window, queue.put_nowait, _FLUSH)
+                parts.append(item[1])
+                size += len(item[1].encode("utf-8"))
+                if size >= max_bytes:
+                    yield flush()
+                continue
+            if item is _FLUSH:
+                if parts:
+                    yield flush()
+                continue
+
+            if parts:
+                yield flush()
+            if item is _STREAM_END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if not producer.done():
+            producer.cancel()
+            try:
+                await producer
+            except BaseException:
+                pass
+
+
+async def _agent_events(request: ChatRequest, ticket: Optional[admission.Ticket] = None,
+                        history: Optional[list] = None):
+    """그래프 실행 → SSE 이벤트 dict. 본문 token만 ("token", text) 튜플로 (묶기 전)"""
     # 게이지 제거: 시작부터 고정 spicy 톤
     initial_state = {
         "session_id": request.session_id,
         "user_message": request.user_message,
         "level": "spicy",
         "category": request.category,
-        "history": [msg.dict() for msg in request.history],
+        "history": history if history is not None else [msg.dict() for msg in request.history],
+        "history_version": request.history_version,
         "images": request.images or [],
         "pdfs": [p.dict() for p in request.pdfs] if request.pdfs else [],
         "status": "starting",
         "current_section": "diagnosis",
     }
 
+    trace = metrics.start_trace(request.trace_id)
+    trace_id = trace["trace_id"]
+    config = {
+        "callbacks": [admission.provider_gate, metrics.llm_metrics_handler],
+        "metadata": {"trace_id": trace_id},
+    }
+    outcome = "ok"
+
     try:
+        # 입장 대기: 순번이 바뀔 때마다 알림 (바로 입장했으면 아무것도 안 보냄)
+        if ticket is not None:
+            try:
+                async for position in ticket.wait():
+                    yield {
+                        "event": "status",
+                        "data": json.dumps(
+                            {"step": "queued", "position": position, "detail": f"대기 중 ({position}번째)", "trace_id": trace_id},
+                            ensure_ascii=False,
+                        ),
+                    }
+            except admission.AdmissionRejected:
+                outcome = "queue_timeout"
+                yield {
+                    "event": "error",
+                    "data": json.dumps(
+                        {"code": "QUEUE_TIMEOUT", "message": "지금 사람이 너무 많아. 잠깐 뒤에 다시 말 걸어줘.", "trace_id": trace_id},
+                        ensure_ascii=False,
+                    ),
+                }
+                yield {"event": "done", "data": "{}"}
+                return
+
+        executor = get_agent_executor()
+        run_kwargs = {}
+        if executor.checkpointer is not None:
+            # 세션별 마지막 턴 상태만 그래프 종료 시 한 번 저장 (노드마다 저장하지 않음)
+            await checkpoint.start_turn(executor, request.session_id)
+            config.update(checkpoint.thread_config(request.session_id))
+            run_kwargs["durability"] = "exit"
+
         sent_content = False
+        text_done = False
+        response_runs: set = set()  # generate_response 안의 chat model run_id (청크마다 태그/메타 검사 안 하도록)
+        held_runs: set = set()  # speculative 생성 중 아직 검색 결정 전인 run_id → 청크는 held에 보류
+        held: list = []
 
-        async for event in agent_executor.astream_events(initial_state, version="v2"):
+        async for event in executor.astream_events(initial_state, config=config, version="v2", **run_kwargs):
             kind = event["event"]
+            if kind not in _HANDLED_EVENTS:
+                continue
+
+            # 본문 청크가 이벤트 대부분이라 가장 먼저 처리
+            if kind == "on_chat_model_stream":
+                run_id = event["run_id"]
+                if run_id not in response_runs and run_id not in held_runs:
+                    continue
+                content = getattr(event["data"].get("chunk"), "content", "")
+                if type(content) is not str:
+                    content = _extract_text(content)
+                if not content:
+                    continue
+                if run_id in held_runs:
+                    held.append(content)
+                    continue
+                sent_content = True
+                yield ("token", content)
 
-            if kind == "on_chain_start" and event["name"] == "LangChain":
+            # 그래프 루트 시작 (컴파일된 그래프의 이름은 "LangGraph")
+            elif kind == "on_chain_start":
+                if event.get("parent_ids"):
+                    continue
                 yield {
                     "event": "status",
-                    "data": json.dumps({"step": "analyzing", "detail": "입력 분석 및 위험 감지 중"}),
+                    "data": json.dumps({"step": "analyzing", "detail": "입력 분석 및 위험 감지 중", "trace_id": trace_id}),
                 }
                 yield {"event": "analysis_preview", "data": json.dumps(ANALYSIS_PREVIEW_PAYLOAD, ensure_ascii=False)}
 
-            elif kind == "on_chat_model_stream":
+            elif kind == "on_chat_model_start":
                 if not _is_generate_response_event(event):
                     continue
+                if SPECULATIVE_TAG in event.get("tags", ()):
+                    held_runs.add(event["run_id"])
+                    continue
+                response_runs.add(event["run_id"])
+                yield {"event": "section", "data": json.dumps({"type": "diagnosis"})}
 
-                chunk = event.get("data", {}).get("chunk")
-                content = _extract_text(getattr(chunk, "content", ""))
-                if content:
-                    sent_content = True
-                    yield {"event": "token", "data": json.dumps({"content": content}, ensure_ascii=False)}
+            elif kind == "on_custom_event":
+                # speculative 모드의 검색 결정: hit면 보류한 추측 생성을 이어서 내보내고, miss면 버림 (재생성 run이 새로 시작)
+                if event.get("name") != SPECULATION_EVENT:
+                    continue
+                yield {
+                    "event": "status",
+                    "data": json.dumps(
+                        {"step": "searching", "detail": "실시간 데이터 검색 및 팩트 체크 완료", "trace_id": trace_id},
+                        ensure_ascii=False,
+                    ),
+                }
+                if event["data"].get("result") == "hit":
+                    response_runs |= held_runs
+                    yield {"event": "section", "data": json.dumps({"type": "diagnosis"})}
+                    if held:
+                        sent_content = True
+                        yield ("token", "".join(held))
+                held_runs.clear()
+                held.clear()
 
-            elif kind == "on_chain_end":
+            else:  # on_chain_end
                 node_name = event.get("name")
+                if node_name not in _HANDLED_NODES:
+                    continue
 
                 # LangGraph 노드 종료 이벤트만 처리 (metadata에 langgraph_node가 있는 경우)
                 if event.get("metadata", {}).get("langgraph_node") != node_name:
@@ -148,11 +471,12 @@ async def real_agent_generator(request: ChatRequest):
                     if node_name != "generate_response":
                         continue
 
-                if node_name == "crisis_check":
+                if node_name in ("crisis_check", "triage"):
                     res = event["data"]["output"]
                     crisis_level = res.get("crisis_level", "safe")
 
                     if crisis_level == "crisis":
+                        outcome = "crisis"
                         yield {
                             "event": "crisis",
                             "data": json.dumps({
@@ -174,14 +498,10 @@ async def real_agent_generator(request: ChatRequest):
                         return
 
                     elif crisis_level == "unclear":
+                        outcome = "unclear"
                         yield {
                             "event": "token",
-                            "data": json.dumps({
-                                "content": (
-                                    "야 잠만.\n"
-                                    "지금 그거 진심이야?"
-                                ),
-                            }, ensure_ascii=False),
+                            "data": json.dumps({"content": UNCLEAR_REPLY}, ensure_ascii=False),
                         }
                         yield {"event": "done", "data": "{}"}
                         return
@@ -189,57 +509,109 @@ async def real_agent_generator(request: ChatRequest):
                 elif node_name == "execute_tools":
                     yield {
                         "event": "status",
-                        "data": json.dumps({"step": "searching", "detail": "실시간 데이터 검색 및 팩트 체크 완료"}, ensure_ascii=False),
+                        "data": json.dumps(
+                            {"step": "searching", "detail": "실시간 데이터 검색 및 팩트 체크 완료", "trace_id": trace_id},
+                            ensure_ascii=False,
+                        ),
                     }
 
                 elif node_name == "generate_response":
-                    if sent_content:
-                        continue # 이미 스트리밍으로 보냄
-                    
                     final_result = event["data"]["output"]
-                    raw_text = final_result.get("diagnosis") or final_result.get("content") or ""
-                    normalized_text = _extract_text(raw_text)
+                    if isinstance(final_result, dict) and final_result.get("prompt_cache"):
+                        yield {
+                            "event": "metadata",
+                            "data": json.dumps({"prompt_cache": final_result["prompt_cache"]}, ensure_ascii=False),
+                        }
+
+                    if not sent_content:
+                        raw_text = final_result.get("diagnosis") or final_result.get("content") or ""
+                        normalized_text = _extract_text(raw_text)
                     
-                    if normalized_text.strip():
-                        sent_content = True
-                        yield {"event": "token", "data": json.dumps({"content": normalized_text}, ensure_ascii=False)}
+                        if normalized_text.strip():
+                            sent_content = True
+                            yield ("token", normalized_text)
+
+                    # 본문은 여기서 끝 → 채점(score/share_card)은 뒤따라 별도 이벤트로
+                    if not text_done:
+                        text_done = True
+                        yield {"event": "done", "data": json.dumps({"stage": "text"})}
 
                 elif node_name == "calculate_score":
                     final_result = event["data"]["output"]
                     yield {"event": "score", "data": json.dumps(final_result.get("reality_score", {}), ensure_ascii=False)}
                     yield {"event": "share_card", "data": json.dumps(final_result.get("share_card", {}), ensure_ascii=False)}
 
-            if kind == "on_chat_model_start" and _is_generate_response_event(event):
-                yield {"event": "section", "data": json.dumps({"type": "diagnosis"})}
-
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"  # 클라이언트 연결 끊김
+        raise
     except Exception as e:
-        yield {"event": "error", "data": json.dumps({"code": "AGENT_ERROR", "message": f"에러 발생: {str(e)}"})}
+        outcome = "error"
+        yield {"event": "error", "data": json.dumps({"code": "AGENT_ERROR", "message": f"에러 발생: {str(e)}", "trace_id": trace_id})}
+    finally:
+        if ticket is not None:
+            ticket.release()
+        metrics.end_trace(trace, outcome)
 
     yield {"event": "done", "data": "{}"}
 
 
+@app.get("/agent/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.post("/agent/chat")
 async def chat_endpoint(request: ChatRequest):
-    return EventSourceResponse(real_agent_generator(request))
+    # 세션 체크포인트: history 없이 history_version만 왔으면 저장된 상태에서 이어받기
+    # 이어받을 수 없으면 409 → 백엔드가 history 전체로 다시 요청
+    history = None
+    executor = get_agent_executor()
+    if request.history_version is not None and not request.history:
+        if executor.checkpointer is not None:
+            history = await checkpoint.load_history(executor, request.session_id, request.history_version, UNCLEAR_REPLY)
+        elif request.history_version == 0:
+            history = []
+        if history is None:
+            return JSONResponse(
+                status_code=409,
+                content={"code": "HISTORY_MISMATCH", "message": "history 전체를 다시 보내줘."},
+            )
+    elif request.history_version is not None and executor.checkpointer is not None:
+        checkpoint.stats["full"] += 1
+
+    # 대기열까지 꽉 찼으면 SSE를 열기 전에 바로 429 (백엔드가 재시도 / 안내)
+    try:
+        ticket = admission.get_admission_controller().enter(request.session_id)
+    except admission.AdmissionRejected as e:
+        return JSONResponse(
+            status_code=429,
+            content={"code": "BUSY", "reason": e.reason, "message": "지금 사람이 너무 많아. 잠깐 뒤에 다시 말 걸어줘."},
+            headers={"Retry-After": str(admission.ADMISSION_RETRY_AFTER)},
+        )
+    # 제너레이터가 시작도 못 하고 끊긴 경우에도 자리를 돌려주도록 background로 한 번 더 (release는 멱등)
+    return EventSourceResponse(real_agent_generator(request, ticket, history), background=BackgroundTask(ticket.release))
 
 
 @app.post("/agent/title")
 async def title_endpoint(request: TitleRequest):
-    try:
-        title_prompt = ChatPromptTemplate.from_messages([
-            ("system", """사용자의 첫 메시지를 보고 대화방의 제목을 창의적으로 지어줘.
-- 결과는 15자 이내로 짧고 강렬하게.
-- 이모지는 절대 쓰지마. 문장으로만 작성해
-- 조사나 불필요한 단어는 빼고 핵심만. (예: "에너지 드링크 과유불급", "카페인 중독 경고")
-- 제목만 딱 답해."""),
-            ("user", "{input}")
-        ])
-        chain = title_prompt | llm_mini | StrOutputParser()
-        title = await chain.ainvoke({"input": request.message})
-        return {"title": title.strip()}
-    except Exception as e:
-        print(f"Title generation error: {e}")
-        return {"title": request.message[:15] + "..."}
+    result = await title_generator.generate_title(request.message)
+    return {"title": result["title"]}
+
+
+@app.post("/agent/score/batch")
+async def score_batch_endpoint(request: ScoreBatchRequest):
+    if len(request.items) > batch_scorer.SCORE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"한 번에 최대 {batch_scorer.SCORE_BATCH_MAX_ITEMS}건")
+    if request.job_id:
+        try:
+            batch_scorer.job_checkpoint(request.job_id).close()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    items = [item.dict() for item in request.items]
+    return StreamingResponse(
+        batch_scorer.stream_ndjson(items, request.job_id, request.concurrency, request.batch_size),
+        media_type="application/x-ndjson",
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,63 @@
+# 그래프 노드용 분류 프롬프트
+# 노드별(split) 경로와 triage(fused) 경로가 같은 판단 기준을 공유하도록 한 곳에 모음
+
+CRISIS_CRITERIA = """한국어에서 아래 표현들은 일상적 감탄사로 자주 쓰인다:
+- "아 죽고 싶다", "자살마렵다", "뒤지겠다", "죽을 것 같아"
+- "미쳐버리겠다", "환장하겠네", "죽여줘"
+- 이런 표현이 불만, 짜증, 피곤, 스트레스 맥락에서 나오면 → SAFE
+
+SAFE (대부분 이쪽이다):
+- 일상적 도움 요청 ("도와줘", "나좀도와줘", "어떻게해", "힘들어", "지쳤어")
+- 욕설, 비속어, 분노 표현 ("뒤질래", "죽여버린다", "미치겠다")
+- 장난, 시비, 도발, 과장 표현
+- 일상적 불만, 짜증, 스트레스에서 나온 관용적 표현
+- 상대방에게 하는 말 ("뒤질래?", "죽을래?")
+- 자살/자해와 무관한 고민 상담 요청
+
+UNCLEAR (모호한 경우):
+- 위기 신호가 직접적이진 않지만 반복적 절망감이 느껴질 때
+- "사는 게 의미가 없다", "없어져도 아무도 모를 거야" 같은 고립감 표현
+- 맥락상 진짜 힘든 건지 그냥 한 말인지 구분이 안 될 때
+
+CRISIS (매우 드물다):
+- 구체적 방법 언급 ("XX층에서 뛰어내리고 싶다", "약을 모으고 있어")
+- 유서/마지막 인사 맥락 ("다 정리했다", "마지막으로 하고 싶은 말")
+- 자해 경험/계획 언급 ("또 그었어", "이번엔 진짜로")
+
+애매하면 SAFE로 판단하라. UNCLEAR는 정말 모호할 때만."""
+
+CRISIS_PROMPT = """사용자의 입력에서 실제 자살/자해 위험도를 판별해. 반드시 SAFE, UNCLEAR, CRISIS 중 하나로만 답해.
+
+""" + CRISIS_CRITERIA
+
+CATEGORIES = ["career", "love", "finance", "self", "etc"]
+
+CATEGORY_PROMPT = "사용자의 입력을 분석하여 다음 중 가장 적절한 카테고리를 하나만 선택하세요: career, love, finance, self, etc"
+
+SEARCH_QUERY_PROMPT = """사용자 메시지에서 실시간 정보나 최신 유행어 검색이 필요한 키워드를 추출해.
+- 모르는 단어, 유행어(예: 두쫀쿠, 슬릭백 등), 특정 브랜드명, 사건 사고, 논문/자료 링크, 도서 정보 등.
+- 사용자가 구체적인 정보(링크, 제목, 출처)를 요구하거나 실시간 확인이 필요한 모든 상황.
+- 검색할 게 없으면 "NONE"이라고만 답해.
+- 검색할 게 있으면 검색 쿼리 하나만 짧게 답해. (예: "자연어 처리 감성 분석 논문")"""
+
+# crisis_check + analyze_input + 검색어 추출을 LLM 한 번으로 합친 프롬프트
+# ({format_instructions}는 PydanticOutputParser가 채움)
+TRIAGE_PROMPT = """사용자 메시지 하나를 보고 아래 세 가지를 한 번에 판단해서 JSON으로만 답해.
+
+[1] crisis_level: 실제 자살/자해 위험도. SAFE, UNCLEAR, CRISIS 중 하나.
+""" + CRISIS_CRITERIA + """
+
+[2] category: 다음 중 가장 적절한 카테고리 하나. career, love, finance, self, etc
+
+[3] search_query: 실시간 정보나 최신 유행어 검색이 필요한 키워드.
+""" + SEARCH_QUERY_PROMPT.replace('"NONE"이라고만 답해', '"NONE"') + """
+
+{format_instructions}"""
+
+# 오래된 대화 턴을 세션별 요약에 접어 넣을 때 (app.agent.history)
+HISTORY_SUMMARY_PROMPT = """너는 상담 대화 기록을 정리하는 역할이다.
+[기존 요약]에 [새 대화]의 내용을 합쳐서 갱신된 대화 요약 하나만 출력해.
+- 사용자의 고민, 상황, 구체적 사실(숫자, 이름, 일정, 문서 내용)은 빠짐없이 유지.
+- 이미 해준 조언과 사용자의 반응, 아직 안 끝난 이야기를 남겨.
+- 인사, 감탄, 반복되는 말은 버려.
+- 10줄 이내 개조식. 다른 말은 붙이지 마."""
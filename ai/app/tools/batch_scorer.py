@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional
+
+from app.tools.calculator import calculate_reality_scores_batch
+
+# 과거 메시지 일괄 재채점 (채점 기준을 바꿨을 때 백필용)
+#   - 항목 여러 개를 LLM 한 번에 채점 (SCORE_BATCH_SIZE), 동시에 SCORE_BATCH_CONCURRENCY 호출까지
+#   - 입력은 이터레이터로 받아서 필요한 만큼만 읽음 (100만 건도 메모리에 다 올리지 않음)
+#   - 체크포인트 파일(NDJSON)에 끝난 결과를 바로 append → 중간에 끊겨도 같은 파일로 다시 돌리면 이어서 채점
+#     LLM 채점 실패분(source fallback/default)은 체크포인트에 남기지 않음 → 다시 돌리면 그 항목만 재채점
+#   - 호출 전체가 실패한 chunk(장애)는 건별로 쪼개지 않고 지수 백오프로 chunk째 재시도, 그래도 안 되면 실패로 내보냄
+#
+# API:  POST /agent/score/batch  (NDJSON 스트리밍 응답)
+# CLI:  cd ai && python -m scripts.score_batch --input messages.jsonl --output scores.jsonl
+
+SCORE_BATCH_SIZE = int(os.getenv("SCORE_BATCH_SIZE", "8"))
+SCORE_BATCH_CONCURRENCY = int(os.getenv("SCORE_BATCH_CONCURRENCY", "4"))
+SCORE_BATCH_MAX_CONCURRENCY = int(os.getenv("SCORE_BATCH_MAX_CONCURRENCY", "16"))  # 요청에서 올릴 수 있는 상한
+SCORE_BATCH_MAX_ITEMS = int(os.getenv("SCORE_BATCH_MAX_ITEMS", "5000"))  # API 요청 한 번의 최대 항목 수
+SCORE_BATCH_RETRIES = int(os.getenv("SCORE_BATCH_RETRIES", "3"))  # 호출 전체가 실패한 chunk 재시도 횟수
+SCORE_BATCH_BACKOFF = float(os.getenv("SCORE_BATCH_BACKOFF", "2.0"))  # 첫 재시도 전 대기(초), 실패할 때마다 2배
+SCORE_CHECKPOINT_DIR = Path(os.getenv("SCORE_CHECKPOINT_DIR", Path(__file__).resolve().parents[2] / ".score_checkpoints"))
+
+_JOB_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+# LLM 채점에 실패해 대체 점수가 들어간 출처 (체크포인트에 남기지 않음)
+FAILED_SOURCES = ("fallback", "default")
+
+stats = {"items": 0, "chunks": 0, "resumed": 0, "failed": 0, "chunk_retries": 0}
+
+
+class Checkpoint:
+    """
+    끝난 결과를 한 줄씩 append하는 NDJSON 파일. 다시 열면 이미 끝난 id를 건너뜀
+    (메모리에는 id만 들고 있음). 실패 출처(FAILED_SOURCES) 결과는 쓰지도, 끝난 것으로 읽지도 않음
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.done: set = set()
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        if record.get("source") not in FAILED_SOURCES:
+                            self.done.add(str(record["id"]))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        continue  # 강제 종료로 잘린 마지막 줄
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a+", encoding="utf-8")
+        # 잘린 줄 뒤에 바로 이어 쓰지 않도록 줄바꿈 보정
+        if self._file.tell() > 0:
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != "\n":
+                self._file.write("\n")
+
+    def write(self, records: list):
+        for record in records:
+            if record.get("source") in FAILED_SOURCES:
+                continue
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.done.add(record["id"])
+        self._file.flush()
+
+    def replay(self, ids: set) -> Iterable[dict]:
+        """이미 끝난 결과 중 ids에 해당하는 것 (파일을 처음부터 읽음)"""
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if str(record.get("id")) in ids and record.get("source") not in FAILED_SOURCES:
+                    yield record
+
+    def close(self):
+        self._file.close()
+
+
+def job_checkpoint(job_id: str) -> Checkpoint:
+    if not _JOB_ID.match(job_id):
+        raise ValueError("job_id는 영문/숫자/_.- 64자 이내")
+    return Checkpoint(SCORE_CHECKPOINT_DIR / f"{job_id}.ndjson")
+
+
+async def _score_chunk(pairs: list) -> list:
+    """calculate_reality_scores_batch + 호출 전체가 실패하면(전 항목 실패 출처) 지수 백오프 후 chunk째 재시도"""
+    for attempt in range(SCORE_BATCH_RETRIES + 1):
+        scored = await calculate_reality_scores_batch(pairs)
+        if attempt == SCORE_BATCH_RETRIES or any(source not in FAILED_SOURCES for _, source in scored):
+            return scored
+        delay = SCORE_BATCH_BACKOFF * 2 ** attempt
+        stats["chunk_retries"] += 1
+        print(f"[ScoreBatch] {len(pairs)}건 chunk 채점 실패 → {delay:.1f}s 후 재시도 ({attempt + 1}/{SCORE_BATCH_RETRIES})")
+        await asyncio.sleep(delay)
+
+
+async def score_items(
+    items: Iterable[dict],
+    concurrency: int = SCORE_BATCH_CONCURRENCY,
+    batch_size: int = SCORE_BATCH_SIZE,
+    checkpoint: Optional[Checkpoint] = None,
+) -> AsyncIterator[dict]:
+    """
+    {"id", "user_message", "ai_response"} 이터러블 → 끝나는 순서대로
+    {"id", "total", "breakdown", "summary", "source"}
+    checkpoint에 이미 있는 id는 건너뜀. 소비를 멈추면(연결 끊김) 진행 중인 호출은 취소
+    재시도 후에도 실패한 항목은 source fallback/default로 내보내지만 checkpoint에는 남기지 않음
+    """
+    done = checkpoint.done if checkpoint else set()
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)  # 입력은 필요한 만큼만 앞서 읽음
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        chunk = []
+        for item in items:
+            item_id = str(item["id"])
+            if item_id in done:
+                stats["resumed"] += 1
+                continue
+            chunk.append((item_id, item["user_message"], item.get("ai_response") or ""))
+            if len(chunk) >= batch_size:
+                await chunks.put(chunk)
+                chunk = []
+        if chunk:
+            await chunks.put(chunk)
+        for _ in range(concurrency):
+            await chunks.put(None)
+
+    async def work():
+        while (chunk := await chunks.get()) is not None:
+            scored = await _score_chunk([(user, ai) for _, user, ai in chunk])
+            records = [
+                {"id": item_id, **result, "source": source}
+                for (item_id, _, _), (result, source) in zip(chunk, scored)
+            ]
+            if checkpoint:
+                checkpoint.write(records)
+            stats["chunks"] += 1
+            stats["items"] += len(records)
+            stats["failed"] += sum(1 for record in records if record["source"] in FAILED_SOURCES)
+            await results.put(records)
+        await results.put(None)
+
+    tasks = [asyncio.create_task(produce())] + [asyncio.create_task(work()) for _ in range(concurrency)]
+    try:
+        finished = 0
+        while finished < concurrency:
+            records = await results.get()
+            if records is None:
+                finished += 1
+                continue
+            for record in records:
+                yield record
+        await tasks[0]  # 입력 읽기 중 예외가 있으면 여기서 올라옴
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def stream_ndjson(items: list, job_id: Optional[str] = None, concurrency: Optional[int] = None,
+                        batch_size: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    /agent/score/batch 응답 본문. 결과 한 줄씩, 마지막 줄은 {"done": true, ...} 요약
+    job_id가 있으면 체크포인트를 남기고, 같은 job_id로 다시 보내면 끝난 항목은 저장된 결과를 먼저 내보냄
+    """
+    concurrency = max(1, min(concurrency or SCORE_BATCH_CONCURRENCY, SCORE_BATCH_MAX_CONCURRENCY))
+    batch_size = max(1, batch_size or SCORE_BATCH_SIZE)
+    checkpoint = job_checkpoint(job_id) if job_id else None
+    start = time.perf_counter()
+    sources: dict = {}
+    resumed = 0
+    try:
+        if checkpoint:
+            requested = {str(item["id"]) for item in items}
+            for record in checkpoint.replay(requested & checkpoint.done):
+                resumed += 1
+                yield json.dumps({**record, "resumed": True}, ensure_ascii=False) + "\n"
+        async for record in score_items(items, concurrency, batch_size, checkpoint):
+            sources[record["source"]] = sources.get(record["source"], 0) + 1
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+        elapsed = time.perf_counter() - start
+        print(f"[ScoreBatch] {job_id or '-'}: {sum(sources.values())}건 채점, {resumed}건 재사용, {elapsed:.1f}s {sources}")
+        yield json.dumps({
+            "done": True,
+            "scored": sum(sources.values()),
+            "resumed": resumed,
+            "sources": sources,
+            "elapsed": round(elapsed, 3),
+        }) + "\n"
+    finally:
+        if checkpoint:
+            checkpoint.close()
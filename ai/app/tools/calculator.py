@@ -1,8 +1,22 @@
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from app.agent.registry import get_llm
+from app.tools.heuristic_scorer import DIMENSIONS, heuristic_score
+import asyncio
 import os
+from typing import List, Optional
+
+# 로컬 휴리스틱 채점기(heuristic_scorer) 사용 방식
+#   off      : LLM만 (실패하면 전 항목 10점 기본 점수)
+#   fallback : LLM 실패 시 휴리스틱 점수 (기본)
+#   sole     : LLM 호출 없이 휴리스틱만
+#   blend    : LLM 점수와 휴리스틱 점수를 가중 평균 (휴리스틱 근거가 있는 항목만), LLM 실패 시 휴리스틱
+SCORE_HEURISTIC_MODE = os.getenv("SCORE_HEURISTIC_MODE", "fallback")
+SCORE_BLEND_WEIGHT = float(os.getenv("SCORE_BLEND_WEIGHT", "0.7"))  # blend에서 LLM 점수 비중
+SCORE_BATCH_INPUT_CHARS = int(os.getenv("SCORE_BATCH_INPUT_CHARS", "1500"))  # 일괄 채점 시 항목당 입력/응답 최대 글자
+
+score_stats = {"llm": 0, "heuristic": 0, "blend": 0, "fallback": 0, "default": 0}
 
 class RealityScore(BaseModel):
     goal_realism: int = Field(..., ge=0, le=20, description="목표의 비현실성 (10=보통, 20=완전허황, 0=매우현실적)")
@@ -13,16 +27,27 @@ class RealityScore(BaseModel):
     total: int = Field(..., description="총점 (높을수록 현실 회피가 심함)")
     summary: str = Field(..., description="점수에 대한 팩폭 평가")
 
-def calculate_reality_score_logic(user_message: str, ai_response: str) -> dict:
-    """
-    AG-12: LLM 기반 현실회피지수 산출 (High Score = High Avoidance)
-    """
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    
-    parser = JsonOutputParser(pydantic_object=RealityScore)
-    
-    # 채점 기준 가이드라인
-    scoring_rubric = """
+
+class EarlyRealityScore(RealityScore):
+    needs_context: bool = Field(False, description="사용자 입력만으로 채점이 어려워 AI 응답까지 봐야 하면 true")
+
+
+class BatchRealityScore(RealityScore):
+    index: int = Field(..., description="채점 목록의 번호")
+
+
+class BatchRealityScores(BaseModel):
+    scores: List[BatchRealityScore]
+
+
+DEFAULT_SCORE = {
+    "total": 50,
+    "breakdown": {dim: 10 for dim in DIMENSIONS},
+    "summary": "분석 오류로 기본 점수를 부여합니다.",
+}
+
+# 채점 기준 가이드라인
+SCORING_RUBRIC = """
     [채점 가이드라인 - 기준점 10점]
     모든 항목은 '10점(평균)'에서 시작하여, 사용자의 발언 내용에 따라 가감점하십시오.
     점수가 높을수록 '현실을 회피하고 상태가 나쁨(Bad)'을 의미합니다.
@@ -53,14 +78,112 @@ def calculate_reality_score_logic(user_message: str, ai_response: str) -> dict:
        - (-5~10): "지금 당장", "오늘부터 바로", 위기감을 느끼고 행동함
     """
 
+SCORING_RULES = """[중요 채점 규칙]
+1. **10점**을 기준으로 하되, **1점 단위**로 세밀하게 가감점하십시오. (예: 13점, 8점, 17점)
+2. 딱 떨어지는 점수(0, 10, 20)보다는, 사용자의 미묘한 뉘앙스(망설임, 단어 선택, 문장 길이 등)를 반영하여 **중간 점수**를 적극적으로 부여하십시오.
+3. 예를 들어, 완전히 허황되지는 않지만 조금 모호하다면 13점, 꽤 구체적이지만 살짝 비현실적이라면 7점 같은 식입니다."""
+
+
+def _to_result(score_data: dict) -> dict:
+    breakdown = {dim: score_data[dim] for dim in DIMENSIONS}
+    return {
+        "total": sum(breakdown.values()),
+        "breakdown": breakdown,
+        "summary": score_data["summary"],
+    }
+
+
+def _heuristic_result(user_message: str) -> dict:
+    result = heuristic_score(user_message)
+    result.pop("evidence")
+    return result
+
+
+def _blend(llm_result: dict, user_message: str) -> dict:
+    """휴리스틱 근거가 있는 항목만 섞음 (근거 없는 항목은 LLM 점수 그대로), 한 줄 평은 LLM 것"""
+    local = heuristic_score(user_message)
+    breakdown = dict(llm_result["breakdown"])
+    for dim in local["evidence"]:
+        breakdown[dim] = round(SCORE_BLEND_WEIGHT * breakdown[dim] + (1 - SCORE_BLEND_WEIGHT) * local["breakdown"][dim])
+    return {**llm_result, "total": sum(breakdown.values()), "breakdown": breakdown}
+
+
+def _on_llm_result(result: dict, user_message: str) -> tuple:
+    """(결과, 출처). 출처는 score_stats 키와 같음"""
+    source = "blend" if SCORE_HEURISTIC_MODE == "blend" else "llm"
+    score_stats[source] += 1
+    return (_blend(result, user_message) if source == "blend" else result), source
+
+
+def _on_llm_failure(user_message: str) -> tuple:
+    if SCORE_HEURISTIC_MODE in ("fallback", "blend"):
+        score_stats["fallback"] += 1
+        return _heuristic_result(user_message), "fallback"
+    score_stats["default"] += 1
+    return {**DEFAULT_SCORE, "breakdown": dict(DEFAULT_SCORE["breakdown"])}, "default"
+
+
+async def score_user_message(user_message: str) -> Optional[dict]:
+    """
+    AI 응답 없이 사용자 입력만으로 먼저 채점 (응답 생성과 동시에 실행)
+    실패하면 None, 응답까지 봐야 하면 결과에 needs_context=True
+    """
+    if SCORE_HEURISTIC_MODE == "sole":
+        score_stats["heuristic"] += 1
+        return {**_heuristic_result(user_message), "needs_context": False}
+
+    parser = JsonOutputParser(pydantic_object=EarlyRealityScore)
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", """사용자의 입력만 보고 '현실 회피 지수'를 정밀하게 채점하세요.
+{scoring_rubric}
+
+{scoring_rules}
+4. "ㅇㅇ", "알려줘", "그래서?"처럼 입력만으로는 채점 근거가 없으면 needs_context를 true로 하십시오.
+
+반드시 위 기준에 맞춰 JSON 형식으로 응답하세요:
+{format_instructions}"""),
+        ("user", "사용자 입력: {user_input}")
+    ])
+    chain = prompt | get_llm("score") | parser
+    try:
+        score_data = await chain.ainvoke({
+            "user_input": user_message,
+            "scoring_rubric": SCORING_RUBRIC,
+            "scoring_rules": SCORING_RULES,
+            "format_instructions": parser.get_format_instructions(),
+        })
+        result, _ = _on_llm_result(_to_result(score_data), user_message)
+        result["needs_context"] = bool(score_data.get("needs_context", False))
+        return result
+    except Exception as e:
+        print(f"[Score] 선채점 실패 → 응답 포함 채점으로: {e}")
+        return None
+
+
+async def calculate_reality_score_logic(user_message: str, ai_response: str) -> dict:
+    """
+    AG-12: LLM 기반 현실회피지수 산출 (High Score = High Avoidance)
+    SCORE_HEURISTIC_MODE에 따라 로컬 휴리스틱으로 대체/보완
+    """
+    result, _ = await score_with_source(user_message, ai_response)
+    return result
+
+
+async def score_with_source(user_message: str, ai_response: str) -> tuple:
+    """calculate_reality_score_logic과 같지만 (결과, 출처) 반환. 출처: llm / blend / heuristic / fallback / default"""
+    if SCORE_HEURISTIC_MODE == "sole":
+        score_stats["heuristic"] += 1
+        return _heuristic_result(user_message), "heuristic"
+
+    llm = get_llm("score")
+
+    parser = JsonOutputParser(pydantic_object=RealityScore)
+
     prompt = ChatPromptTemplate.from_messages([
         ("system", """사용자의 입력과 AI의 팩폭 내용을 바탕으로 '현실 회피 지수'를 정밀하게 채점하세요.
 {scoring_rubric}
 
-[중요 채점 규칙]
-1. **10점**을 기준으로 하되, **1점 단위**로 세밀하게 가감점하십시오. (예: 13점, 8점, 17점)
-2. 딱 떨어지는 점수(0, 10, 20)보다는, 사용자의 미묘한 뉘앙스(망설임, 단어 선택, 문장 길이 등)를 반영하여 **중간 점수**를 적극적으로 부여하십시오.
-3. 예를 들어, 완전히 허황되지는 않지만 조금 모호하다면 13점, 꽤 구체적이지만 살짝 비현실적이라면 7점 같은 식입니다.
+{scoring_rules}
 
 반드시 위 기준에 맞춰 JSON 형식으로 응답하세요:
 {format_instructions}"""),
@@ -70,33 +193,78 @@ def calculate_reality_score_logic(user_message: str, ai_response: str) -> dict:
     chain = prompt | llm | parser
     
     try:
-        score_data = chain.invoke({
+        score_data = await chain.ainvoke({
             "user_input": user_message,
             "ai_response": ai_response,
-            "scoring_rubric": scoring_rubric,
+            "scoring_rubric": SCORING_RUBRIC,
+            "scoring_rules": SCORING_RULES,
             "format_instructions": parser.get_format_instructions()
         })
         
-        # breakdown 구조
-        breakdown = {
-            "goal_realism": score_data["goal_realism"],
-            "effort_specificity": score_data["effort_specificity"],
-            "external_blame": score_data["external_blame"],
-            "info_seeking": score_data["info_seeking"],
-            "time_urgency": score_data["time_urgency"]
-        }
-        
-        return {
-            "total": sum(breakdown.values()),
-            "breakdown": breakdown,
-            "summary": score_data["summary"]
-        }
+        return _on_llm_result(_to_result(score_data), user_message)
     except Exception as e:
-        return {
-            "total": 50,
-            "breakdown": {
-                "goal_realism": 10, "effort_specificity": 10, "external_blame": 10,
-                "info_seeking": 10, "time_urgency": 10
-            },
-            "summary": "분석 오류로 기본 점수를 부여합니다."
-        }
+        print(f"[Score] 채점 실패 → {'휴리스틱 점수' if SCORE_HEURISTIC_MODE in ('fallback', 'blend') else '기본 점수'}: {e}")
+        return _on_llm_failure(user_message)
+
+
+def _is_valid(score_data: dict) -> bool:
+    try:
+        return isinstance(score_data["summary"], str) and all(
+            isinstance(score_data[dim], int) and 0 <= score_data[dim] <= 20 for dim in DIMENSIONS
+        )
+    except (KeyError, TypeError):
+        return False
+
+
+async def calculate_reality_scores_batch(pairs: List[tuple]) -> List[tuple]:
+    """
+    (user_message, ai_response) 여러 쌍을 LLM 한 번으로 채점 (과거 메시지 재채점용)
+    반환: 입력 순서대로 (결과, 출처). 응답에서 빠졌거나 형식이 깨진 항목만 하나씩 다시 채점
+    호출 자체가 실패하면(장애, 응답 전체가 깨짐) 건별로 다시 부르지 않고 전 항목 실패 출처(fallback/default)
+    → 장애 중에 호출 수가 batch 크기만큼 불어나지 않도록. 재시도 / 대기는 호출 측(batch_scorer)에서
+    """
+    if SCORE_HEURISTIC_MODE == "sole" or len(pairs) == 1:
+        return [await score_with_source(user, ai) for user, ai in pairs]
+
+    parser = JsonOutputParser(pydantic_object=BatchRealityScores)
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", """아래 채점 목록의 각 항목(사용자 입력과 AI의 팩폭 내용)마다 '현실 회피 지수'를 정밀하게 채점하세요.
+항목끼리는 서로 관계가 없습니다. 다른 항목의 내용을 채점에 반영하지 마십시오.
+{scoring_rubric}
+
+{scoring_rules}
+
+모든 항목에 대해 index(항목 번호)를 포함해서, 반드시 위 기준에 맞춰 JSON 형식으로 응답하세요:
+{format_instructions}"""),
+        ("user", "{items}")
+    ])
+    items = "\n\n".join(
+        f"[{i}]\n사용자 입력: {user[:SCORE_BATCH_INPUT_CHARS]}\nAI 분석 내용: {ai[:SCORE_BATCH_INPUT_CHARS]}"
+        for i, (user, ai) in enumerate(pairs, start=1)
+    )
+    chain = prompt | get_llm("score") | parser
+
+    by_index = {}
+    try:
+        data = await chain.ainvoke({
+            "items": items,
+            "scoring_rubric": SCORING_RUBRIC,
+            "scoring_rules": SCORING_RULES,
+            "format_instructions": parser.get_format_instructions(),
+        })
+        for score_data in (data.get("scores") or []) if isinstance(data, dict) else []:
+            if isinstance(score_data, dict) and _is_valid(score_data):
+                by_index[score_data.get("index")] = score_data
+    except Exception as e:
+        print(f"[Score] 일괄 채점 실패 ({len(pairs)}건): {e}")
+    if not by_index:
+        return [_on_llm_failure(user) for user, _ in pairs]
+
+    missing = [i for i in range(1, len(pairs) + 1) if i not in by_index]
+    if missing:
+        print(f"[Score] 일괄 채점 응답에서 {len(missing)}/{len(pairs)}건 누락 → 한 건씩 채점")
+    retried = dict(zip(missing, await asyncio.gather(*(score_with_source(*pairs[i - 1]) for i in missing))))
+    return [
+        retried[i] if i in retried else _on_llm_result(_to_result(by_index[i]), user)
+        for i, (user, _) in enumerate(pairs, start=1)
+    ]
@@ -0,0 +1,237 @@
+import os
+import re
+import unicodedata
+import zlib
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+# 위기 판별 2차 티어: 로컬 문자 n-gram 선형 분류기 (LLM 앞단)
+# 키워드 사전에서 즉시 crisis로 확정되지 않은 메시지를 판정
+# 확신도가 라벨별 임계값 이상일 때만 확정하고, 나머지는 LLM으로 넘김
+# 사전에 위험 단어가 없다는 것만으로는 safe를 확정하지 않음 (작별 인사 / 간접 표현은 사전에 없음)
+# 사전 [risk] 단어가 걸린 메시지는 unclear / crisis만 확정, safe는 LLM으로 ("살기 싫다"를 모델이 SAFE 0.97로 봄)
+#
+# 학습:  cd ai && python -m scripts.train_crisis_classifier
+# 평가:  cd ai && python -m bench.crisis_classifier
+#        cd ai && python -m bench.crisis_classifier --holdout bench/data/crisis_holdout.csv  (사전 / 모델 튜닝에 안 쓴 셋)
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+CRISIS_MODEL_PATH = Path(os.getenv("CRISIS_MODEL_PATH", DATA_DIR / "crisis_classifier.npz"))
+CRISIS_TRAIN_PATH = Path(os.getenv("CRISIS_TRAIN_PATH", DATA_DIR / "crisis_labeled.csv"))
+
+# 라벨별 확정 임계값 (softmax 확률). safe 오판이 가장 위험하므로 가장 높게
+CRISIS_CLF_SAFE_THRESHOLD = float(os.getenv("CRISIS_CLF_SAFE_THRESHOLD", "0.95"))
+CRISIS_CLF_UNCLEAR_THRESHOLD = float(os.getenv("CRISIS_CLF_UNCLEAR_THRESHOLD", "0.8"))
+CRISIS_CLF_CRISIS_THRESHOLD = float(os.getenv("CRISIS_CLF_CRISIS_THRESHOLD", "0.7"))
+# 0이면 로컬 분류기 건너뛰고 바로 LLM
+CRISIS_CLF_ENABLED = os.getenv("CRISIS_CLF_ENABLED", "1") == "1"
+
+LABELS = ("SAFE", "UNCLEAR", "CRISIS")
+N_FEATURES = 1 << 16  # 해싱 버킷 수
+NGRAM_RANGE = (1, 3)  # 음절 n-gram
+
+_FILLER = re.compile(r"[ㅋㅎㅠㅜㅡ~!?.,]+")
+_SPACES = re.compile(r"\s+")
+
+stats = {"decided": 0, "escalated": 0}
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFC", text).lower()
+    text = _FILLER.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) & (N_FEATURES - 1)
+
+
+def features(text: str) -> tuple:
+    """
+    음절 1~3-gram(어절 경계 포함) + 어절 unigram → 해싱 버킷 인덱스 / L2 정규화 값
+    """
+    norm = normalize(text)
+    counts: dict = {}
+    padded = f" {norm} "
+    lo, hi = NGRAM_RANGE
+    for n in range(lo, hi + 1):
+        for i in range(len(padded) - n + 1):
+            gram = padded[i:i + n]
+            if gram.strip():
+                idx = _bucket(f"c{n}:{gram}")
+                counts[idx] = counts.get(idx, 0) + 1
+    for word in norm.split():
+        idx = _bucket(f"w:{word}")
+        counts[idx] = counts.get(idx, 0) + 1
+
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    values /= np.sqrt((values * values).sum())
+    return idx, values
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class CrisisClassifier:
+    """해싱 특성 위의 다항 로지스틱 회귀. weights: (N_FEATURES, 3), bias: (3,)"""
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray):
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        idx, values = features(text)
+        logits = self.bias + values @ self.weights[idx]
+        return _softmax(logits)
+
+    def predict(self, text: str) -> tuple:
+        """(라벨, 확신도) 예) ("SAFE", 0.97)"""
+        proba = self.predict_proba(text)
+        best = int(proba.argmax())
+        return LABELS[best], float(proba[best])
+
+    def save(self, path: Path = CRISIS_MODEL_PATH):
+        # 학습 데이터에 나온 버킷만 저장 (대부분 0이라 파일이 작음)
+        rows = np.flatnonzero(np.abs(self.weights).sum(axis=1))
+        np.savez_compressed(
+            path,
+            rows=rows.astype(np.int64),
+            weights=self.weights[rows],
+            bias=self.bias,
+            n_features=np.int64(N_FEATURES),
+        )
+
+    @classmethod
+    def load(cls, path: Path = CRISIS_MODEL_PATH) -> "CrisisClassifier":
+        with np.load(path) as data:
+            if int(data["n_features"]) != N_FEATURES:
+                raise ValueError(f"특성 수 불일치: 모델 {int(data['n_features'])} / 코드 {N_FEATURES} → 재학습 필요")
+            weights = np.zeros((N_FEATURES, len(LABELS)), dtype=np.float32)
+            weights[data["rows"]] = data["weights"]
+            return cls(weights, data["bias"])
+
+
+def load_dataset(path: Path = CRISIS_TRAIN_PATH) -> tuple:
+    import csv
+
+    texts, labels = [], []
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            label = row["label"].strip().upper()
+            if label not in LABELS:
+                raise ValueError(f"알 수 없는 라벨: {row['label']!r}")
+            texts.append(row["text"])
+            labels.append(label)
+    return texts, labels
+
+
+def train(texts: Sequence[str], labels: Sequence[str], epochs: int = 300, lr: float = 0.5,
+          l2: float = 1e-4) -> CrisisClassifier:
+    """
+    전체 배치 경사하강(AdaGrad). 라벨 불균형은 클래스 가중치로 보정
+    (CRISIS 샘플이 적어도 recall이 밀리지 않도록)
+    """
+    n = len(texts)
+    y = np.array([LABELS.index(label) for label in labels])
+    onehot = np.eye(len(LABELS), dtype=np.float32)[y]
+    class_counts = np.bincount(y, minlength=len(LABELS)).astype(np.float32)
+    sample_weight = (n / (len(LABELS) * np.maximum(class_counts, 1)))[y]
+
+    # 희소 행렬 (rows, cols, vals)
+    rows: List[np.ndarray] = []
+    cols: List[np.ndarray] = []
+    vals: List[np.ndarray] = []
+    for i, text in enumerate(texts):
+        idx, values = features(text)
+        rows.append(np.full(len(idx), i))
+        cols.append(idx)
+        vals.append(values)
+    rows_a, cols_a, vals_a = np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+    weights = np.zeros((N_FEATURES, len(LABELS)), dtype=np.float32)
+    bias = np.zeros(len(LABELS), dtype=np.float32)
+    grad_sq_w = np.full_like(weights, 1e-8)
+    grad_sq_b = np.full_like(bias, 1e-8)
+
+    for _ in range(epochs):
+        logits = np.tile(bias, (n, 1))
+        np.add.at(logits, rows_a, vals_a[:, None] * weights[cols_a])
+        delta = (_softmax(logits) - onehot) * sample_weight[:, None] / n
+
+        grad_w = np.zeros_like(weights)
+        np.add.at(grad_w, cols_a, vals_a[:, None] * delta[rows_a])
+        grad_w += l2 * weights
+        grad_b = delta.sum(axis=0)
+
+        grad_sq_w += grad_w * grad_w
+        grad_sq_b += grad_b * grad_b
+        weights -= lr * grad_w / np.sqrt(grad_sq_w)
+        bias -= lr * grad_b / np.sqrt(grad_sq_b)
+
+    # 학습 데이터에 안 나온 버킷은 정확히 0으로 (저장 크기 절약)
+    seen = np.zeros(N_FEATURES, dtype=bool)
+    seen[cols_a] = True
+    weights[~seen] = 0
+    return CrisisClassifier(weights, bias)
+
+
+_classifier: Optional[CrisisClassifier] = None
+_load_failed = False
+
+
+def get_classifier() -> Optional[CrisisClassifier]:
+    """모델 파일이 없거나 깨졌으면 None (→ 전부 LLM 판별)"""
+    global _classifier, _load_failed
+    if _classifier is None and not _load_failed:
+        try:
+            _classifier = CrisisClassifier.load()
+        except Exception as e:
+            _load_failed = True
+            print(f"[위기 분류기] 모델 로드 실패 → LLM 판별만 사용: {e}")
+    return _classifier
+
+
+def decide(label: str, confidence: float, keyword_level: Optional[str] = None,
+           risk_hit: bool = False) -> Optional[str]:
+    """
+    분류기 출력 → 소문자 crisis_level 또는 None(→ LLM)
+      라벨별 임계값 이상일 때만 확정 (safe는 사전 결과와 무관하게 항상 CRISIS_CLF_SAFE_THRESHOLD 적용)
+      keyword_level == "safe" (사전에 위험 단어 없음): 분류기가 위험 쪽이면 확정하지 않고 LLM 확인
+      risk_hit (사전 [risk] 단어 있음): safe는 확정하지 않고 LLM 확인
+    """
+    if keyword_level == "safe" and label != "SAFE":
+        return None
+    if risk_hit and label == "SAFE":
+        return None
+    threshold = {
+        "SAFE": CRISIS_CLF_SAFE_THRESHOLD,
+        "UNCLEAR": CRISIS_CLF_UNCLEAR_THRESHOLD,
+        "CRISIS": CRISIS_CLF_CRISIS_THRESHOLD,
+    }[label]
+    return label.lower() if confidence >= threshold else None
+
+
+def classify_crisis_local(text: str, keyword_level: Optional[str] = None, risk_hit: bool = False) -> Optional[str]:
+    """
+    로컬 분류기로 확정 가능하면 "safe" / "unclear" / "crisis",
+    확신이 부족하면 None (→ LLM 판별). 모델이 없으면 사전 결과만 따름
+    """
+    classifier = get_classifier() if CRISIS_CLF_ENABLED else None
+    if classifier is None:
+        return keyword_level
+    label, confidence = classifier.predict(text)
+    level = decide(label, confidence, keyword_level, risk_hit)
+    if level is None:
+        stats["escalated"] += 1
+        print(f"[위기 분류기] {label} {confidence:.2f} → LLM 판별")
+    else:
+        stats["decided"] += 1
+    return level
@@ -0,0 +1,144 @@
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List
+
+from app.tools.keyword_matcher import MODE_ANY, MODE_START, MODE_TOKEN, KeywordMatcher
+
+# 현실 회피 지수 로컬 휴리스틱 채점기 (LLM 없이 수십 µs)
+# 채점 가이드라인(SCORING_RUBRIC)이 거의 어휘 단위라서 사전 + 숫자 정규식으로 5개 항목을 재현
+#   - 항목마다 10점에서 시작, 사전/정규식에 걸린 표현의 가감점을 더함 (항목별 ±10 제한, 0~20)
+#   - 같은 위치에 겹치는 키워드는 가장 긴 것 하나만 ("내 탓" 이 "탓" 보다 우선)
+# calculator.py의 SCORE_HEURISTIC_MODE(sole / fallback / blend)에서 사용
+#
+# 평가:  cd ai && python -m bench.score_agreement
+
+SCORE_LEXICON_PATH = Path(
+    os.getenv("SCORE_LEXICON_PATH", Path(__file__).resolve().parents[1] / "data" / "score_lexicon.txt")
+)
+
+DIMENSIONS = ("goal_realism", "effort_specificity", "external_blame", "info_seeking", "time_urgency")
+BASE_SCORE = 10
+MAX_ADJUST = 10  # 항목별 가감 합계 상한
+
+# 숫자가 들어간 표현 (항목, 가감점, 정규식)
+_PATTERNS = (
+    # 월 1억, 10억 → 허황된 목표 / 월 100만원 → 실현 가능한 목표
+    ("goal_realism", +6, re.compile(r"\d+\s*억")),
+    ("goal_realism", -4, re.compile(r"월\s*\d{1,3}\s*만\s*원")),
+    # 하루 30분, 6시 기상, 단어 50개 → 숫자가 포함된 계획
+    ("effort_specificity", -4, re.compile(r"\d+\s*(?:시간|시|분|개(?!월)|페이지|쪽|장|회|번|km|세트|단어)")),
+    ("effort_specificity", -3, re.compile(r"(?:하루|주|아침|저녁)\s*\d+")),
+    # 합격률 30%, 평균 연봉 3200만원 → 객관적 수치
+    ("info_seeking", -5, re.compile(r"\d+(?:\.\d+)?\s*(?:%|퍼센트)")),
+    ("info_seeking", -3, re.compile(r"(?:평균|경쟁률|합격률|연봉)\s*\S*\d")),
+    # 오늘 9시, 3일 안에 → 기한이 있는 행동 / 5년 뒤에 → 미루기
+    ("time_urgency", -4, re.compile(r"(?:오늘|내일)\s*\d+\s*시")),
+    ("time_urgency", -3, re.compile(r"\d+\s*일\s*(?:안에|이내|만에)")),
+    ("time_urgency", +4, re.compile(r"\d+\s*(?:년|살)\s*(?:뒤|후|쯤)")),
+)
+
+# 가장 두드러진 항목별 한 줄 평 (높을 때 / 낮을 때)
+SUMMARIES = {
+    "goal_realism": ("꿈은 크게 꾸랬지, 복권 긁으라고는 안 했다.", "목표는 현실적이다. 이제 해내기만 하면 된다."),
+    "effort_specificity": ("'열심히'는 계획이 아니다. 숫자부터 적어라.", "계획에 숫자가 있다. 그대로만 지켜라."),
+    "external_blame": ("남 탓할 시간에 네가 바꿀 수 있는 것부터 찾아라.", "자기 책임을 인정한 건 인정한다."),
+    "info_seeking": ("'어떻게든 되겠지'는 전략이 아니다. 알아보고 와라.", "근거를 챙겨 왔네. 그 감각 유지해라."),
+    "time_urgency": ("'내일부터'는 영원히 안 온다. 오늘 뭐 할 건데?", "당장 움직이겠다는 태도는 합격이다."),
+}
+NO_EVIDENCE_SUMMARY = "판단할 근거가 부족하다. 뭘 언제 어떻게 할 건지 구체적으로 말해봐."
+
+stats = {"scored": 0, "no_evidence": 0}
+
+
+def load_lexicon(path: Path = SCORE_LEXICON_PATH) -> tuple:
+    """
+    사전 파일 → (KeywordMatcher, {(항목, 키워드): 가감점})
+    형식:
+        [goal_realism]     ← 섹션 = 항목
+        +8 로또            ← 가감점 + 키워드 (^ / = 표기 가능)
+    """
+    entries, weights = [], {}
+    dim = None
+    for raw in path.read_text(encoding="utf-8").splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            dim = line[1:-1].strip()
+            if dim not in DIMENSIONS:
+                raise ValueError(f"알 수 없는 항목: {dim!r}")
+            continue
+        weight, keyword = line.split(maxsplit=1)
+        mode = MODE_ANY
+        if keyword[0] == "^":
+            mode, keyword = MODE_START, keyword[1:]
+        elif keyword[0] == "=":
+            mode, keyword = MODE_TOKEN, keyword[1:]
+        entries.append((keyword, dim, mode))
+        weights[(dim, keyword)] = int(weight)
+    return KeywordMatcher(entries), weights
+
+
+score_lexicon, _weights = load_lexicon()
+
+
+def _lexicon_hits(text: str) -> Dict[str, List[tuple]]:
+    """항목별 (키워드, 가감점). 같은 항목에서 겹치는 매치는 긴 것만 남김"""
+    by_dim: Dict[str, list] = {dim: [] for dim in DIMENSIONS}
+    for match in score_lexicon.find(text):
+        by_dim[match.label].append(match)
+
+    hits: Dict[str, List[tuple]] = {}
+    for dim, matches in by_dim.items():
+        taken: list = []
+        seen = set()
+        for match in sorted(matches, key=lambda m: m.start - m.end):
+            if match.keyword in seen or any(match.start < end and start < match.end for start, end in taken):
+                continue
+            seen.add(match.keyword)
+            taken.append((match.start, match.end))
+            hits.setdefault(dim, []).append((match.keyword, _weights[(dim, match.keyword)]))
+    return hits
+
+
+def evidence(text: str) -> Dict[str, List[tuple]]:
+    """항목별 채점 근거 [(표현, 가감점)] (사전 + 정규식)"""
+    hits = _lexicon_hits(text)
+    norm = unicodedata.normalize("NFC", text)
+    for dim, weight, pattern in _PATTERNS:
+        for found in dict.fromkeys(m.group(0) for m in pattern.finditer(norm)):
+            hits.setdefault(dim, []).append((found, weight))
+    return hits
+
+
+def _summary(breakdown: dict, hits: dict) -> str:
+    if not hits:
+        return NO_EVIDENCE_SUMMARY
+    dim = max(hits, key=lambda d: abs(breakdown[d] - BASE_SCORE))
+    high, low = SUMMARIES[dim]
+    return high if breakdown[dim] >= BASE_SCORE else low
+
+
+def heuristic_score(user_message: str) -> dict:
+    """
+    사용자 입력만으로 채점. calculator의 결과 형식 + "evidence"(항목별 근거)
+    근거가 하나도 없는 항목은 기준점 10점
+    """
+    hits = evidence(user_message)
+    breakdown = {}
+    for dim in DIMENSIONS:
+        adjust = sum(weight for _, weight in hits.get(dim, ()))
+        adjust = max(-MAX_ADJUST, min(MAX_ADJUST, adjust))
+        breakdown[dim] = max(0, min(20, BASE_SCORE + adjust))
+
+    stats["scored"] += 1
+    if not hits:
+        stats["no_evidence"] += 1
+    return {
+        "total": sum(breakdown.values()),
+        "breakdown": breakdown,
+        "summary": _summary(breakdown, hits),
+        "evidence": hits,
+    }
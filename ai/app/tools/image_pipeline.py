@@ -0,0 +1,226 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+from app.agent.metrics import record_bytes, record_cache
+from app.agent.session_store import InMemorySessionStore
+
+# 첨부 이미지 전처리: 한 번 디코딩 → 실제 포맷 확인 → 모델별 최대 크기로 축소 → 재인코딩
+# analyze_images(vision)와 generate_response(main)가 같은 결과를 나눠 씀
+# 같은 이미지(sha256)는 다시 처리하지 않고, vision 분석 결과도 이미지 해시 기준으로 캐시
+# Pillow 없으면 축소 없이 원본 그대로 (MIME만 판별)
+
+# 슬롯별 긴 변 최대 픽셀 (Claude 권장 1568, Gemini는 768 타일 단위로 과금)
+# 두 슬롯 크기가 같으면 축소/인코딩도 한 번만 함
+IMAGE_MAX_DIMS = {
+    "vision": 1568,
+    "main": 1568,
+}
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+IMAGE_POOL_WORKERS = int(os.getenv("IMAGE_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "256"))
+IMAGE_CACHE_BYTES = int(os.getenv("IMAGE_CACHE_BYTES", str(128 * 1024 * 1024)))
+IMAGE_CACHE_TTL = float(os.getenv("IMAGE_CACHE_TTL", str(6 * 60 * 60)))
+VISION_CACHE_SIZE = int(os.getenv("VISION_CACHE_SIZE", "2048"))
+
+# 매직 바이트 → MIME
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pil_missing = False
+
+# sha256 → {"mime", "width", "height", slot: data URL}
+_processed = InMemorySessionStore(max_entries=IMAGE_CACHE_SIZE, max_bytes=IMAGE_CACHE_BYTES, ttl=IMAGE_CACHE_TTL)
+# 이미지 해시 묶음 → vision 분석 결과
+vision_cache = InMemorySessionStore(max_entries=VISION_CACHE_SIZE, ttl=IMAGE_CACHE_TTL)
+
+stats = {"images": 0, "deduped": 0, "cache_hits": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def max_dim(slot: str) -> int:
+    """슬롯별 최대 크기 (LLM_<SLOT>_IMAGE_MAX_DIM으로 덮어쓰기 가능)"""
+    override = os.getenv(f"LLM_{slot.upper()}_IMAGE_MAX_DIM")
+    return int(override) if override else IMAGE_MAX_DIMS.get(slot, 1568)
+
+
+def sniff_mime(data: bytes) -> str:
+    for signature, mime in _SIGNATURES:
+        if data.startswith(signature):
+            return mime
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"  # fallback
+
+
+def decode(image: str) -> Optional[bytes]:
+    """base64 또는 data URL → 바이트. http URL은 None (그대로 전달)"""
+    if image.startswith("http"):
+        return None
+    if image.startswith("data:"):
+        image = image.split(",", 1)[-1]
+    try:
+        return base64.b64decode(image, validate=False)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def _data_url(mime: str, data: bytes) -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+
+# ── 워커 스레드에서 실행 (Pillow 디코딩/리사이즈/인코딩은 GIL을 놓음) ──
+
+def _encode(img, fmt: str, **kwargs) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **kwargs)
+    return buf.getvalue()
+
+
+def _process(raw: bytes, dims: dict) -> dict:
+    """
+    한 번 디코딩해서 슬롯별 크기로 재인코딩. 원본보다 커지면 원본 사용
+    반환: {"mime", "width", "height", slot: data URL, "nbytes": {slot: int}}
+    """
+    global _pil_missing
+    mime = sniff_mime(raw)
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        if not _pil_missing:
+            _pil_missing = True
+            print("[Image] Pillow 미설치 → 원본 그대로 전달")
+        url = _data_url(mime, raw)
+        return {"mime": mime, "width": 0, "height": 0, **{slot: url for slot in dims},
+                "nbytes": {slot: len(raw) for slot in dims}}
+
+    with Image.open(io.BytesIO(raw)) as img:
+        mime = Image.MIME.get(img.format, mime)  # 확장자/헤더가 아니라 실제 디코딩된 포맷
+        img.seek(0)  # 움직이는 GIF/WebP는 첫 프레임만
+        if img.format == "JPEG":
+            # JPEG는 디코딩 단계에서 1/2, 1/4 ... 로 바로 줄여서 읽음 (폰 사진에서 가장 큰 절감)
+            target = max(dims.values())
+            img.draft("RGB", (target, target))
+        img = ImageOps.exif_transpose(img)  # 폰 사진 회전 정보 반영
+        width, height = img.size
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+
+        result = {"mime": mime, "width": width, "height": height, "nbytes": {}}
+        encoded: dict = {}  # 같은 목표 크기는 한 번만 인코딩
+        for slot, limit in dims.items():
+            scale = min(1.0, limit / max(width, height))
+            if scale >= 1.0 and mime in ("image/jpeg", "image/png", "image/webp"):
+                # 이미 충분히 작으면 재인코딩으로 화질만 잃지 않도록 원본
+                result[slot], result["nbytes"][slot] = _data_url(mime, raw), len(raw)
+                continue
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            if size not in encoded:
+                resized = img.resize(size, Image.LANCZOS, reducing_gap=2.0) if size != img.size else img
+                candidates = []
+                if has_alpha:
+                    candidates.append(("image/png", _encode(resized.convert("RGBA"), "PNG", compress_level=6)))
+                else:
+                    rgb = resized.convert("RGB")
+                    candidates.append(("image/jpeg", _encode(rgb, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)))
+                    if mime == "image/png":
+                        # 단색 영역뿐인 UI 스크린샷은 PNG가 더 작음 → 빠른 압축으로 비교해서 작은 쪽
+                        candidates.append(("image/png", _encode(rgb, "PNG", compress_level=1)))
+                if scale >= 1.0:
+                    candidates.append((mime, raw))
+                encoded[size] = min(candidates, key=lambda c: len(c[1]))
+            out_mime, data = encoded[size]
+            result[slot], result["nbytes"][slot] = _data_url(out_mime, data), len(data)
+        return result
+
+
+def _decode_hash(image: str) -> Optional[tuple]:
+    """decode + sha256 → (바이트, digest) 또는 None. 수 MB짜리라 워커 풀에서"""
+    raw = decode(image)
+    return None if raw is None else (raw, hashlib.sha256(raw).hexdigest())
+
+
+# ── 이벤트 루프 쪽 ──
+
+def get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=IMAGE_POOL_WORKERS, thread_name_prefix="image")
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _process_one(raw: bytes, digest: str, dims: dict) -> dict:
+    cached = await _processed.get("image", digest)
+    hit = cached is not None and all(slot in cached for slot in dims)
+    record_cache("image", hit)
+    if hit:
+        stats["cache_hits"] += 1
+        return {"digest": digest, **{slot: cached[slot] for slot in dims}}
+
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(get_pool(), _process, raw, dims)
+    except Exception as e:
+        print(f"[Image] 전처리 실패 → 원본 사용: {e}")
+        url = _data_url(sniff_mime(raw), raw)
+        return {"digest": digest, **{slot: url for slot in dims}}
+
+    stats["images"] += 1
+    stats["bytes_in"] += len(raw)
+    stats["bytes_out"] += max(result["nbytes"].values())
+    record_bytes("image_in", len(raw))
+    record_bytes("image_out", max(result["nbytes"].values()))
+    await _processed.set("image", digest, {**(cached or {}), **{k: v for k, v in result.items() if k != "nbytes"}})
+    print(f"[Image] {digest[:12]} {result['mime']} {result['width']}x{result['height']} "
+          f"{len(raw) // 1024}KB → " + ", ".join(f"{s}:{n // 1024}KB" for s, n in result["nbytes"].items()))
+    return {"digest": digest, **{slot: result[slot] for slot in dims}}
+
+
+async def prepare_images(images: Sequence[str], slots: Sequence[str] = ("vision", "main")) -> List[dict]:
+    """
+    이미지 목록 → 중복 제거된 [{"digest", slot: data URL, ...}] (입력 순서 유지)
+    같은 이미지는 해시로 먼저 걸러내고, 나머지는 워커 풀에서 병렬 처리 (base64 디코딩 / 해시도 워커 풀에서)
+    """
+    dims = {slot: max_dim(slot) for slot in slots}
+    loop = asyncio.get_running_loop()
+    decoded = await asyncio.gather(*(loop.run_in_executor(get_pool(), _decode_hash, image) for image in images))
+    jobs, order = {}, []
+    for image, item in zip(images, decoded):
+        if item is None:
+            # http URL / 깨진 base64 → 가공 없이 그대로
+            url = image if image.startswith(("http", "data:")) else f"data:image/jpeg;base64,{image}"
+            order.append({"digest": None, **{slot: url for slot in dims}})
+            continue
+        raw, digest = item
+        if digest in jobs:
+            stats["deduped"] += 1
+            continue
+        jobs[digest] = raw
+        order.append(digest)
+
+    results = await asyncio.gather(*(_process_one(raw, digest, dims) for digest, raw in jobs.items()))
+    by_digest = {item["digest"]: item for item in results}
+    return [by_digest[item] if isinstance(item, str) else item for item in order]
+
+
+def vision_key(prepared: List[dict]) -> Optional[str]:
+    """vision 분석 캐시 키. URL 이미지가 섞여 있으면 None (캐시 안 함)"""
+    digests = [item["digest"] for item in prepared]
+    if not digests or None in digests:
+        return None
+    return hashlib.sha256("|".join(digests).encode()).hexdigest()
@@ -0,0 +1,167 @@
+import os
+import unicodedata
+from collections import deque
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional
+
+# 위기 키워드 / 확인 답변(긍정·부정) 판별용 다중 패턴 매처 (Aho–Corasick)
+# 사전은 import 시 한 번만 빌드. 경로는 CRISIS_LEXICON_PATH로 교체 가능
+
+CRISIS_LEXICON_PATH = Path(
+    os.getenv("CRISIS_LEXICON_PATH", Path(__file__).resolve().parents[1] / "data" / "crisis_lexicon.txt")
+)
+
+# 매칭 모드
+#   any   : 어디서든 (기본)
+#   start : 토큰 시작에서만   (사전 표기: ^키워드)
+#   token : 토큰 전체가 일치  (사전 표기: =키워드)  → "ㅇ", "ㄴ" 같은 한 글자 답변용
+MODE_ANY, MODE_START, MODE_TOKEN = "any", "start", "token"
+
+# 웃음/울음 자모는 단어 구분자로 취급 ("응ㅋㅋ" → "응")
+_FILLER_JAMO = set("ㅋㅎㅠㅜㅡ")
+
+
+class Match(NamedTuple):
+    keyword: str
+    label: str
+    start: int
+    end: int
+
+
+def normalize(text: str) -> str:
+    """
+    음절을 자모로 분해(NFKD) + 호환 자모(ㅇ, ㄴ)를 초성 자모로 통일 + 소문자.
+    "손목을 그" 가 "손목을 긋고" 에, "뛰어내리" 가 "뛰어내릴" 에 걸리도록 하기 위함
+    """
+    text = "".join(" " if ch in _FILLER_JAMO else ch for ch in text)
+    return unicodedata.normalize("NFKD", text).lower()
+
+
+def _is_separator(ch: str) -> bool:
+    return not ch.isalnum()
+
+
+class KeywordMatcher:
+    """
+    키워드 수와 무관하게 입력 길이에 선형인 Aho–Corasick 오토마톤.
+    entries: (keyword, label, mode)
+    """
+
+    def __init__(self, entries: Iterable[tuple]):
+        self._goto: List[dict] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[list] = [[]]
+        self.size = 0
+        for keyword, label, mode in entries:
+            self._add(keyword, label, mode)
+        self._build()
+
+    def _add(self, keyword: str, label: str, mode: str):
+        pattern = normalize(keyword)
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((keyword, label, mode, len(pattern)))
+        self.size += 1
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> List[Match]:
+        norm = normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        state = 0
+        for i, ch in enumerate(norm):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            for keyword, label, mode, length in out[state]:
+                start = end - length
+                if mode != MODE_ANY:
+                    if start > 0 and not _is_separator(norm[start - 1]):
+                        continue
+                    if mode == MODE_TOKEN and end < len(norm) and not _is_separator(norm[end]):
+                        continue
+                matches.append(Match(keyword, label, start, end))
+        return matches
+
+    def labels(self, text: str) -> set:
+        return {m.label for m in self.find(text)}
+
+
+def load_lexicon(path: Path = CRISIS_LEXICON_PATH) -> KeywordMatcher:
+    """
+    사전 파일 형식:
+        [label]        ← 섹션 = 라벨
+        키워드          ← 어디서든
+        ^키워드         ← 토큰 시작
+        =키워드         ← 토큰 전체
+        # 주석
+    """
+    entries = []
+    label = None
+    for raw in path.read_text(encoding="utf-8").splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            label = line[1:-1].strip()
+            continue
+        mode = MODE_ANY
+        if line[0] == "^":
+            mode, line = MODE_START, line[1:]
+        elif line[0] == "=":
+            mode, line = MODE_TOKEN, line[1:]
+        entries.append((line, label, mode))
+    return KeywordMatcher(entries)
+
+
+crisis_lexicon = load_lexicon()
+
+
+def classify_crisis_keywords(text: str) -> Optional[str]:
+    """
+    사전만으로 판정 가능한 경우:
+      - [crisis] 구체적 방법/유서 표현 → "crisis"
+      - [risk] 위험 관련 단어가 하나도 없음 → "safe" (사전에 없는 표현일 수 있으므로 호출 측에서 확정 근거로 쓰지 않음)
+    그 외(위험 단어가 있지만 관용 표현일 수 있음)는 None → LLM 판별
+    """
+    labels = crisis_lexicon.labels(text)
+    if "crisis" in labels:
+        return "crisis"
+    if "risk" not in labels:
+        return "safe"
+    return None
+
+
+def parse_followup(text: str) -> Optional[str]:
+    """'진심이야?' 확인 질문에 대한 답: "affirm" / "deny" / None(모호 → LLM)"""
+    labels = crisis_lexicon.labels(text)
+    affirm, deny = "affirm" in labels, "deny" in labels
+    if affirm and not deny:
+        return "affirm"
+    if deny and not affirm:
+        return "deny"
+    return None
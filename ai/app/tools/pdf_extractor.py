@@ -0,0 +1,216 @@
+import asyncio
+import base64
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+# 문서당 예산
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "10"))  # 텍스트 추출 최대 페이지
+PDF_MAX_RENDER_PAGES = int(os.getenv("PDF_MAX_RENDER_PAGES", "5"))  # 스캔본 이미지 변환 최대 페이지
+PDF_RENDER_DPI = int(os.getenv("PDF_RENDER_DPI", "150"))
+PDF_TIME_BUDGET = float(os.getenv("PDF_TIME_BUDGET", "20"))  # 초, 넘으면 완료된 페이지만 사용
+
+# 프로세스 풀 / 캐시 크기
+PDF_POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "2"))
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", "128"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_doc_cache: "OrderedDict[str, dict]" = OrderedDict()  # sha256 → {"text", "images", "page_count"}
+
+
+# ── 워커 프로세스에서 실행되는 함수들 (pickle 가능해야 하므로 모듈 최상위) ──
+# PDF 바이트 대신 임시 파일 경로를 넘김 (페이지 묶음마다 문서 전체를 pickle로 복사하지 않도록)
+
+def _page_count(path: str) -> int:
+    import fitz  # PyMuPDF
+
+    with fitz.open(path, filetype="pdf") as doc:
+        return len(doc)
+
+
+def _extract_pages(path: str, page_numbers: List[int]) -> List[tuple]:
+    import fitz  # PyMuPDF
+
+    with fitz.open(path, filetype="pdf") as doc:
+        return [(i, doc[i].get_text() or "") for i in page_numbers]
+
+
+def _render_pages(path: str, page_numbers: List[int], dpi: int) -> List[tuple]:
+    import fitz  # PyMuPDF
+
+    with fitz.open(path, filetype="pdf") as doc:
+        return [
+            (i, base64.b64encode(doc[i].get_pixmap(dpi=dpi).tobytes("png")).decode())
+            for i in page_numbers
+        ]
+
+
+# ── 이벤트 루프 쪽 ──
+
+def _decode(content: str) -> tuple:
+    """base64 → (PDF 바이트, sha256). 수 MB짜리라 이벤트 루프 밖(스레드)에서"""
+    pdf_bytes = base64.b64decode(content)
+    return pdf_bytes, hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def _write_temp(pdf_bytes: bytes) -> str:
+    fd, path = tempfile.mkstemp(prefix="grogi_pdf_", suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(pdf_bytes)
+    return path
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    PDF 전용 프로세스 풀 (lazy 생성).
+    uvicorn 스레드와 섞여도 안전하도록 spawn 컨텍스트 사용
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PDF_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _chunks(pages: List[int]) -> List[List[int]]:
+    size = max(1, PDF_PAGES_PER_TASK)
+    return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+
+async def _run_pages(func, path: str, pages: List[int], deadline: float, *args) -> dict:
+    """페이지 묶음을 풀에 나눠 던지고, 시간 예산 안에 끝난 것만 모은다."""
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    futures = [loop.run_in_executor(pool, func, path, chunk, *args) for chunk in _chunks(pages)]
+    if not futures:
+        return {}
+
+    done, pending = await asyncio.wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    for fut in pending:
+        fut.cancel()
+
+    results = {}
+    for fut in done:
+        error = fut.exception()
+        if error is None:
+            results.update(dict(fut.result()))
+        elif isinstance(error, BrokenProcessPool):
+            raise error
+    return results
+
+
+def _cache_get(digest: str) -> Optional[dict]:
+    cached = _doc_cache.get(digest)
+    if cached is not None:
+        _doc_cache.move_to_end(digest)
+    return cached
+
+
+def _cache_put(digest: str, value: dict):
+    _doc_cache[digest] = value
+    _doc_cache.move_to_end(digest)
+    while len(_doc_cache) > PDF_CACHE_SIZE:
+        _doc_cache.popitem(last=False)
+
+
+async def extract_document(pdf_bytes: bytes, digest: str, filename: str = "문서") -> dict:
+    """
+    PDF 한 개 추출. SHA-256(digest) 기준으로 캐시되므로 같은 파일은 세션이 달라도 재처리하지 않음
+    반환: {"text": str, "images": [base64 png], "page_count": int, "partial": bool}
+    """
+    # spawn 워커도 이 모듈을 import하므로 계측 모듈(langchain 의존)은 이벤트 루프 쪽에서만 import
+    from app.agent.metrics import record_bytes, record_cache
+
+    cached = _cache_get(digest)
+    record_cache("pdf", cached is not None)
+    if cached is not None:
+        print(f"[PDF 추출] {filename}: 캐시 히트 ({digest[:12]})")
+        return cached
+
+    record_bytes("pdf", len(pdf_bytes))
+    deadline = time.monotonic() + PDF_TIME_BUDGET
+    # 워커들은 같은 임시 파일을 열어서 읽음 (추출이 끝나면 삭제)
+    path = await asyncio.to_thread(_write_temp, pdf_bytes)
+    try:
+        result = await _extract_file(path, filename, deadline)
+    finally:
+        os.unlink(path)
+    # 예산 초과로 잘린 결과는 캐시하지 않음 (다음 업로드 때 다시 시도)
+    if not result["partial"]:
+        _cache_put(digest, result)
+    return result
+
+
+async def _extract_file(path: str, filename: str, deadline: float) -> dict:
+    loop = asyncio.get_running_loop()
+    page_count = await asyncio.wait_for(
+        loop.run_in_executor(get_pool(), _page_count, path), timeout=PDF_TIME_BUDGET
+    )
+    pages = list(range(min(page_count, PDF_MAX_PAGES)))
+
+    # 텍스트 추출 시도 (페이지 단위 병렬)
+    texts = await _run_pages(_extract_pages, path, pages, deadline)
+    partial = len(texts) < len(pages)
+    text = "\n".join(f"[{i+1}페이지]\n{texts[i]}" for i in sorted(texts) if texts[i].strip())
+    print(f"[PDF 추출] {filename}: {page_count}페이지, 텍스트 {len(text)}자")
+
+    images: List[str] = []
+    if not text.strip():
+        # 텍스트 없으면 페이지를 이미지로 변환 (페이지 단위 병렬)
+        print(f"[PDF 추출] 이미지 기반 PDF → 비전 모델로 전환")
+        render_pages = pages[:PDF_MAX_RENDER_PAGES]
+        rendered = await _run_pages(_render_pages, path, render_pages, deadline, PDF_RENDER_DPI)
+        partial = partial or len(rendered) < len(render_pages)
+        images = [rendered[i] for i in sorted(rendered)]
+
+    if partial:
+        print(f"[PDF 추출] {filename}: 시간 예산({PDF_TIME_BUDGET}s) 초과, 완료된 페이지만 사용")
+
+    return {"text": text, "images": images, "page_count": page_count, "partial": partial}
+
+
+async def extract_pdfs(pdfs: List[dict]) -> dict:
+    """
+    여러 PDF를 동시에 추출해서 graph의 pdf_text / pdf_images 형태로 합친다.
+    """
+
+    async def _one(pdf: dict):
+        filename = pdf.get("filename", "문서")
+        try:
+            pdf_bytes, digest = await asyncio.to_thread(_decode, pdf.get("content", ""))
+            doc = await extract_document(pdf_bytes, digest, filename)
+            if doc["text"].strip():
+                return f"[문서: {filename}]\n{doc['text']}", []
+            if doc["images"]:
+                return f"[문서: {filename}] 이미지 기반 PDF - 비전으로 분석", doc["images"]
+            reason = "처리 시간 초과" if doc["partial"] else "내용 없음"
+            return f"[문서: {filename}] 읽기 실패: {reason}", []
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # 워커가 죽으면 풀을 버리고 다음 요청에서 새로 생성
+                shutdown_pool()
+            print(f"[PDF 추출 오류] {filename}: {e}")
+            return f"[문서: {filename}] 읽기 실패: {str(e)}", []
+
+    results = await asyncio.gather(*(_one(pdf) for pdf in pdfs))
+
+    return {
+        "pdf_text": "\n\n---\n\n".join(text for text, _ in results),
+        "pdf_images": [img for _, images in results for img in images],
+    }
@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from app.agent.history import count_tokens
+
+# PDF 본문 검색: 세션 캐시의 pdf_text 전체를 매 턴 프롬프트에 넣지 않고
+# 문서를 한 번 청크로 나눠 BM25 색인(NumPy)을 만든 뒤, 이번 메시지 + 최근 user 메시지와 관련된 청크만 토큰 예산 안에서 넣음
+#   - 색인은 term별 posting(청크 번호 / 빈도)을 이어 붙인 희소 배열 → 크기는 청크 x 어휘가 아니라 (청크, term) 쌍 수에 비례
+#   - 색인(+전체 토큰 수)은 pdf_text 해시별로 프로세스 메모리에 캐시 (같은 문서의 후속 턴은 검색만)
+#   - 색인 생성은 추출 직후(extract_pdf_text 노드) 스레드에서 미리 (aget_index) → 응답 생성 때는 검색만
+#   - 문서 전체가 예산 안에 들어가면 그대로 사용 (짧은 문서는 예전과 같음)
+#   - 질문과 겹치는 단어가 없으면(예: "이거 봐줘") 페이지마다 앞부분부터 고르게
+# 토큰화: 어절 + 어절 안 음절 bigram (조사/어미가 붙어도 어간 bigram이 겹치도록)
+PDF_CONTEXT_TOKENS = int(os.getenv("PDF_CONTEXT_TOKENS", "2000"))  # 프롬프트에 넣을 문서 토큰 예산
+PDF_CHUNK_CHARS = int(os.getenv("PDF_CHUNK_CHARS", "500"))
+PDF_RETRIEVE_TOP_K = int(os.getenv("PDF_RETRIEVE_TOP_K", "6"))
+PDF_QUERY_HISTORY_TURNS = int(os.getenv("PDF_QUERY_HISTORY_TURNS", "2"))  # 검색어에 섞을 최근 user 메시지 수 (가중치 절반)
+PDF_INDEX_CACHE_SIZE = int(os.getenv("PDF_INDEX_CACHE_SIZE", "64"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_DOC_HEADER = re.compile(r"^\[문서: (.+)\]$")
+_PAGE_HEADER = re.compile(r"^\[(\d+)페이지\]$")
+_WORD = re.compile(r"[0-9a-z가-힣]+")
+
+_indexes: "OrderedDict[str, dict]" = OrderedDict()  # sha1(pdf_text) → 색인
+
+stats = {"passthrough": 0, "retrieved": 0, "index_builds": 0, "index_hits": 0, "build_ms": 0.0,
+         "tokens_in": 0, "tokens_out": 0}
+
+
+def terms(text: str) -> List[str]:
+    words = _WORD.findall(unicodedata.normalize("NFC", text).lower())
+    result = list(words)
+    for word in words:
+        result.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return result
+
+
+def split_chunks(pdf_text: str, max_chars: int = PDF_CHUNK_CHARS) -> List[dict]:
+    """
+    extract_pdfs 결과 텍스트 → 청크 [{"label", "text", "page_pos"}]
+    문서 / 페이지 경계는 넘지 않고, 줄 단위로 max_chars까지 채움 (너무 긴 줄은 글자 수로 자름)
+    """
+    chunks: List[dict] = []
+    for document in pdf_text.split("\n\n---\n\n"):
+        name, page, page_pos, lines, size = "문서", 0, 0, [], 0
+
+        def flush():
+            nonlocal lines, size, page_pos
+            text = "\n".join(lines).strip()
+            if text:
+                label = f"[문서: {name} / {page}페이지]" if page else f"[문서: {name}]"
+                chunks.append({"label": label, "text": text, "page_pos": page_pos})
+                page_pos += 1
+            lines, size = [], 0
+
+        for line in document.split("\n"):
+            header = _DOC_HEADER.match(line)
+            if header and not lines and not page:
+                name = header.group(1)
+                continue
+            page_header = _PAGE_HEADER.match(line.strip())
+            if page_header:
+                flush()
+                page, page_pos = int(page_header.group(1)), 0
+                continue
+            for start in range(0, max(len(line), 1), max_chars):
+                piece = line[start:start + max_chars]
+                if size + len(piece) > max_chars:
+                    flush()
+                lines.append(piece)
+                size += len(piece) + 1
+        flush()
+    return chunks
+
+
+def build_index(pdf_text: str) -> dict:
+    """
+    청크 + BM25 역색인. term은 hash로 정수화해서 정렬된 keys에 두고,
+    keys[j]의 posting = docs / tf[offsets[j]:offsets[j + 1]] (hash는 프로세스 안에서만 쓰므로 salt 무관)
+    """
+    chunks = split_chunks(pdf_text)
+    keys, docs, freqs = [], [], []
+    lengths = np.zeros(len(chunks), dtype=np.float32)
+    for i, chunk in enumerate(chunks):
+        counts = Counter(terms(chunk["text"]))
+        lengths[i] = sum(counts.values())
+        keys.extend(hash(term) for term in counts)
+        docs.extend([i] * len(counts))
+        freqs.extend(counts.values())
+
+    keys_a = np.array(keys, dtype=np.int64)
+    docs_a = np.array(docs, dtype=np.int32)
+    order = np.lexsort((docs_a, keys_a))
+    keys_a, docs_a = keys_a[order], docs_a[order]
+    unique, starts, df = np.unique(keys_a, return_index=True, return_counts=True)
+    average = float(lengths.mean()) if len(chunks) else 1.0
+    n = max(len(chunks), 1)
+    return {
+        "chunks": chunks,
+        "total_tokens": count_tokens(pdf_text),
+        "tokens": np.array([count_tokens(f"{c['label']}\n{c['text']}") for c in chunks], dtype=np.int64),
+        "keys": unique,
+        "offsets": np.append(starts, len(keys_a)).astype(np.int32),
+        "docs": docs_a,
+        "tf": np.array(freqs, dtype=np.float32)[order],
+        "idf": np.log(1 + (n - df + 0.5) / (df + 0.5)).astype(np.float32),
+        # BM25 분모의 청크 길이 정규화 부분 (검색 때마다 다시 계산하지 않도록)
+        "norm": BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(average, 1.0)),
+    }
+
+
+def _key(pdf_text: str) -> str:
+    return hashlib.sha1(pdf_text.encode("utf-8")).hexdigest()
+
+
+def get_index(pdf_text: str) -> dict:
+    key = _key(pdf_text)
+    index = _indexes.get(key)
+    if index is not None:
+        stats["index_hits"] += 1
+        _indexes.move_to_end(key)
+        return index
+    start = time.perf_counter()
+    index = build_index(pdf_text)
+    stats["index_builds"] += 1
+    stats["build_ms"] += (time.perf_counter() - start) * 1000
+    _indexes[key] = index
+    while len(_indexes) > PDF_INDEX_CACHE_SIZE:
+        _indexes.popitem(last=False)
+    return index
+
+
+async def aget_index(pdf_text: str) -> dict:
+    """캐시에 없으면 이벤트 루프 밖(스레드)에서 생성 (토큰 수 계산 포함)"""
+    index = _indexes.get(_key(pdf_text))
+    if index is not None:
+        return index
+    return await asyncio.to_thread(get_index, pdf_text)
+
+
+def score(index: dict, query: str, context: str = "") -> np.ndarray:
+    """청크별 BM25 점수. context(최근 대화) 단어는 가중치 절반"""
+    weights: dict = {}
+    for text, weight in ((query, 1.0), (context, 0.5)):
+        for term in terms(text):
+            key = hash(term)
+            weights[key] = max(weights.get(key, 0.0), weight)
+    scores = np.zeros(len(index["chunks"]), dtype=np.float32)
+    keys = index["keys"]
+    if not weights or not len(keys):
+        return scores
+    wanted = np.fromiter(weights.keys(), dtype=np.int64, count=len(weights))
+    pos = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+    offsets, docs, tf, norm, idf = index["offsets"], index["docs"], index["tf"], index["norm"], index["idf"]
+    for j, key in zip(pos.tolist(), weights):
+        if keys[j] != key:
+            continue
+        lo, hi = offsets[j], offsets[j + 1]
+        d, f = docs[lo:hi], tf[lo:hi]
+        scores[d] += idf[j] * weights[key] * f * (BM25_K1 + 1) / (f + norm[d])
+    return scores
+
+
+def select_context(pdf_text: str, query: str, history: Optional[List[dict]] = None,
+                   budget: int = PDF_CONTEXT_TOKENS, top_k: int = PDF_RETRIEVE_TOP_K) -> str:
+    """
+    pdf_text 중 query(+최근 user 메시지)와 관련된 청크만 budget 토큰 안에서 문서 순서대로
+    전체가 예산 안이면 pdf_text 그대로
+    """
+    index = get_index(pdf_text)
+    total = index["total_tokens"]
+    stats["tokens_in"] += total
+    if total <= budget:
+        stats["passthrough"] += 1
+        stats["tokens_out"] += total
+        return pdf_text
+
+    recent = [m["content"] for m in (history or []) if m.get("role") == "user"]
+    recent = recent[-PDF_QUERY_HISTORY_TURNS:] if PDF_QUERY_HISTORY_TURNS > 0 else []
+    scores = score(index, query, "\n".join(recent))
+    if scores.any():
+        order = [int(i) for i in np.argsort(-scores, kind="stable") if scores[i] > 0][:top_k]
+    else:
+        # 겹치는 단어 없음 → 페이지마다 첫 청크부터 고르게
+        order = sorted(range(len(index["chunks"])), key=lambda i: (index["chunks"][i]["page_pos"], i))
+
+    picked, used = [], 0
+    for i in order:
+        tokens = int(index["tokens"][i])
+        if used + tokens > budget:
+            continue
+        picked.append(i)
+        used += tokens
+    stats["retrieved"] += 1
+    stats["tokens_out"] += used
+
+    chunks = index["chunks"]
+    body = "\n...\n".join(f"{chunks[i]['label']}\n{chunks[i]['text']}" for i in sorted(picked))
+    return f"(문서 전체 {len(chunks)}개 부분 중 지금 대화와 관련된 {len(picked)}개만 발췌)\n{body}"
+
+
+async def aselect_context(pdf_text: str, query: str, history: Optional[List[dict]] = None) -> str:
+    """select_context와 같음. 색인이 아직 없으면 스레드에서 만든 뒤 검색"""
+    await aget_index(pdf_text)
+    return select_context(pdf_text, query, history)
@@ -0,0 +1,113 @@
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Optional
+
+from app.agent.session_store import InMemorySessionStore
+
+# 검색어 추출 LLM 호출 전 로컬 사전 필터
+# "힘들어", "어떻게해" 처럼 검색이 필요 없는 게 뻔한 메시지는 LLM 없이 NONE 처리
+
+VOCAB_PATH = Path(os.getenv("QUERY_FILTER_VOCAB", Path(__file__).resolve().parents[1] / "data" / "known_vocab.txt"))
+NOVELTY_THRESHOLD = float(os.getenv("QUERY_FILTER_NOVELTY", "0.5"))  # 모르는 bigram 비율
+QUERY_MEMO_SIZE = int(os.getenv("QUERY_MEMO_SIZE", "4096"))
+QUERY_MEMO_TTL = float(os.getenv("QUERY_MEMO_TTL", str(24 * 60 * 60)))
+
+# 있으면 무조건 LLM 추출로 넘기는 단서 (링크/자료/실시간 정보 요청)
+SEARCH_CUES = (
+    "http", "www.", ".com", ".kr", "링크", "논문", "출처", "자료", "검색", "찾아줘", "찾아봐",
+    "뉴스", "최신", "유행", "트렌드", "신조어", "뜻", "의미", "뭐야", "뭔데", "뭐임", "가격", "얼마야",
+    "책", "도서", "통계", "사건", "사고", "브랜드", "날씨", "주가", "환율", "순위", "후기", "리뷰",
+)
+
+# 조사 / 어미 (어간 + 어미 분리용). 긴 것부터 매칭
+ENDINGS = sorted(set("""
+은 는 이 가 을 를 에 에서 에게 한테 께 으로 로 와 과 랑 이랑 하고 도 만 까지 부터 의 처럼 보다 마다 밖에 이나 나 이든 든 이라 라 이라도 라도 야 이야 아 요 이요
+어 아 여 어요 아요 여요 었 았 였 었어 았어 였어 었어요 았어요 었다 았다 었는데 았는데 었지 았지 었고 았고 었나 았나 었네 았네 었음 았음
+다 고 지 지만 지요 죠 네 네요 냐 니 니까 으니까 는데 은데 ㄴ데 데 대 래 래요 자 면 으면 서 어서 아서 게 기 기가 기는 기도 음 ㅁ 는지 은지 을지 ㄹ지 던 던데 든지 거나 겠 겠어 겠다 겠네 겠지 겠는데 잖아 잖아요 거든 거든요 구나 군 네 나 나요 까 을까 ㄹ까 까요 을까요 세요 으세요 줘 줘요 주세요 해 해요 했어 할래 하자 하고 하는 하면 해서 해도 한테서 라고 이라고 다고 냐고 자고 래서 라서 이라서 인데 인가 인지 임 이지 일까 일지 일듯 듯 듯이 듯해 같아 같애 같은데 싶어 싶다 싶은데 봐 봐요 보자 볼까 도록 려고 으려고 러 으러 면서 으면서 는데요 은데요 던가 든가 ㅋ ㅎ
+""".split()), key=len, reverse=True)
+
+_HANGUL_TOKEN = re.compile(r"[가-힣]+")
+_LATIN_TOKEN = re.compile(r"[A-Za-z]{2,}")
+_COMMON_LATIN = {"ok", "okay", "lol", "pc", "ai", "sns", "mbti", "cv", "ppt", "pdf", "hi", "hello", "no", "yes", "omg"}
+
+_vocab: Optional[set] = None
+_bigrams: Optional[set] = None
+
+stats = {"skipped": 0, "escalated": 0}
+
+# 메시지 → 추출된 검색어 메모 (같은 입력이면 LLM 재호출 안 함)
+query_memo = InMemorySessionStore(max_entries=QUERY_MEMO_SIZE, ttl=QUERY_MEMO_TTL)
+
+
+def load_vocab():
+    global _vocab, _bigrams
+    words = set()
+    for line in VOCAB_PATH.read_text(encoding="utf-8").splitlines():
+        if line.startswith("#"):
+            continue
+        words.update(unicodedata.normalize("NFC", w) for w in line.split())
+    # 어간 + 어미 조합에서 나오는 bigram까지 "아는 글자 조합"으로 봄
+    bigrams = set()
+    for word in words:
+        for form in (word, *(word + e for e in ENDINGS)):
+            bigrams.update(form[i:i + 2] for i in range(len(form) - 1))
+    _vocab, _bigrams = words, bigrams
+
+
+def _is_known(token: str) -> bool:
+    if token in _vocab:
+        return True
+    # 어간 + 조사/어미 (어미 두 겹까지: 했 + 었 + 는데 같은 경우는 bigram 검사로)
+    for ending in ENDINGS:
+        if token.endswith(ending):
+            stem = token[: -len(ending)]
+            if stem in _vocab:
+                return True
+            for ending2 in ENDINGS:
+                if stem.endswith(ending2) and stem[: -len(ending2)] in _vocab:
+                    return True
+    return False
+
+
+def novelty(token: str) -> float:
+    """아는 어휘에서 한 번도 안 나온 글자 bigram 비율 (0=익숙, 1=완전 낯섦)"""
+    if _vocab is None:
+        load_vocab()
+    pairs = [token[i:i + 2] for i in range(len(token) - 1)]
+    if not pairs:
+        return 0.0
+    return sum(1 for p in pairs if p not in _bigrams) / len(pairs)
+
+
+def novel_terms(message: str) -> list[str]:
+    """사전에 없고 글자 조합도 낯선 단어들 (유행어/브랜드 후보)"""
+    if _vocab is None:
+        load_vocab()
+    message = unicodedata.normalize("NFC", message)
+    terms = []
+    for token in _HANGUL_TOKEN.findall(message):
+        if len(token) >= 2 and not _is_known(token) and novelty(token) >= NOVELTY_THRESHOLD:
+            terms.append(token)
+    for token in _LATIN_TOKEN.findall(message):
+        if token.lower() not in _COMMON_LATIN:
+            terms.append(token)
+    return terms
+
+
+def prefilter_search_query(message: str) -> Optional[str]:
+    """
+    검색이 필요 없는 게 확실하면 "NONE", 판단이 필요하면 None (→ LLM 추출)
+    오판 비용이 비대칭이라(검색 누락 > LLM 1회) 애매하면 무조건 LLM으로 넘김
+    """
+    lowered = message.lower()
+    if any(cue in lowered for cue in SEARCH_CUES) or novel_terms(message):
+        stats["escalated"] += 1
+        return None
+    stats["skipped"] += 1
+    return "NONE"
+
+
+def memo_key(message: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", message).split()).lower()
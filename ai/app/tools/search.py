@@ -1,13 +1,123 @@
-from langchain_community.tools import DuckDuckGoSearchResults
-from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+import asyncio
+import os
+import unicodedata
+
+from app.agent.metrics import record_cache
+from app.agent.session_store import InMemorySessionStore, SqliteSessionStore
+
+# 검색 캐시 설정 (TTL은 DuckDuckGo time="d" 신선도 창과 동일하게 하루)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 60 * 60)))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "2048"))
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "/tmp/grogi_search_cache.db")  # 빈 값이면 메모리만
+SEARCH_CACHE_DISK_SIZE = int(os.getenv("SEARCH_CACHE_DISK_SIZE", "100000"))
+
+# execute_tools가 단어 하나짜리 쿼리에 붙이는 접미사
+_QUERY_SUFFIXES = (" 뜻 의미",)
+
 
 def get_search_tool():
     """
     AG-10: DuckDuckGo 무료 검색 도구 (링크 포함)
     """
+    # langchain_community는 import가 무거워서 도구를 처음 만들 때 로드
+    from langchain_community.tools import DuckDuckGoSearchResults
+    from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+
     wrapper = DuckDuckGoSearchAPIWrapper(region="kr-kr", time="d", max_results=5)
     return DuckDuckGoSearchResults(api_wrapper=wrapper)
 
+
+def normalize_query(query: str) -> str:
+    """
+    캐시 키용 쿼리 정규화: 유니코드(NFC), 공백, 따옴표, " 뜻 의미" 접미사, 대소문자
+    예) ' 두쫀쿠  뜻 의미' / '"두쫀쿠"' / '두쫀쿠' → '두쫀쿠'
+    """
+    query = unicodedata.normalize("NFC", query)
+    query = " ".join(query.split())
+    for suffix in _QUERY_SUFFIXES:
+        if query.endswith(suffix):
+            query = query[: -len(suffix)]
+    return query.strip(" \"'“”‘’").lower()
+
+
+def _consume_exception(task: asyncio.Task):
+    # 기다리는 쪽이 모두 취소된 뒤 실패해도 "exception was never retrieved" 경고가 나지 않도록
+    if not task.cancelled():
+        task.exception()
+
+
+class CachedSearchTool:
+    """
+    검색 도구 캐시 래퍼. `ainvoke({"query": ...})` 인터페이스는 그대로 유지
+    - 정규화된 쿼리 기준 메모리 LRU + 디스크(sqlite) 2단 캐시, TTL 하루
+    - 같은 쿼리가 동시에 들어오면 실제 검색은 한 번만 (in-flight 합치기, 호출한 쪽이 취소돼도 검색은 끝까지)
+    - 예외는 캐시하지 않음
+    """
+
+    NAMESPACE = "search"
+
+    def __init__(self, tool, ttl: float = SEARCH_CACHE_TTL, path: str = SEARCH_CACHE_PATH):
+        self.tool = tool
+        self.ttl = ttl
+        self.memory = InMemorySessionStore(max_entries=SEARCH_CACHE_SIZE, ttl=ttl)
+        self.disk = SqliteSessionStore(path=path, max_entries=SEARCH_CACHE_DISK_SIZE, ttl=ttl) if path else None
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def _lookup(self, key: str):
+        cached = await self.memory.get(self.NAMESPACE, key)
+        if cached is None and self.disk is not None:
+            cached = await self.disk.get(self.NAMESPACE, key)
+            if cached is not None:
+                await self.memory.set(self.NAMESPACE, key, cached)
+        return cached
+
+    async def _store(self, key: str, value: str):
+        await self.memory.set(self.NAMESPACE, key, value)
+        if self.disk is not None:
+            await self.disk.set(self.NAMESPACE, key, value)
+
+    async def ainvoke(self, tool_input: dict, config=None, **kwargs) -> str:
+        query = tool_input["query"]
+        key = normalize_query(query)
+
+        cached = await self._lookup(key)
+        record_cache("search", cached is not None)
+        if cached is not None:
+            print(f"[Search] 캐시 히트: {key}")
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            # 실제 검색 + 저장은 캐시가 소유한 별도 task에서 (먼저 요청한 쪽이 취소돼도 나머지는 결과를 받음)
+            task = asyncio.create_task(self._fetch(key, query))
+            task.add_done_callback(_consume_exception)
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, query: str) -> str:
+        try:
+            result = str(await self.tool.ainvoke({"query": query}))
+            await self._store(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def invoke(self, tool_input: dict, config=None, **kwargs) -> str:
+        """동기 호출은 캐시 없이 원래 도구로 (debug 스크립트용)"""
+        return self.tool.invoke(tool_input, config, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk is not None else None,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
 def get_statistics_search(category: str, keyword: str):
     """
     AG-11: 통계 정보 특화 검색
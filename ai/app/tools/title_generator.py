@@ -0,0 +1,259 @@
+import asyncio
+import os
+import re
+import time
+import unicodedata
+from typing import List, Optional
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.agent.registry import get_llm
+from app.agent.session_store import InMemorySessionStore
+
+# 대화방 제목 (/agent/title)
+#   - 정규화한 첫 메시지 → 제목 LRU ("도와줘", "취업 고민" 같은 흔한 첫 메시지는 LLM 안 부름)
+#   - 몇 ms 안에 들어온 요청은 모아서 LLM 한 번으로 ("[1] 메시지" → "[1] 제목")
+#   - TITLE_TIMEOUT 안에 답이 없으면 로컬 키워드 제목으로 먼저 응답 (LLM 결과는 캐시에만 채움)
+
+TITLE_MAX_CHARS = int(os.getenv("TITLE_MAX_CHARS", "15"))
+TITLE_CACHE_SIZE = int(os.getenv("TITLE_CACHE_SIZE", "4096"))
+TITLE_CACHE_TTL = float(os.getenv("TITLE_CACHE_TTL", str(7 * 24 * 60 * 60)))
+TITLE_BATCH_WINDOW = float(os.getenv("TITLE_BATCH_WINDOW", "0.01"))  # 초, 첫 요청 후 이만큼 모아서 보냄
+TITLE_BATCH_MAX = int(os.getenv("TITLE_BATCH_MAX", "16"))
+TITLE_TIMEOUT = float(os.getenv("TITLE_TIMEOUT", "3"))  # 초, 넘으면 로컬 제목
+TITLE_INPUT_CHARS = int(os.getenv("TITLE_INPUT_CHARS", "500"))  # 제목 짓는 데는 앞부분이면 충분
+
+TITLE_RULES = f"""- 결과는 {TITLE_MAX_CHARS}자 이내로 짧고 강렬하게.
+- 이모지는 절대 쓰지마. 문장으로만 작성해
+- 조사나 불필요한 단어는 빼고 핵심만. (예: "에너지 드링크 과유불급", "카페인 중독 경고")"""
+
+TITLE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "사용자의 첫 메시지를 보고 대화방의 제목을 창의적으로 지어줘.\n" + TITLE_RULES + "\n- 제목만 딱 답해."),
+    ("user", "{input}"),
+])
+
+TITLE_BATCH_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "아래 제목 목록의 각 메시지는 서로 다른 사용자의 첫 메시지야. 메시지마다 대화방 제목을 창의적으로 지어줘.\n"
+               + TITLE_RULES
+               + "\n- 메시지끼리는 관계없어. 각자 따로 지어."
+               + "\n- 한 줄에 하나씩 \"[번호] 제목\" 형식으로만 답해."),
+    ("user", "{items}"),
+])
+
+# 로컬 제목: 조사 / "하다" 활용 어미를 떼고 남은 내용어
+_PARTICLES = sorted(set("""
+은 는 이 가 을 를 에 에서 에게 한테 께 으로 로 와 과 랑 이랑 하고 도 만 까지 부터 의 처럼 보다 마다 밖에 이나 나 이든 든 이라도 라도 이야 야 이랑은 이라서 라서 인데 인지 이지 이란 란 에는 에서는 으로는 로는 한테는 도요 요
+""".split()), key=len, reverse=True)
+_HA_ENDINGS = sorted(set("""
+하 해 했 할 한 함 합 하고 하는 하면 해서 해도 하자 할까 해야 하기 하려고 한다 했다 하는데 합니다 했어 할래 했는데 하지 해요 했어요 할지 하냐 하니 하네 하게 하면서 해봐 해볼까 해줘 했지 하겠 하겠다
+""".split()), key=len, reverse=True)
+_STOPWORDS = set("""
+나 너 저 우리 저희 내 네 제 걔 쟤 얘 그 이 저 이거 그거 저거 여기 거기 저기 뭐 무엇 뭘 뭔 누구 언제 어디 왜 어떻게 어떡 어떤 얼마나 몇 아무 자기 본인
+진짜 정말 너무 완전 되게 엄청 많이 조금 좀 약간 그냥 막 계속 자꾸 다시 또 아직 벌써 이미 항상 맨날 요즘 지금 당장 나중 이제 곧 결국 일단 그래서 근데 그런데 그리고 하지만 그래도 열심히 제대로 빨리 안 못 잘 다 더 덜 꼭 별로
+아 어 오 와 헐 흠 음 응 네 예 아니 글쎄 제발 에휴 야 어휴 진심 레알 대박 미친 아이고 ㅋㅋ ㅎㅎ
+생각 고민 얘기 이야기 질문 도움 도와줘 도와주세요 부탁 상담 조언 건데 거 것 수 때 중 좀더 같아 싶어 있어 없어 있는데 없는데 어때 어떡해 어떡하지 뭐지 뭘까
+""".split())
+# 이걸로 끝나면 용언 활용형(갖자고, 마셔서, 마셔도 → 마셔)으로 보고 제외. 조사를 뗀 어간에도 똑같이 적용
+# 명사도 흔히 끝나는 음절(에너지, 남자, 미래, 라면, 광고)은 한 글자로 넣지 않고 두 글자 어미로만
+_CONJUGATED = "셔워와봐져쳐려켜혀겨펴줘놔"  # 어간 + 아/어가 줄어든 꼴 (해는 올해 때문에 제외, 하다는 _HA_ENDINGS)
+_VERB_FINALS = (
+    tuple("요네냐까" + _CONJUGATED)
+    + tuple(c + "서" for c in _CONJUGATED + "해어아")
+    + tuple("자고 다고 라고 냐고 려고 는데 은데 던데 는지 을지 면서 으면 거든 잖아 는다 니까".split())
+)
+_JONG_SS = 20  # 받침 ㅆ (지쳤어, 먹었지, 사줬다고: 명사에는 거의 없음)
+_JONG_NOUN_OK = (0, 4, 21)  # 받침 없음 / ㄴ / ㅇ 뒤의 어·아·고·지는 명사일 수 있음 (영어, 광고, 편지, 돼지)
+_AUXILIARIES = ("싶", "있", "말")  # "빼고 싶어", "먹고 있어", "가지 말까": 앞 어절이 -고/-지 연결형
+_HANGUL_TOKEN = re.compile(r"[가-힣]+|[A-Za-z][A-Za-z0-9]+")
+_QUESTION_CUES = ("?", "어떻게", "어떡", "할까", "해야", "될까", "맞아", "괜찮", "뭐가", "고민")
+_NORMALIZE_DROP = re.compile(r"[^\w\s]|[ㄱ-ㅎㅏ-ㅣ_]")
+DEFAULT_TITLE = "새로운 고민"
+
+stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "llm_calls": 0, "llm_items": 0, "fallback": 0, "timeout": 0}
+
+title_cache = InMemorySessionStore(max_entries=TITLE_CACHE_SIZE, ttl=TITLE_CACHE_TTL)
+
+_chains: dict = {}  # kind → chain. 모델이 바뀌면(registry.override) 비우고 새로 만듦
+_chains_llm: Optional[int] = None  # _chains를 만든 모델의 id
+_pending: List[tuple] = []  # (key, message, future) 다음 일괄 호출에 실릴 요청
+_inflight: dict = {}  # key → future (같은 메시지가 동시에 들어오면 한 번만 생성)
+_flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+def normalize_message(message: str) -> str:
+    """캐시 키: NFC + 소문자 + 문장부호/이모지/자모(ㅋㅋ, ㅠㅠ) 제거 + 공백 정리"""
+    text = unicodedata.normalize("NFC", message).lower()
+    return " ".join(_NORMALIZE_DROP.sub(" ", text).split())
+
+
+def _strip_suffix(token: str, suffixes: list, min_stem: int = 2) -> Optional[str]:
+    for suffix in suffixes:
+        if token.endswith(suffix) and len(token) - len(suffix) >= min_stem:
+            return token[: -len(suffix)]
+    return None
+
+
+def _content_word(token: str) -> Optional[str]:
+    """조사/하다 활용을 뗀 내용어. 다른 용언 활용형(지쳤어, 갖자고, 마셔도)은 버림"""
+    if token.isascii():
+        return token if len(token) >= 2 else None
+    if token in _STOPWORDS or token in _HA_ENDINGS or len(token) < 2:
+        return None
+    stem = _strip_suffix(token, _HA_ENDINGS)  # 퇴사하고 → 퇴사
+    if stem is None:
+        stem = _strip_suffix(token, _PARTICLES, min_stem=1) or token  # 여자친구가 → 여자친구, 잠이 → 잠
+    if stem in _STOPWORDS or stem in _HA_ENDINGS:
+        return None
+    if _looks_conjugated(stem):
+        return None
+    return stem
+
+
+def _jong(syllable: str) -> int:
+    code = ord(syllable) - 0xAC00
+    return code % 28 if 0 <= code < 11172 else 0
+
+
+def _looks_conjugated(word: str) -> bool:
+    """용언 활용형으로 보이는지 (지쳤어, 갖자고, 마셔, 먹어). 에너지, 영어 같은 명사는 False"""
+    if word.endswith(_VERB_FINALS) or any(_jong(c) == _JONG_SS for c in word):
+        return True
+    # 싫어 / 좋아 / 먹고 / 갈지: 받침 있는 어간 + 어·아·고·지
+    return len(word) >= 2 and word[-1] in "어아고지" and _jong(word[-2]) not in _JONG_NOUN_OK
+
+
+def local_title(message: str) -> str:
+    """
+    LLM 없이 키워드로 짓는 제목 (모델이 느리거나 실패했을 때)
+    "퇴사하고 유튜버 할래" → "퇴사 유튜버", "취업 고민 있는데 어떻게 해야 돼?" → "취업 고민"
+    """
+    words: List[str] = []
+    tokens = _HANGUL_TOKEN.findall(unicodedata.normalize("NFC", message))
+    for token, after in zip(tokens, tokens[1:] + [""]):
+        if token.endswith(("고", "지")) and after.startswith(_AUXILIARIES):
+            continue
+        word = _content_word(token)
+        if word and word not in words:
+            words.append(word)
+    title = ""
+    for word in words[:3]:
+        candidate = f"{title} {word}".strip()
+        if len(candidate) > TITLE_MAX_CHARS:
+            break
+        title = candidate
+    if not title:
+        return DEFAULT_TITLE
+    if " " not in title and any(cue in message for cue in _QUESTION_CUES) and len(title) + 3 <= TITLE_MAX_CHARS:
+        title += " 고민"
+    return title
+
+
+def _clean_title(title: str) -> str:
+    title = title.strip().strip("\"'“”‘’").strip()
+    return title[:TITLE_MAX_CHARS] if len(title) > TITLE_MAX_CHARS else title
+
+
+def _chain(kind: str):
+    global _chains_llm
+    llm = get_llm("mini")
+    if id(llm) != _chains_llm:
+        _chains.clear()
+        _chains_llm = id(llm)
+    chain = _chains.get(kind)
+    if chain is None:
+        prompt = TITLE_BATCH_PROMPT if kind == "batch" else TITLE_PROMPT
+        chain = _chains[kind] = prompt | llm | StrOutputParser()
+    return chain
+
+
+async def _generate(messages: List[str]) -> List[Optional[str]]:
+    """메시지 여러 개 → 같은 순서의 제목 (빠진 항목은 None)"""
+    stats["llm_calls"] += 1
+    stats["llm_items"] += len(messages)
+    if len(messages) == 1:
+        return [_clean_title(await _chain("single").ainvoke({"input": messages[0][:TITLE_INPUT_CHARS]})) or None]
+    items = "\n".join(
+        f"[{i}] {' '.join(message[:TITLE_INPUT_CHARS].split())}" for i, message in enumerate(messages, start=1)
+    )
+    text = await _chain("batch").ainvoke({"items": items})
+    titles: List[Optional[str]] = [None] * len(messages)
+    for match in re.finditer(r"^\s*\[(\d+)\]\s*(.+)$", text, flags=re.M):
+        index = int(match.group(1))
+        if 1 <= index <= len(messages):
+            titles[index - 1] = _clean_title(match.group(2)) or None
+    return titles
+
+
+async def _run_batch(batch: List[tuple]):
+    try:
+        titles = await _generate([message for _, message, _ in batch])
+    except Exception as e:
+        print(f"[Title] 제목 생성 실패 ({len(batch)}건): {e}")
+        titles = [None] * len(batch)
+    missing = sum(title is None for title in titles)
+    if missing and len(batch) > 1:
+        print(f"[Title] 일괄 응답에서 {missing}/{len(batch)}건 누락 → 로컬 제목")
+    for (key, message, future), title in zip(batch, titles):
+        _inflight.pop(key, None)
+        if title is not None:
+            await title_cache.set("title", key, title)
+        if not future.done():
+            future.set_result(title)
+
+
+def _flush():
+    global _flush_handle
+    _flush_handle = None
+    while _pending:
+        batch = _pending[:TITLE_BATCH_MAX]
+        del _pending[:TITLE_BATCH_MAX]
+        asyncio.get_running_loop().create_task(_run_batch(batch))
+
+
+def _enqueue(key: str, message: str) -> asyncio.Future:
+    global _flush_handle
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    _inflight[key] = future
+    _pending.append((key, message, future))
+    if len(_pending) >= TITLE_BATCH_MAX:
+        if _flush_handle is not None:
+            _flush_handle.cancel()
+        _flush()
+    elif _flush_handle is None:
+        _flush_handle = loop.call_later(TITLE_BATCH_WINDOW, _flush)
+    return future
+
+
+async def generate_title(message: str) -> dict:
+    """{"title", "source"} source: cache | llm | local"""
+    stats["requests"] += 1
+    key = normalize_message(message)
+    if not key:
+        stats["fallback"] += 1
+        return {"title": DEFAULT_TITLE, "source": "local"}
+
+    cached = await title_cache.get("title", key)
+    if cached is not None:
+        stats["cache_hits"] += 1
+        return {"title": cached, "source": "cache"}
+
+    future = _inflight.get(key)
+    if future is not None:
+        stats["coalesced"] += 1
+    else:
+        future = _enqueue(key, message)
+
+    start = time.perf_counter()
+    try:
+        # shield: 시간 초과로 이 요청은 포기해도 LLM 결과는 캐시에 채워서 다음 요청이 씀
+        title = await asyncio.wait_for(asyncio.shield(future), timeout=TITLE_TIMEOUT)
+    except asyncio.TimeoutError:
+        stats["timeout"] += 1
+        print(f"[Title] {time.perf_counter() - start:.1f}s 초과 → 로컬 제목")
+        title = None
+    if title:
+        return {"title": title, "source": "llm"}
+    stats["fallback"] += 1
+    return {"title": local_title(message), "source": "local"}
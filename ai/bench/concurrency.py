@@ -0,0 +1,119 @@
+"""
+uvicorn 워커 하나에 동시 채팅 N개를 붙여 토큰 스트림이 서로 끼어드는지(interleave) 확인한다.
+노드 중 하나라도 이벤트 루프를 막으면 스트림이 한 줄로 직렬화되고 루프 지연이 튄다.
+
+    cd ai && python -m bench.concurrency --clients 50
+"""
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import time
+
+import httpx
+import uvicorn
+
+from bench.fakes import install_fakes
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _chat(client: httpx.AsyncClient, url: str, idx: int, token_times: list):
+    payload = {
+        "session_id": f"concurrency-{idx}",
+        "user_message": "내일부터 진짜 열심히 할 건데 어떻게 생각해?",
+        "level": "spicy",
+        "category": "etc",
+        "history": [],
+    }
+    event = None
+    async with client.stream("POST", url, json=payload) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:") and event == "token":
+                json.loads(line[len("data:"):])
+                token_times.append((time.perf_counter(), idx))
+
+
+async def _loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(clients: int) -> bool:
+    from app.main import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, workers=1, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_loop_lag(stop))
+    token_times: list = []
+    url = f"http://127.0.0.1:{port}/agent/chat"
+    limits = httpx.Limits(max_connections=clients)
+
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        await asyncio.gather(*(_chat(client, url, i, token_times) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    max_lag = await lag_task
+    server.should_exit = True
+    await server_task
+
+    # 스트림별 [첫 토큰, 마지막 토큰] 구간이 동시에 몇 개나 겹쳤는지
+    spans: dict[int, list[float]] = {}
+    for ts, idx in token_times:
+        span = spans.setdefault(idx, [ts, ts])
+        span[1] = ts
+    edges = sorted([(s, 1) for s, _ in spans.values()] + [(e, -1) for _, e in spans.values()])
+    active = peak = 0
+    for _, delta in edges:
+        active += delta
+        peak = max(peak, active)
+
+    ordered = [idx for _, idx in sorted(token_times)]
+    switches = sum(1 for a, b in zip(ordered, ordered[1:]) if a != b)
+
+    print(f"clients:              {clients}")
+    print(f"streams with tokens:  {len(spans)}")
+    print(f"token events:         {len(token_times)}")
+    print(f"peak overlapping:     {peak}")
+    print(f"stream switches:      {switches}")
+    print(f"max event-loop lag:   {max_lag * 1000:.1f}ms")
+    print(f"wall time:            {elapsed:.2f}s")
+
+    interleaved = len(spans) == clients and peak >= max(1, clients // 2) and switches >= clients - 1
+    print("RESULT:", "PASS (interleaved)" if interleaved else "FAIL (serialized)")
+    return interleaved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    install_fakes(latency=args.latency, chunk_delay=args.chunk_delay, search_latency=args.latency,
+                  search_query="NONE")
+    ok = asyncio.run(run(args.clients))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+턴마다 새 LLM 클라이언트를 만드는 경우와 레지스트리의 장수명 클라이언트를 쓰는 경우의
+커넥션 오버헤드 비교. 로컬 OpenAI 호환 stand-in 서버를 띄우고, 새 TCP 연결마다
+`--handshake-ms`만큼 지연을 줘서 TLS 핸드셰이크 비용을 흉내낸다.
+
+    cd ai && python -m bench.connections --turns 30 --calls-per-turn 2 --handshake-ms 40
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+import bench.fakes  # noqa: F401  (더미 API 키)
+from langchain_openai import ChatOpenAI
+
+from app.agent import registry
+
+
+class StandInServer:
+    """/v1/chat/completions 에 고정 응답을 주는 최소 HTTP/1.1 keep-alive 서버"""
+
+    def __init__(self, handshake_delay: float):
+        self.handshake_delay = handshake_delay
+        self.connections = 0
+        self.requests = 0
+        self.port = 0
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(self.handshake_delay)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value.strip())
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                body = json.dumps({
+                    "id": "chatcmpl-bench",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": "gpt-4o-mini",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": "SAFE"},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+                }).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _turns(get_model, turns: int, calls_per_turn: int) -> list[float]:
+    durations = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        model = get_model()
+        for _ in range(calls_per_turn):
+            await model.ainvoke("위기 판별")
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def run(turns: int, calls_per_turn: int, handshake_ms: float):
+    server = StandInServer(handshake_ms / 1000)
+    await server.start()
+    base_url = f"http://127.0.0.1:{server.port}/v1"
+
+    # 기존 방식: 턴마다 새 ChatOpenAI (calculator.py 이전 코드와 동일)
+    def per_turn():
+        return ChatOpenAI(model="gpt-4o-mini", temperature=0, base_url=base_url, max_retries=0)
+
+    # 클라이언트와 함께 전송 계층(커넥션 풀)까지 매 턴 새로 만드는 경우
+    # (SDK가 기본 httpx 클라이언트를 캐시하지 않는 버전/프로바이더)
+    def per_turn_transport():
+        return ChatOpenAI(model="gpt-4o-mini", temperature=0, base_url=base_url, max_retries=0,
+                          http_async_client=httpx.AsyncClient())
+
+    # 레지스트리 방식: 공유 httpx 풀을 가진 인스턴스 하나 재사용
+    http_client, http_async_client = registry.get_http_clients()
+    shared = ChatOpenAI(model="gpt-4o-mini", temperature=0, base_url=base_url, max_retries=0,
+                        http_client=http_client, http_async_client=http_async_client)
+
+    rows = []
+    modes = (
+        ("per-turn transport", per_turn_transport),
+        ("per-turn client", per_turn),
+        ("registry client", lambda: shared),
+    )
+    for label, factory in modes:
+        server.connections = server.requests = 0
+        durations = await _turns(factory, turns, calls_per_turn)
+        rows.append((label, server.connections, server.requests, statistics.median(durations),
+                     statistics.mean(durations)))
+
+    await registry.aclose()
+    await server.stop()
+
+    print(f"{'mode':<20}{'conns':>7}{'reqs':>7}{'turn p50':>11}{'turn avg':>11}")
+    for label, conns, reqs, p50, avg in rows:
+        print(f"{label:<20}{conns:>7}{reqs:>7}{p50 * 1000:>9.1f}ms{avg * 1000:>9.1f}ms")
+    for label, conns, _, _, avg in rows[:-1]:
+        saved = avg - rows[-1][4]
+        print(f"vs {label}: 턴당 {saved * 1000:.1f}ms 절감, 새 연결 {conns - rows[-1][1]}개 감소")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--calls-per-turn", type=int, default=2)
+    parser.add_argument("--handshake-ms", type=float, default=40, help="새 연결마다 주는 지연 (TLS 흉내)")
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.calls_per_turn, args.handshake_ms))
+
+
+if __name__ == "__main__":
+    main()
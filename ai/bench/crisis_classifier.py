@@ -0,0 +1,157 @@
+"""
+위기 판별 로컬 분류기 평가: 층화 k-fold 교차검증으로 라벨별 recall / 혼동행렬,
+사전 → 분류기 로컬 파이프라인의 자동 확정 비율과 CRISIS 누락
+(로컬이 SAFE로 확정해 버린 위기 메시지), 임계값 스윕, 1건당 추론 시간.
+
+    cd ai && python -m bench.crisis_classifier
+    cd ai && python -m bench.crisis_classifier --folds 10 --data my_labeled.csv
+    cd ai && python -m bench.crisis_classifier --holdout bench/data/crisis_holdout.csv   # 저장된 모델로 별도 셋 평가
+
+bench/data/crisis_holdout.csv는 사전(crisis_lexicon.txt)과 학습 데이터 튜닝에 쓰지 않은 셋.
+교차검증은 사전이 같은 데이터의 누락을 보고 다듬어졌으므로 CRISIS recall이 실제보다 높게 나옴 → 홀드아웃 수치를 기준으로 볼 것.
+
+티어 recall은 "LLM으로 넘어간 건 LLM이 맞힌다"는 가정의 상한값.
+로컬 티어가 만드는 손실은 CRISIS→SAFE 확정 건수로 직접 확인할 것.
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from pathlib import Path
+
+from app.agent.graph import CRISIS_KEYWORD_SAFE_FASTPATH
+from app.tools import crisis_classifier as clf
+from app.tools.crisis_classifier import LABELS, CrisisClassifier, load_dataset, train
+from app.tools.keyword_matcher import classify_crisis_keywords
+
+
+def stratified_folds(labels: list[str], k: int, seed: int = 0) -> list[list[int]]:
+    rng = random.Random(seed)
+    folds: list[list[int]] = [[] for _ in range(k)]
+    for label in LABELS:
+        idx = [i for i, y in enumerate(labels) if y == label]
+        rng.shuffle(idx)
+        for j, i in enumerate(idx):
+            folds[j % k].append(i)
+    return folds
+
+
+def cross_val_predictions(texts, labels, k: int, epochs: int) -> list[tuple]:
+    """각 샘플을 그 샘플이 빠진 fold로 학습한 모델로 예측 → [(정답, 예측, 확신도)]"""
+    preds: list = [None] * len(texts)
+    for fold in stratified_folds(labels, k):
+        held = set(fold)
+        train_idx = [i for i in range(len(texts)) if i not in held]
+        model = train([texts[i] for i in train_idx], [labels[i] for i in train_idx], epochs=epochs)
+        for i in fold:
+            preds[i] = (labels[i], *model.predict(texts[i]))
+    return preds
+
+
+def report(texts: list[str], preds: list[tuple], thresholds: dict, fastpath: bool):
+    print("\n[모델 단독] 혼동행렬 (행=정답, 열=예측)")
+    confusion = Counter((gold, pred) for gold, pred, _ in preds)
+    print(f"{'':>9}" + "".join(f"{label:>9}" for label in LABELS))
+    for gold in LABELS:
+        print(f"{gold:>9}" + "".join(f"{confusion[(gold, pred)]:>9}" for pred in LABELS))
+    for label in LABELS:
+        total = sum(1 for gold, _, _ in preds if gold == label)
+        hit = confusion[(label, label)]
+        print(f"  recall {label:<8} {hit}/{total} = {hit / max(total, 1):.3f}")
+
+    print("\n[로컬 파이프라인] 사전 → 분류기 (임계값: "
+          + ", ".join(f"{k}≥{v:.2f}" for k, v in thresholds.items())
+          + f", 사전 safe 단축 {'켜짐' if fastpath else '꺼짐'})")
+    outcomes = [(gold, pipeline(text, pred, conf, thresholds, fastpath))
+                for text, (gold, pred, conf) in zip(texts, preds)]
+    print(f"{'':>9}{'사전':>7}{'분류기':>8}{'LLM':>6}{'확정오판':>10}")
+    for gold in LABELS:
+        rows = [(tier, level) for g, (tier, level) in outcomes if g == gold]
+        wrong = sum(1 for tier, level in rows if level is not None and level.upper() != gold)
+        counts = Counter(tier for tier, _ in rows)
+        print(f"{gold:>9}{counts['keyword']:>7}{counts['local']:>8}{counts['llm']:>6}{wrong:>10}")
+    auto = sum(1 for _, (tier, _) in outcomes if tier != "llm")
+    crisis = [level for gold, (_, level) in outcomes if gold == "CRISIS"]
+    missed = sum(1 for level in crisis if level == "safe")
+    no_keyword = sum(1 for text, (gold, _, _) in zip(texts, preds)
+                     if gold == "CRISIS" and classify_crisis_keywords(text) == "safe")
+    print(f"  위험 단어가 사전에 없는 CRISIS: {no_keyword}/{len(crisis)}")
+    print(f"  자동 확정 비율: {auto}/{len(outcomes)} = {auto / len(outcomes):.3f} (그만큼 LLM 호출 생략)")
+    print(f"  CRISIS → safe 확정(누락): {missed}")
+    # unclear로 확정돼도 확인 질문이 나가므로 놓친 것으로 보지 않음
+    print(f"  CRISIS recall (LLM 정답 가정): {len(crisis) - missed}/{len(crisis)} = "
+          f"{(len(crisis) - missed) / max(len(crisis), 1):.3f}")
+
+
+def pipeline(text: str, pred: str, conf: float, thresholds: dict, fastpath: bool) -> tuple:
+    """graph.crisis_check와 같은 순서로 (확정한 티어, crisis_level 또는 None). decide()와 같은 규칙, 임계값만 인자로"""
+    keyword_level = classify_crisis_keywords(text)
+    if keyword_level == "crisis":
+        return "keyword", "crisis"
+    if fastpath and keyword_level == "safe" and pred != "SAFE":
+        level = None
+    elif keyword_level is None and pred == "SAFE":  # [risk] 단어가 걸리면 safe는 LLM 확인
+        level = None
+    else:
+        level = pred.lower() if conf >= thresholds[pred] else None
+    return ("local", level) if level is not None else ("llm", None)
+
+def sweep(texts: list[str], preds: list[tuple], fastpath: bool):
+    print("\n[SAFE 임계값 스윕] 로컬 파이프라인 기준 (다른 라벨 임계값은 현재 설정 유지)")
+    print(f"{'safe≥':>8}{'자동확정':>10}{'CRISIS→safe':>14}{'UNCLEAR→safe':>15}")
+    for t in (0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99):
+        thresholds = current_thresholds() | {"SAFE": t}
+        outcomes = [(gold, pipeline(text, pred, conf, thresholds, fastpath))
+                    for text, (gold, pred, conf) in zip(texts, preds)]
+        auto = sum(1 for _, (tier, _) in outcomes if tier != "llm")
+        c2s = sum(1 for gold, (_, level) in outcomes if gold == "CRISIS" and level == "safe")
+        u2s = sum(1 for gold, (_, level) in outcomes if gold == "UNCLEAR" and level == "safe")
+        print(f"{t:>8.2f}{auto / len(outcomes):>10.3f}{c2s:>14}{u2s:>15}")
+
+def current_thresholds() -> dict:
+    return {
+        "SAFE": clf.CRISIS_CLF_SAFE_THRESHOLD,
+        "UNCLEAR": clf.CRISIS_CLF_UNCLEAR_THRESHOLD,
+        "CRISIS": clf.CRISIS_CLF_CRISIS_THRESHOLD,
+    }
+
+
+def latency(model: CrisisClassifier, texts: list[str], repeat: int = 20):
+    for text in texts[:10]:
+        model.predict(text)  # 워밍업
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            model.predict(text)
+    per_call = (time.perf_counter() - start) / (repeat * len(texts))
+    print(f"\n[추론 시간] 1건당 {per_call * 1e6:.0f}µs (목표 < 1000µs)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", type=Path, default=clf.CRISIS_TRAIN_PATH)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--holdout", type=Path, default=None, help="저장된 모델로 평가할 별도 CSV")
+    parser.add_argument("--fastpath", action=argparse.BooleanOptionalAction, default=CRISIS_KEYWORD_SAFE_FASTPATH,
+                        help="사전 safe 단축 (graph.CRISIS_KEYWORD_SAFE_FASTPATH)")
+    args = parser.parse_args()
+
+    if args.holdout:
+        texts, labels = load_dataset(args.holdout)
+        model = CrisisClassifier.load()
+        preds = [(label, *model.predict(text)) for text, label in zip(texts, labels)]
+        print(f"홀드아웃 평가: {args.holdout} {len(texts)}건")
+    else:
+        texts, labels = load_dataset(args.data)
+        print(f"{args.folds}-fold 교차검증: {args.data} {len(texts)}건 {dict(Counter(labels))}")
+        preds = cross_val_predictions(texts, labels, args.folds, args.epochs)
+        model = train(texts, labels, epochs=args.epochs)
+
+    report(texts, preds, current_thresholds(), args.fastpath)
+    sweep(texts, preds, args.fastpath)
+    latency(model, texts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+벤치마크용 가짜 LLM / 검색 도구.
+실제 Gemini, Anthropic, OpenAI, DuckDuckGo 호출 없이 지연시간만 흉내낸다.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+# graph.py import 시 모델 생성자가 API 키를 요구하므로 더미 값 주입
+for _key in ("GOOGLE_API_KEY", "ANTHROPIC_API_KEY", "OPENAI_API_KEY"):
+    os.environ.setdefault(_key, "bench-dummy-key")
+
+FAKE_RESPONSE = (
+    "야 그거 계획이 아니라 희망사항이야.\n"
+    "내일부터 한다는 말 몇 번째야?\n"
+    "오늘 30분만 해봐.\n"
+    "그거 하고 다시 얘기하자.\n"
+)
+
+FAKE_SCORE = {
+    "goal_realism": 13,
+    "effort_specificity": 15,
+    "external_blame": 8,
+    "info_seeking": 11,
+    "time_urgency": 16,
+    "total": 63,
+    "summary": "말만 번지르르한 계획러",
+}
+
+
+def _system_text(messages: List[BaseMessage]) -> str:
+    for msg in messages:
+        if msg.type == "system" and isinstance(msg.content, str):
+            return msg.content
+    return ""
+
+
+def _user_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(msg.content for msg in messages if msg.type == "human" and isinstance(msg.content, str))
+
+
+def default_responder(messages: List[BaseMessage], search_query: str = "NONE") -> str:
+    """시스템 프롬프트를 보고 노드별로 그럴듯한 답을 돌려준다."""
+    system = _system_text(messages)
+    if "그로기" in system:
+        return FAKE_RESPONSE
+    if "crisis_level" in system:
+        return json.dumps({"crisis_level": "SAFE", "category": "career", "search_query": search_query},
+                          ensure_ascii=False)
+    if "SAFE, UNCLEAR, CRISIS" in system or "CRISIS 또는 SAFE" in system:
+        return "SAFE"
+    if "카테고리" in system:
+        return "career"
+    if "검색" in system and "NONE" in system:
+        return search_query
+    if "채점 목록" in system:
+        count = len(re.findall(r"^\[\d+\]$", _user_text(messages), flags=re.M))
+        return json.dumps({"scores": [{**FAKE_SCORE, "index": i} for i in range(1, count + 1)]},
+                          ensure_ascii=False)
+    if "제목 목록" in system:
+        count = len(re.findall(r"^\[\d+\]", _user_text(messages), flags=re.M))
+        return "\n".join(f"[{i}] 가짜 제목 {i}" for i in range(1, count + 1))
+    if "대화방의 제목" in system:
+        return "가짜 제목"
+    if "현실 회피 지수" in system:
+        return json.dumps(FAKE_SCORE, ensure_ascii=False)
+    if "이미지를 분석" in system:
+        return "상황 요약: 게임 화면"
+    if "대화 요약" in system:
+        return "- 사용자: 취업 준비 중, 자소서 마감 임박"
+    return FAKE_RESPONSE
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    첫 토큰까지 `latency`초, 이후 청크마다 `chunk_delay`초가 걸리는 가짜 모델.
+    `jitter` > 0 이면 첫 토큰 지연에 지수분포 꼬리를 더함 (seed 고정 → 실행마다 같은 지연 순서)
+    """
+
+    latency: float = 0.3
+    chunk_delay: float = 0.01
+    chunk_size: int = 4
+    jitter: float = 0.0
+    seed: int = 0
+    search_query: str = "NONE"
+    response_repeat: int = 1  # 본 응답(FAKE_RESPONSE)을 몇 번 이어 붙일지 (긴 스트리밍 흉내)
+    prompt_latency: dict = {}  # 시스템 프롬프트에 키 문자열이 있으면 첫 토큰 지연을 값(초)으로 (노드별 지연 차이 흉내)
+    fail_calls: int = 0  # 이 횟수만큼 호출이 예외 (provider 장애 흉내)
+    calls: int = 0
+    _rng: Any = PrivateAttr(default=None)
+
+    @property
+    def _llm_type(self) -> str:
+        return "grogi-bench-fake"
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        self.calls += 1
+        if self.fail_calls > 0:
+            self.fail_calls -= 1
+            raise RuntimeError("fake provider outage")
+        text = default_responder(messages, self.search_query)
+        return text * self.response_repeat if text == FAKE_RESPONSE else text
+
+    def _first_token_delay(self, messages: List[BaseMessage]) -> float:
+        latency = self.latency
+        if self.prompt_latency:
+            system = _system_text(messages)
+            latency = next((v for k, v in self.prompt_latency.items() if k in system), latency)
+        if not self.jitter:
+            return latency
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return latency + self._rng.expovariate(1 / self.jitter)
+
+    def _chunks(self, text: str) -> List[str]:
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = self._respond(messages)
+        time.sleep(self._first_token_delay(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = self._respond(messages)
+        await asyncio.sleep(self._first_token_delay(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        text = self._respond(messages)
+        time.sleep(self._first_token_delay(messages))
+        for piece in self._chunks(text):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+            time.sleep(self.chunk_delay)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        text = self._respond(messages)
+        await asyncio.sleep(self._first_token_delay(messages))
+        for piece in self._chunks(text):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(self.chunk_delay)
+
+
+class FakeSearchTool:
+    """DuckDuckGoSearchResults 대역. `latency`초 뒤 고정 결과를 돌려준다."""
+
+    def __init__(self, latency: float = 0.5):
+        self.latency = latency
+        self.calls = 0
+
+    def _result(self, query: str) -> str:
+        self.calls += 1
+        return f"snippet: {query} 관련 결과, title: 가짜 검색 결과, link: https://example.com/search"
+
+    def invoke(self, tool_input: dict, config: Optional[dict] = None, **kwargs: Any) -> str:
+        time.sleep(self.latency)
+        return self._result(tool_input["query"])
+
+    async def ainvoke(self, tool_input: dict, config: Optional[dict] = None, **kwargs: Any) -> str:
+        await asyncio.sleep(self.latency)
+        return self._result(tool_input["query"])
+
+
+def fake_overrides(latency: float = 0.3, chunk_delay: float = 0.01, search_latency: float = 0.5,
+                   search_query: str = "두쫀쿠", jitter: float = 0.0, seed: int = 0,
+                   chunk_size: int = 4, response_repeat: int = 1) -> dict:
+    """모든 모델 슬롯 + 검색 도구의 가짜 인스턴스. build_graph(overrides=...)에 그대로 넘길 수 있음"""
+    from app.agent import registry
+
+    fake = FakeChatModel(latency=latency, chunk_delay=chunk_delay, search_query=search_query,
+                         jitter=jitter, seed=seed, chunk_size=chunk_size, response_repeat=response_repeat)
+    overrides = {name: fake for name in registry.MODEL_DEFAULTS}
+    overrides["search"] = FakeSearchTool(latency=search_latency)
+    return overrides
+
+
+def install_fakes(latency: float = 0.3, chunk_delay: float = 0.01, search_latency: float = 0.5,
+                  search_query: str = "두쫀쿠"):
+    """레지스트리의 모든 모델 슬롯과 검색 도구를 가짜로 교체한다 (프로세스 전체)."""
+    from app.agent import registry
+
+    overrides = fake_overrides(latency, chunk_delay, search_latency, search_query)
+    for name, instance in overrides.items():
+        registry.override(name, instance)
+    return overrides["main"], overrides["search"]
@@ -0,0 +1,68 @@
+"""
+긴 세션에서 턴마다 generate_response에 들어가는 히스토리 토큰 수 비교
+(전체 히스토리 그대로 vs compact_history), 요약 LLM 호출 수.
+--window N: 백엔드처럼 최근 N개 메시지만 보냄 (창이 턴마다 밀려도 요약을 이어 쓰는지, 요약 초기화 횟수)
+
+    cd ai && python -m bench.history --turns 80
+    cd ai && python -m bench.history --turns 80 --window 20
+    cd ai && python -m bench.history --turns 200 --budget 3000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from bench.fakes import install_fakes
+
+
+def make_turn(i: int) -> list[dict]:
+    user = f"{i}번째 고민인데 자소서 마감이 내일이라 너무 불안해. 지원 동기 문단을 다시 써야 할지 모르겠어."
+    ai = "지원 동기부터 보자.\n회사 얘기만 있고 너 얘기가 없어.\n" * 3 + f"{i}번째 턴 정리: 경험 하나만 골라."
+    return [{"role": "user", "content": user}, {"role": "assistant", "content": ai}]
+
+
+async def run(turns: int, budget: int, window: int):
+    os.environ["LLM_MAIN_HISTORY_BUDGET"] = str(budget)
+    from app.agent import history as hist
+
+    fake, _ = install_fakes(latency=0.05, chunk_delay=0)
+    session_id = "bench-history"
+    history: list[dict] = []
+    rows = []
+    start = time.perf_counter()
+    for i in range(turns):
+        sent_history = history[-window:] if window else history
+        full = sum(hist.message_tokens(m) for m in sent_history)
+        summary, recent = await hist.compact_history(session_id, sent_history)
+        sent = sum(hist.message_tokens(m) for m in recent) + (hist.count_tokens(summary) if summary else 0)
+        rows.append((i, len(history), full, sent))
+        # 턴 사이 간격 동안 백그라운드 요약이 끝난다고 가정
+        if session_id in hist._folding:
+            await hist._folding[session_id]
+        history += make_turn(i)
+    elapsed = time.perf_counter() - start
+
+    print(f"budget={budget} tokens, turns={turns}, window={window or '전체'}")
+    print(f"{'turn':>6}{'msgs':>7}{'full':>9}{'sent':>9}")
+    step = max(1, turns // 10)
+    for i, n, full, sent in rows[::step] + [rows[-1]]:
+        print(f"{i:>6}{n:>7}{full:>9}{sent:>9}")
+    total_full = sum(r[2] for r in rows)
+    total_sent = sum(r[3] for r in rows)
+    print(f"누적 히스토리 토큰: {total_full} → {total_sent} ({1 - total_sent / max(total_full, 1):.0%} 감소)")
+    print(f"마지막 턴: {rows[-1][2]} → {rows[-1][3]} tokens (예산 {budget})")
+    print(f"요약 LLM 호출: {hist.stats['folds']}회 / {turns}턴, 토큰 캐시 hit {hist.stats['token_cache_hits']} "
+          f"miss {hist.stats['token_cache_misses']}, 요약 초기화 {hist.stats['summary_resets']}회, 실행 {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=80)
+    parser.add_argument("--budget", type=int, default=3000)
+    parser.add_argument("--window", type=int, default=0, help="백엔드가 보내는 최근 메시지 수 (0이면 전체)")
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.budget, args.window))
+
+
+if __name__ == "__main__":
+    main()
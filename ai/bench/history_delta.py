@@ -0,0 +1,120 @@
+"""
+세션이 길 때 /agent/chat 요청 한 건의 비용: history 전체를 보내는 기존 방식 vs history_version만 보내고
+세션 체크포인트(app.agent.checkpoint)에서 이어받는 방식.
+요청 바이트, ChatRequest 파싱(Pydantic) 시간, 체크포인트에서 history를 읽는 시간(memory / sqlite)을 메시지 수별로 비교.
+이어받은 history가 전체 history 모드의 창(최근 CHECKPOINT_HISTORY_MESSAGES개)과 같은지,
+창이 턴마다 밀려도 history 요약(app.agent.history)을 이어 쓰는지(요약 초기화 0회)도 확인.
+
+    cd ai && python -m bench.history_delta --messages 10 50 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from bench.fakes import fake_overrides, install_fakes
+from app.agent import checkpoint
+from app.agent import history as hist
+from app.agent.graph import UNCLEAR_REPLY, build_graph
+from app.main import ChatRequest
+
+USER_TURN = "여자친구가 두쫀쿠 안 사줬다고 시간을 갖자고 하네. 내가 뭘 잘못한 건지 모르겠어. " * 2
+ASSISTANT_TURN = "야 그거 두쫀쿠 문제가 아니야. 평소에 쌓인 게 터진 거지. 오늘 먼저 연락해서 뭐가 서운했는지 물어봐. " * 4
+
+
+def make_history(n: int) -> list:
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": USER_TURN if i % 2 == 0 else ASSISTANT_TURN}
+            for i in range(n)]
+
+
+def make_body(n: int, delta: bool) -> bytes:
+    body = {"session_id": "bench-delta", "user_message": "그래서 이제 어떡해?", "level": "spicy", "category": "love",
+            # 전체 모드: 백엔드가 보내는 최근 창 (take: 20 = CHECKPOINT_HISTORY_MESSAGES)
+            "history": [] if delta else make_history(n)[-checkpoint.CHECKPOINT_HISTORY_MESSAGES:], "history_version": n}
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+def parse_ms(body: bytes, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        request = ChatRequest.model_validate_json(body)
+        [msg.model_dump() for msg in request.history]
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+async def seeded(saver, n: int):
+    """직전 턴(history n-2개 + user + 답변)이 저장된 그래프"""
+    executor = build_graph(overrides=fake_overrides(latency=0, chunk_delay=0, search_latency=0, search_query="NONE"),
+                           checkpointer=saver)
+    history = make_history(n)
+    state = {"session_id": "bench-delta", "user_message": history[-2]["content"], "level": "spicy", "category": "love",
+             "history": history[:-2], "history_version": n - 2, "images": [], "pdfs": [], "status": "starting",
+             "current_section": "diagnosis"}
+    await checkpoint.start_turn(executor, "bench-delta")
+    await executor.ainvoke(state, config=checkpoint.thread_config("bench-delta"), durability="exit")
+    return executor
+
+
+async def load_ms(executor, n: int, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        history = await checkpoint.load_history(executor, "bench-delta", n, UNCLEAR_REPLY)
+    assert history is not None, "버전이 이어지지 않음"
+    # 전체 history 모드(백엔드가 최근 CHECKPOINT_HISTORY_MESSAGES개, 이번 user 메시지 포함)와 같은 창인지
+    # (마지막 답변은 가짜 모델이 만든 diagnosis라 내용 대신 role만 비교)
+    expected = make_history(n)[-(checkpoint.CHECKPOINT_HISTORY_MESSAGES - 1):]
+    assert history[:-1] == expected[:-1] and history[-1]["role"] == expected[-1]["role"], "전체 history 모드와 창이 다름"
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+async def summary_check(turns: int):
+    """창(최근 CHECKPOINT_HISTORY_MESSAGES - 1개)이 한 턴에 2개씩 밀릴 때 요약 LLM 호출 수 / 초기화 횟수"""
+    install_fakes(latency=0, chunk_delay=0)
+    os.environ["LLM_MAIN_HISTORY_BUDGET"] = str(hist.count_tokens(USER_TURN + ASSISTANT_TURN) * 8)
+    folds, resets = hist.stats["folds"], hist.stats["summary_resets"]
+    window = checkpoint.CHECKPOINT_HISTORY_MESSAGES - 1
+    summaries = []
+    for n in range(window + 1, window + 1 + turns * 2, 2):
+        history = [{**m, "content": f"({i}) {m['content']}"} for i, m in enumerate(make_history(n))]  # 메시지마다 다른 내용
+        summary, _ = await hist.compact_history("bench-delta-summary", history[-window:])
+        summaries.append(summary)
+        if "bench-delta-summary" in hist._folding:
+            await hist._folding["bench-delta-summary"]
+    folds, resets = hist.stats["folds"] - folds, hist.stats["summary_resets"] - resets
+    first = next((i for i, summary in enumerate(summaries) if summary), None)
+    kept = first is not None and all(summaries[first:])
+    print(f"요약: {turns}턴 동안 요약 LLM {folds}회, 초기화 {resets}회, 요약 유지 {'O' if kept else 'X'} "
+          f"→ {'PASS' if kept and resets == 0 and folds <= turns // 2 else 'FAIL'}")
+
+
+async def run(args):
+    print(f"{'메시지':>6}{'전체 바이트':>12}{'delta 바이트':>13}{'전체 파싱':>11}{'delta 파싱':>12}"
+          f"{'memory 읽기':>12}{'sqlite 읽기':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.messages:
+            n += n % 2  # user / 답변 쌍
+            full, delta = make_body(n, False), make_body(n, True)
+            memory = await seeded(InMemorySaver(), n)
+            checkpoint.CHECKPOINT_BACKEND, checkpoint.CHECKPOINT_PATH = "sqlite", os.path.join(tmp, f"ck{n}.db")
+            sqlite = await seeded(await checkpoint.open_checkpointer(), n)
+            print(f"{n:>6}{len(full):>12,}{len(delta):>13,}{parse_ms(full, args.repeat):>9.2f}ms"
+                  f"{parse_ms(delta, args.repeat):>10.2f}ms{await load_ms(memory, n, args.repeat):>10.2f}ms"
+                  f"{await load_ms(sqlite, n, args.repeat):>10.2f}ms")
+            await checkpoint.close_checkpointer()
+    await summary_check(args.turns)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=20, help="요약 확인에서 창을 밀 턴 수")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+이미지 전처리 파이프라인: 폰 스크린샷 크기 이미지의 페이로드 바이트 / 처리 시간,
+같은 이미지 재전송 시 중복 제거 + vision 분석 캐시 효과.
+
+    cd ai && python -m bench.image_pipeline --images 3 --vision-latency 1.5
+"""
+import argparse
+import asyncio
+import base64
+import io
+import random
+import time
+
+from bench.fakes import install_fakes
+from app.agent import graph
+from app.tools import image_pipeline
+
+
+def make_screenshot(seed: int, size=(1170, 2532)) -> str:
+    """텍스트 줄이 많은 폰 스크린샷 비슷한 PNG (base64)"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    # 상단 절반은 사진(노이즈 + 그라데이션), 하단은 채팅 텍스트 줄
+    photo = Image.effect_noise((size[0], size[1] // 2), 40).convert("RGB")
+    gradient = Image.linear_gradient("L").resize(photo.size).convert("RGB")
+    img = Image.new("RGB", size, (245, 245, 245))
+    img.paste(Image.blend(photo, gradient, 0.5), (0, 0))
+    draw = ImageDraw.Draw(img)
+    y = size[1] // 2 + 40
+    while y < size[1] - 40:
+        x = 40
+        while x < size[0] - 80:
+            w = rng.randint(20, 120)
+            draw.rectangle([x, y, x + w, y + 24], fill=(rng.randint(0, 80),) * 3)
+            x += w + rng.randint(10, 30)
+        y += rng.randint(40, 70)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+async def run(n_images: int, vision_latency: float):
+    fake, _ = install_fakes(latency=vision_latency, chunk_delay=0)
+    images = [make_screenshot(i) for i in range(n_images)]
+    raw_bytes = sum(len(base64.b64decode(img)) for img in images)
+
+    # 기존: 원본 그대로 vision + main 두 번 전송
+    print(f"원본: {n_images}장, {raw_bytes / 1024:.0f}KB (vision + main 두 번 → {2 * raw_bytes / 1024:.0f}KB 업로드)")
+
+    state = {"images": images + images[:1]}  # 한 장은 같은 턴에 중복 첨부
+    for label in ("첫 턴", "같은 이미지 재전송"):
+        calls = fake.calls
+        start = time.perf_counter()
+        result = await graph.analyze_images(state)
+        elapsed = time.perf_counter() - start
+        sent = sum(len(base64.b64decode(url.split(",", 1)[1])) for url in result["image_urls"])
+        print(f"{label:<14} analyze_images {elapsed * 1000:7.0f}ms  vision 호출 {fake.calls - calls}회  "
+              f"main용 {len(result['image_urls'])}장 {sent / 1024:.0f}KB")
+
+    stats = image_pipeline.stats
+    print(f"전처리: {stats['images']}장 {stats['bytes_in'] / 1024:.0f}KB → {stats['bytes_out'] / 1024:.0f}KB "
+          f"({1 - stats['bytes_out'] / max(stats['bytes_in'], 1):.0%} 감소), 중복 제거 {stats['deduped']}, "
+          f"캐시 히트 {stats['cache_hits']}")
+    image_pipeline.shutdown_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=3)
+    parser.add_argument("--vision-latency", type=float, default=1.5)
+    args = parser.parse_args()
+    asyncio.run(run(args.images, args.vision_latency))
+
+
+if __name__ == "__main__":
+    main()
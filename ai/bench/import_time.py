@@ -0,0 +1,130 @@
+"""
+서버 콜드 스타트 중 import 비용: `python -X importtime -c "import app.main"`을 새 프로세스로 여러 번 돌려
+전체 import 시간, 최상위 패키지별 합계(self 시간), app.main이 직접 끌어오는 모듈의 누적 시간,
+provider SDK(anthropic / google genai / openai)가 import 시점에 로드됐는지 출력.
+
+    cd ai && python -m bench.import_time
+    cd ai && python -m bench.import_time --json before.json
+    cd ai && python -m bench.import_time --baseline before.json   # 변화량 같이 출력
+    cd ai && python -m bench.import_time --module app.agent.graph
+
+첫 실행은 .pyc 생성이 섞이므로 버리고(--warm 1) 나머지 실행의 중앙값을 씀.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+AI_ROOT = Path(__file__).resolve().parents[1]
+
+# 서버 시작 시 import되면 안 되는 (첫 사용 시 로드해야 하는) 무거운 패키지
+LAZY_PACKAGES = ("langchain_anthropic", "langchain_google_genai", "langchain_openai", "langchain_community",
+                 "anthropic", "google.genai", "openai", "tiktoken")
+
+
+def parse_importtime(stderr: str) -> list:
+    """-X importtime 출력 → [(module, self_us, cumulative_us, depth)] (import 순서)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        module = parts[2].rstrip()
+        depth = (len(module) - len(module.lstrip())) // 2
+        rows.append((module.strip(), int(parts[0]), int(parts[1]), depth))
+    return rows
+
+
+def run_once(module: str) -> tuple:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=AI_ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} 실패:\n{proc.stderr[-2000:]}")
+    return wall, parse_importtime(proc.stderr)
+
+
+def summarize(module: str, runs: int, warm: int, top: int) -> dict:
+    for _ in range(warm):
+        run_once(module)
+    samples = [run_once(module) for _ in range(runs)]
+    walls = [wall for wall, _ in samples]
+    # 실행마다 모듈 구성은 같으므로 중앙값에 가장 가까운 실행 하나를 기준으로 분해
+    median_wall = statistics.median(walls)
+    wall, rows = min(samples, key=lambda sample: abs(sample[0] - median_wall))
+
+    by_package: dict = {}
+    for name, self_us, _, _ in rows:
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    root_depth = min(depth for name, _, _, depth in rows if name == module)
+    direct = [(name, cumulative) for name, _, cumulative, depth in rows if depth == root_depth + 1]
+    total = next(cumulative for name, _, cumulative, depth in rows if name == module)
+    loaded = {name for name, _, _, _ in rows}
+
+    return {
+        "module": module,
+        "runs": runs,
+        "wall_ms": median_wall * 1000,
+        "wall_min_ms": min(walls) * 1000,
+        "import_ms": total / 1000,
+        "modules": len(rows),
+        "packages_ms": {k: v / 1000 for k, v in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]},
+        "direct_ms": {k: v / 1000 for k, v in sorted(direct, key=lambda kv: -kv[1])[:top]},
+        "lazy_loaded": [name for name in LAZY_PACKAGES if name in loaded],
+    }
+
+
+def _delta(report: dict, baseline: Optional[dict], key: str, sub: Optional[str] = None) -> str:
+    if not baseline:
+        return ""
+    before = baseline.get(key, {}).get(sub) if sub else baseline.get(key)
+    if before is None:
+        return ""
+    value = report[key][sub] if sub else report[key]
+    return f" ({value - before:+.0f})"
+
+
+def print_report(report: dict, baseline: Optional[dict]):
+    print(f"\nimport {report['module']}: 프로세스 {report['wall_ms']:.0f}ms{_delta(report, baseline, 'wall_ms')} "
+          f"(최소 {report['wall_min_ms']:.0f}ms), import {report['import_ms']:.0f}ms"
+          f"{_delta(report, baseline, 'import_ms')}, 모듈 {report['modules']}개, {report['runs']}회 중앙값")
+    print("\n최상위 패키지별 (self 합계)")
+    for name, ms in report["packages_ms"].items():
+        print(f"  {name:<32}{ms:>8.0f}ms{_delta(report, baseline, 'packages_ms', name)}")
+    print(f"\n{report['module']}이 직접 import (누적)")
+    for name, ms in report["direct_ms"].items():
+        print(f"  {name:<32}{ms:>8.0f}ms{_delta(report, baseline, 'direct_ms', name)}")
+    if report["lazy_loaded"]:
+        print(f"\n시작 시 로드된 무거운 패키지 (첫 사용 때 로드해야 함): {', '.join(report['lazy_loaded'])}")
+    else:
+        print("\nprovider SDK / langchain_community: 시작 시 로드 안 됨")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warm", type=int, default=1, help="버리는 실행 수 (.pyc 생성 등)")
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--json", type=Path, help="결과 저장 (다음 --baseline 으로 사용)")
+    parser.add_argument("--baseline", type=Path, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    report = summarize(args.module, args.runs, args.warm, args.top)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_report(report, baseline)
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Aho–Corasick 키워드 매처 vs 기존 방식(`any(kw in msg for kw in keywords)`) 비교.
+사전 크기를 키워가며 메시지당 스캔 시간을 잰다.
+
+    cd ai && python -m bench.keyword_matcher --sizes 100 1000 10000
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+from app.tools.keyword_matcher import KeywordMatcher, crisis_lexicon
+
+CORPUS = Path(__file__).resolve().parent / "data" / "messages.txt"
+
+
+def synthetic_keywords(n: int, seed: int = 7) -> list[str]:
+    """실제 사전 키워드 + 임의 한글 음절 조합으로 n개 채움"""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < n:
+        length = rng.randint(2, 5)
+        words.add("".join(chr(rng.randint(0xAC00, 0xD7A3)) for _ in range(length)))
+    return list(words)
+
+
+def naive_scan(keywords: list[str], message: str) -> list[str]:
+    return [kw for kw in keywords if kw in message]
+
+
+def bench(fn, messages: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            fn(message)
+    return (time.perf_counter() - start) / (repeat * len(messages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    messages = [l for l in CORPUS.read_text(encoding="utf-8").splitlines() if l and not l.startswith("#")]
+    print(f"messages: {len(messages)}, 실제 위기 사전: {crisis_lexicon.size}개")
+    print(f"{'keywords':>9}{'build':>10}{'naive/msg':>12}{'AC/msg':>10}{'speedup':>9}")
+    for size in args.sizes:
+        keywords = synthetic_keywords(size)
+        start = time.perf_counter()
+        matcher = KeywordMatcher((kw, "risk", "any") for kw in keywords)
+        build = time.perf_counter() - start
+
+        naive = bench(lambda m: naive_scan(keywords, m), messages, args.repeat)
+        ac = bench(matcher.find, messages, args.repeat)
+        print(f"{size:>9}{build * 1000:>8.0f}ms{naive * 1e6:>10.1f}us{ac * 1e6:>8.1f}us{naive / ac:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
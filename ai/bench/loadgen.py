@@ -0,0 +1,258 @@
+"""
+/agent/chat 부하 생성기: 동시 SSE 클라이언트 N개가 총 R건을 HTTP로 보내고
+첫 토큰(TTFT) / 본문 완료 / 전체 완료 시간의 p50·p95·p99, 처리량, 서버 RSS를 출력.
+성능 변경 전후 비교의 기준선(baseline)으로 사용.
+
+    cd ai && python -m bench.loadgen --clients 50 --requests 500
+    cd ai && python -m bench.loadgen --clients 50 --requests 500 --json before.json
+    cd ai && python -m bench.loadgen --clients 50 --requests 500 --baseline before.json   # 변화량 같이 출력
+    cd ai && python -m bench.loadgen --url http://localhost:8000 --pid 1234                # 이미 떠 있는 서버 (실제 LLM)
+
+--url 이 없으면 같은 프로세스에 uvicorn을 띄우고 가짜 모델/검색 도구를
+build_graph(overrides=...)로 주입 (외부 API 호출 없음, seed 고정으로 지연 순서 재현).
+"""
+import argparse
+import asyncio
+import json
+import resource
+import socket
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from bench.fakes import fake_overrides
+
+MESSAGES = (
+    "내일부터 진짜 열심히 할 건데 어떻게 생각해?",
+    "여자친구가 두쫀쿠 안 사줬다고 시간을 갖자고 하네",
+    "퇴사하고 유튜버 할래",
+    "취업 준비 중인데 너무 지쳤어",
+    "코인으로 한방에 인생역전 해야지",
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """/proc/<pid>/status의 VmRSS (리눅스 외에는 None)"""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def make_payload(i: int, history_turns: int, with_image: bool) -> dict:
+    history = []
+    for t in range(history_turns):
+        history.append({"role": "user", "content": f"{MESSAGES[t % len(MESSAGES)]} ({t})"})
+        history.append({"role": "assistant", "content": "그 말 몇 번째야? 오늘 30분만 해봐."})
+    payload = {
+        "session_id": f"loadgen-{i}",
+        "user_message": MESSAGES[i % len(MESSAGES)],
+        "level": "spicy",
+        "category": "etc",
+        "history": history,
+    }
+    if with_image:
+        payload["images"] = ["/9j/4AAQSkZJRgABAQ"]
+    return payload
+
+
+async def one_request(client: httpx.AsyncClient, url: str, payload: dict) -> dict:
+    """SSE 스트림 하나 → {"ttft", "text_done", "total", "tokens", "chars", "queued", "error"}"""
+    start = time.perf_counter()
+    result = {"ttft": None, "text_done": None, "total": None, "tokens": 0, "chars": 0, "queued": False, "error": None}
+    event = None
+    try:
+        async with client.stream("POST", url, json=payload) as response:
+            if response.status_code != 200:
+                result["error"] = f"HTTP {response.status_code}"
+                return result
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data = line[len("data:"):].strip()
+                    now = time.perf_counter() - start
+                    if event == "token":
+                        if result["ttft"] is None:
+                            result["ttft"] = now
+                        result["tokens"] += 1
+                        result["chars"] += len(json.loads(data).get("content", ""))
+                    elif event == "status" and '"queued"' in data:
+                        result["queued"] = True
+                    elif event == "done" and '"text"' in data and result["text_done"] is None:
+                        result["text_done"] = now
+                    elif event == "error":
+                        result["error"] = data[:200]
+    except httpx.HTTPError as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["total"] = time.perf_counter() - start
+    return result
+
+
+async def _sample_rss(stop: asyncio.Event, pid: Optional[int], samples: list, interval: float = 0.1):
+    while not stop.is_set():
+        value = rss_mb(pid)
+        if value is not None:
+            samples.append(value)
+        await asyncio.sleep(interval)
+
+
+async def drive(base_url: str, clients: int, requests: int, history_turns: int, with_image: bool,
+                pid: Optional[int]) -> dict:
+    url = f"{base_url.rstrip('/')}/agent/chat"
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+    results: list = []
+
+    async def client_loop(client: httpx.AsyncClient):
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results.append(await one_request(client, url, make_payload(i, history_turns, with_image)))
+
+    stop = asyncio.Event()
+    rss_samples: list = []
+    rss_before = rss_mb(pid)
+    sampler = asyncio.create_task(_sample_rss(stop, pid, rss_samples))
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=120, limits=httpx.Limits(max_connections=clients)) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+
+    ok = [r for r in results if r["error"] is None and r["ttft"] is not None]
+    report = {
+        "clients": clients,
+        "requests": requests,
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "rejected": sum(r["error"] == "HTTP 429" for r in results),
+        "queued": sum(r["queued"] for r in results),
+        "wall_s": elapsed,
+        "throughput_rps": len(ok) / elapsed,
+        "tokens_per_s": sum(r["tokens"] for r in ok) / elapsed,
+        "rss_before_mb": rss_before,
+        "rss_peak_mb": max(rss_samples) if rss_samples else None,
+        "rss_after_mb": rss_mb(pid),
+    }
+    if pid is None:
+        report["ru_maxrss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    for key in ("ttft", "text_done", "total"):
+        values = [r[key] * 1000 for r in ok if r[key] is not None]
+        for q in (0.5, 0.95, 0.99):
+            report[f"{key}_p{int(q * 100)}_ms"] = percentile(values, q)
+    first_errors = sorted({r["error"] for r in results if r["error"]})[:3]
+    if first_errors:
+        report["sample_errors"] = first_errors
+    return report
+
+
+async def run_in_process(args) -> dict:
+    """같은 프로세스에 uvicorn + 가짜 모델 주입 그래프"""
+    import uvicorn
+
+    from app import main as app_main
+    from app.agent.graph import build_graph
+
+    overrides = fake_overrides(
+        latency=args.latency, chunk_delay=args.chunk_delay, search_latency=args.search_latency,
+        search_query=args.search_query, jitter=args.jitter, seed=args.seed,
+    )
+    app_main.agent_executor = build_graph(overrides=overrides)
+    app_main.AI_WARMUP = "off"  # 가짜 모델만 쓰므로 실제 provider 워밍업이 측정에 끼지 않게
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app_main.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        return await drive(f"http://127.0.0.1:{port}", args.clients, args.requests, args.history,
+                           args.image, None)
+    finally:
+        server.should_exit = True
+        await server_task
+
+
+def print_report(report: dict, baseline: Optional[dict]):
+    print(f"\nclients {report['clients']}, requests {report['requests']} "
+          f"(ok {report['ok']}, errors {report['errors']}), wall {report['wall_s']:.2f}s")
+    if report.get("queued") or report.get("rejected"):
+        print(f"  입장 대기 {report['queued']}건, 429 거절 {report['rejected']}건")
+    for msg in report.get("sample_errors", []):
+        print(f"  error: {msg}")
+    print(f"{'':<12}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for key, label in (("ttft", "TTFT"), ("text_done", "text done"), ("total", "total")):
+        row = f"{label:<12}"
+        for q in (50, 95, 99):
+            value = report[f"{key}_p{q}_ms"]
+            row += f"{value:>8.0f}ms"
+            if baseline and f"{key}_p{q}_ms" in baseline:
+                row += f"({value - baseline[f'{key}_p{q}_ms']:+.0f})"
+        print(row)
+    print(f"throughput  {report['throughput_rps']:.1f} req/s, {report['tokens_per_s']:.0f} token events/s"
+          + (f" (기준 {baseline['throughput_rps']:.1f} req/s)" if baseline else ""))
+    rss = [f"{name} {report[key]:.0f}MB" for name, key in
+           (("시작", "rss_before_mb"), ("최대", "rss_peak_mb"), ("끝", "rss_after_mb"), ("ru_maxrss", "ru_maxrss_mb"))
+           if report.get(key) is not None]
+    if rss:
+        print("RSS         " + ", ".join(rss))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="이미 떠 있는 서버 주소 (없으면 같은 프로세스에 가짜 모델로 띄움)")
+    parser.add_argument("--pid", type=int, help="--url 서버의 PID (RSS 측정용)")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--history", type=int, default=0, help="요청마다 붙일 이전 대화 턴 수")
+    parser.add_argument("--image", action="store_true", help="요청마다 이미지 한 장 첨부")
+    parser.add_argument("--latency", type=float, default=0.3, help="가짜 모델 첫 토큰 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="첫 토큰 지연 꼬리(지수분포 평균, 초)")
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    parser.add_argument("--search-latency", type=float, default=0.5)
+    parser.add_argument("--search-query", default="NONE")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="결과 저장 (다음 --baseline 으로 사용)")
+    parser.add_argument("--baseline", type=Path, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    if args.url:
+        report = asyncio.run(drive(args.url, args.clients, args.requests, args.history, args.image, args.pid))
+    else:
+        report = asyncio.run(run_in_process(args))
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_report(report, baseline)
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+PDF 후속 턴 프롬프트 비용: pdf_text 전체를 넣는 기존 방식 vs pdf_retriever로 관련 청크만 토큰 예산 안에서.
+페이지마다 주제가 다른 10페이지 포트폴리오(가짜 extract_pdfs 결과)에 페이지별 질문을 던져서
+문서 토큰 수, 정답 페이지가 발췌에 들어갔는지(recall), 색인 생성 시간 / 크기, 턴당 검색 시간을 출력.
+
+    cd ai && python -m bench.pdf_retrieval
+    cd ai && python -m bench.pdf_retrieval --budget 1000 --repeat 5
+"""
+import argparse
+import statistics
+import time
+
+from app.agent.history import count_tokens
+from app.tools import pdf_retriever
+
+# 페이지 주제 → (본문 문장, 그 페이지를 묻는 질문)
+PAGES = [
+    ("자기소개", "안녕하세요 백엔드 개발자를 꿈꾸는 지원자입니다. 컴퓨터공학을 전공했고 협업과 문서화를 중요하게 생각합니다.",
+     "자기소개 첫 문장 너무 뻔하지 않아?"),
+    ("학력", "한국대학교 컴퓨터공학과 졸업, 학점 3.4/4.5, 자료구조와 운영체제 과목에서 A+를 받았습니다.",
+     "학점 3.4면 서류에서 걸러져?"),
+    ("쇼핑몰 프로젝트", "Spring Boot와 MySQL로 쇼핑몰 주문 시스템을 만들었고 재고 동시성 문제를 비관적 락으로 해결했습니다.",
+     "쇼핑몰 주문 프로젝트 재고 동시성 설명 괜찮아?"),
+    ("채팅 프로젝트", "WebSocket 기반 실시간 채팅 서버를 구현했고 Redis pub/sub으로 서버 여러 대에 메시지를 전달했습니다.",
+     "채팅 서버 Redis pub/sub 부분 면접에서 뭐 물어볼까?"),
+    ("대외활동", "교내 알고리즘 동아리 회장으로 스터디를 운영했고 해커톤에서 우수상을 받았습니다.",
+     "동아리 회장 경험 어필 돼?"),
+    ("자격증", "정보처리기사와 SQLD 자격증을 취득했고 토익 점수는 780점입니다.",
+     "토익 780 자격증 이거 의미 있어?"),
+    ("인턴 경험", "스타트업에서 3개월 인턴으로 일하며 결제 API 연동과 배치 작업 모니터링을 맡았습니다.",
+     "스타트업 인턴 결제 API 경험 더 강조해야 해?"),
+    ("기술 스택", "Java, Kotlin, Spring, JPA, Docker, AWS EC2와 GitHub Actions로 배포 자동화를 해봤습니다.",
+     "기술 스택에 Docker AWS 배포 자동화 적은 거 과장이야?"),
+    ("트러블슈팅", "N+1 쿼리 문제를 fetch join으로 해결해 주문 목록 API 응답 시간을 1.2초에서 200ms로 줄였습니다.",
+     "N+1 쿼리 해결 사례 숫자가 너무 작아?"),
+    ("입사 후 포부", "입사 후에는 안정적인 서비스를 위해 테스트 코드와 장애 대응 문서를 꾸준히 쌓고 싶습니다.",
+     "입사 후 포부 마무리 너무 평범해?"),
+]
+FILLER = "이 경험을 통해 문제를 정의하고 해결 과정을 기록하는 습관을 길렀습니다. 팀원과 코드 리뷰를 하며 읽기 좋은 코드를 고민했습니다."
+
+
+def make_pdf_text(lines_per_page: int) -> str:
+    pages = []
+    for i, (title, body, _) in enumerate(PAGES, start=1):
+        lines = [f"{title}", body] + [f"{FILLER} ({title} {j})" for j in range(lines_per_page)]
+        pages.append(f"[{i}페이지]\n" + "\n".join(lines))
+    return "[문서: 포트폴리오.pdf]\n" + "\n".join(pages)
+
+
+def run(args):
+    pdf_text = make_pdf_text(args.lines)
+    full_tokens = count_tokens(pdf_text)
+
+    start = time.perf_counter()
+    index = pdf_retriever.build_index(pdf_text)
+    build_ms = (time.perf_counter() - start) * 1000
+    pdf_retriever.get_index(pdf_text)  # 캐시에 올려둠
+
+    tokens, recalls, select_ms = [], [], []
+    history = [{"role": "user", "content": "포트폴리오 봐줘"}, {"role": "assistant", "content": "..."}]
+    for page, (title, _, question) in enumerate(PAGES, start=1):
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            context = pdf_retriever.select_context(pdf_text, question, history, budget=args.budget)
+            select_ms.append((time.perf_counter() - start) * 1000)
+        tokens.append(count_tokens(context))
+        recalls.append(f"/ {page}페이지]" in context)
+        if args.verbose:
+            print(f"  {question[:28]:<30} → {context.count('[문서:')}개 청크, {tokens[-1]}토큰, 정답 페이지 {'O' if recalls[-1] else 'X'}")
+
+    generic = pdf_retriever.select_context(pdf_text, "이거 어때?", [], budget=args.budget)
+    print(f"문서 {len(pdf_text):,}자, 청크 {len(index['chunks'])}개, 예산 {args.budget}토큰")
+    print(f"문서 토큰/턴: 전체 {full_tokens:,} → 발췌 평균 {statistics.mean(tokens):.0f} "
+          f"(최대 {max(tokens)}), 정답 페이지 포함 {sum(recalls)}/{len(recalls)}")
+    print(f"겹치는 단어 없는 질문: {generic.count('[문서:')}개 청크 (페이지 {len(set(generic.split('페이지]')) ) - 1}곳 앞부분)")
+    size = sum(v.nbytes for v in index.values() if hasattr(v, "nbytes"))
+    print(f"색인 생성 {build_ms:.1f}ms (문서당 1회), 배열 {size / 1024:.0f}KB, 턴당 검색 p50 {statistics.median(select_ms):.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=12, help="페이지당 채움 문장 수 (문서 길이)")
+    parser.add_argument("--budget", type=int, default=pdf_retriever.PDF_CONTEXT_TOKENS)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--verbose", action="store_true")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+본 응답 프롬프트의 캐시 가능한 prefix 점검: 서로 다른 턴(날짜/카테고리/검색 결과/문서가 다름)에서
+provider별로 렌더링한 앞부분이 바이트 단위로 같은지, 턴당 입력 중 몇 %가 prefix인지.
+
+    cd ai && python -m bench.prompt_cache
+"""
+import asyncio
+
+from app.agent import prompt_cache
+from app.agent.history import count_tokens
+from app.agent.registry import MODEL_DEFAULTS
+
+TURNS = [
+    {"category": "career", "factcheck": "검색 불필요", "image_analysis": "없음", "pdf_text": "없음"},
+    {"category": "love", "factcheck": "[두쫀쿠] 두바이 쫀득 쿠키, 2025년 유행 디저트", "image_analysis": "없음",
+     "pdf_text": "없음"},
+    {"category": "self", "factcheck": "검색 불필요", "image_analysis": "상황 요약: 게임 화면",
+     "pdf_text": "[문서: 자소서.pdf]\n[1페이지]\n지원 동기: 어릴 때부터..." * 20},
+]
+
+
+def _prefix_text(messages: list) -> str:
+    first = messages[0].content
+    if isinstance(first, list):
+        # anthropic: cache_control이 붙은 블록까지가 prefix
+        return "".join(block["text"] for block in first if "cache_control" in block)
+    return first[: len(prompt_cache.STATIC_SYSTEM_PROMPT)]
+
+
+async def run():
+    static_tokens = count_tokens(prompt_cache.STATIC_SYSTEM_PROMPT)
+    print(f"고정 prefix: {len(prompt_cache.STATIC_SYSTEM_PROMPT)}자, 약 {static_tokens} tokens "
+          f"(anthropic/openai/gemini 최소 캐시 단위 1024~2048 tokens)")
+    for provider in ("anthropic", "openai", "google"):
+        MODEL_DEFAULTS["bench"] = (provider, "model", None)
+        prefixes, shares = set(), []
+        for turn in TURNS:
+            volatile = prompt_cache.volatile_context(turn, summary=None)
+            messages, _ = await prompt_cache.build_prompt("bench", None, volatile)
+            prefixes.add(_prefix_text(messages))
+            shares.append(static_tokens / (static_tokens + count_tokens(volatile)))
+        stable = len(prefixes) == 1 and prefixes.pop() == prompt_cache.STATIC_SYSTEM_PROMPT
+        print(f"{provider:<10} prefix 동일: {'PASS' if stable else 'FAIL'}  "
+              f"턴별 캐시 가능 비율: {', '.join(f'{s:.0%}' for s in shares)}")
+    del MODEL_DEFAULTS["bench"]
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+"""
+검색어 추출 단계에서 로컬 사전 필터 + 메모 캐시가 줄여주는 LLM 호출 수/지연 리플레이.
+
+    cd ai && python -m bench.query_filter --latency 0.4
+    cd ai && python -m bench.query_filter --corpus my_messages.txt
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from bench.fakes import install_fakes
+from app.agent import graph
+from app.tools import query_filter
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "data" / "messages.txt"
+
+
+def load_corpus(path: Path) -> list[str]:
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+async def run(corpus: list[str], latency: float):
+    fake, _ = install_fakes(latency=latency, search_query="검색어")
+    query_filter.load_vocab()
+
+    start = time.perf_counter()
+    decisions = []
+    for message in corpus:
+        before = fake.calls
+        t = time.perf_counter()
+        await graph._extract_search_query(message)
+        decisions.append((message, fake.calls > before, time.perf_counter() - t))
+    elapsed = time.perf_counter() - start
+
+    llm_calls = sum(1 for _, called, _ in decisions if called)
+    avoided = len(corpus) - llm_calls
+    baseline = len(corpus) * latency  # 기존: 모든 메시지마다 LLM 1회
+
+    print(f"messages:            {len(corpus)}")
+    print(f"prefilter NONE:      {query_filter.stats['skipped']}")
+    print(f"memo hits:           {query_filter.query_memo.hits}")
+    print(f"LLM calls:           {llm_calls} (기존 {len(corpus)})")
+    print(f"LLM calls avoided:   {avoided} ({avoided / len(corpus) * 100:.0f}%)")
+    print(f"extract time:        {elapsed:.2f}s (기존 추정 {baseline:.2f}s, 절감 {baseline - elapsed:.2f}s)")
+    print(f"avg per message:     {elapsed / len(corpus) * 1000:.1f}ms (기존 {latency * 1000:.0f}ms)")
+    print("\nLLM으로 넘어간 메시지:")
+    for message, called, _ in decisions:
+        if called:
+            print(f"  - {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--latency", type=float, default=0.4, help="가짜 llm_mini 응답 지연 (초)")
+    args = parser.parse_args()
+    asyncio.run(run(load_corpus(args.corpus), args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+로컬 휴리스틱 채점기 ↔ LLM 채점 일치도 리포트.
+리플레이 코퍼스(JSONL: {"user", "ai"?, "llm"?})의 각 메시지를 두 채점기로 채점해서
+항목별 MAE / 상관계수 / ±3점 이내 비율 / 방향(기준점 10 대비 높음·보통·낮음) 일치율,
+가장 크게 어긋난 메시지와 휴리스틱 근거, 1건당 채점 시간을 출력.
+
+    cd ai && python -m bench.score_agreement                         # 실제 LLM (score 슬롯) 호출
+    cd ai && python -m bench.score_agreement --save scored.jsonl     # LLM 점수를 채워서 저장 → 다음부터 재사용
+    cd ai && python -m bench.score_agreement --corpus scored.jsonl
+    cd ai && python -m bench.score_agreement --fake                  # 가짜 LLM (오프라인 동작 확인용)
+
+"llm" 필드(breakdown 형식)가 이미 있는 줄은 LLM을 다시 부르지 않음.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+
+from app.tools.heuristic_scorer import DIMENSIONS, heuristic_score
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "data" / "score_corpus.jsonl"
+DIRECTION_BAND = 2  # 10±2 는 "보통"
+
+
+def load_corpus(path: Path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def fill_llm_scores(items: list, concurrency: int) -> int:
+    """llm 점수가 없는 줄만 LLM으로 채점. 실패 건수 반환 (실패한 줄은 비교에서 제외)"""
+    from app.tools import calculator
+
+    calculator.SCORE_HEURISTIC_MODE = "off"  # 실패 시 휴리스틱으로 채워지면 비교가 무의미
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def one(item: dict):
+        nonlocal failed
+        async with semaphore:
+            result, source = await calculator.score_with_source(item["user"], item.get("ai", ""))
+            if source != "llm":
+                failed += 1
+                return
+            item["llm"] = result["breakdown"]
+            item["llm_summary"] = result["summary"]
+
+    await asyncio.gather(*(one(item) for item in items if "llm" not in item))
+    return failed
+
+
+def _direction(score: int) -> int:
+    return 0 if abs(score - 10) <= DIRECTION_BAND else (1 if score > 10 else -1)
+
+
+def _pearson(xs: list, ys: list) -> float:
+    if len(xs) < 2 or statistics.pstdev(xs) == 0 or statistics.pstdev(ys) == 0:
+        return float("nan")
+    return statistics.correlation(xs, ys)
+
+
+def report(items: list, worst: int):
+    scored = [item for item in items if "llm" in item]
+    local = [heuristic_score(item["user"]) for item in scored]
+
+    print(f"\n비교 대상: {len(scored)}/{len(items)}건")
+    print(f"{'항목':<20}{'MAE':>7}{'r':>8}{'±3 이내':>10}{'방향 일치':>10}{'근거 있음':>10}")
+    for dim in DIMENSIONS + ("total",):
+        if dim == "total":
+            xs = [sum(item["llm"][d] for d in DIMENSIONS) for item in scored]
+            ys = [result["total"] for result in local]
+            within, direction, covered = 10, None, None
+        else:
+            xs = [item["llm"][dim] for item in scored]
+            ys = [result["breakdown"][dim] for result in local]
+            within = 3
+            direction = sum(_direction(x) == _direction(y) for x, y in zip(xs, ys)) / max(len(xs), 1)
+            covered = sum(dim in result["evidence"] for result in local) / max(len(xs), 1)
+        mae = statistics.fmean(abs(x - y) for x, y in zip(xs, ys)) if xs else float("nan")
+        close = sum(abs(x - y) <= within for x, y in zip(xs, ys)) / max(len(xs), 1)
+        print(f"{dim:<20}{mae:>7.2f}{_pearson(xs, ys):>8.2f}{close:>10.0%}"
+              + (f"{direction:>10.0%}{covered:>10.0%}" if direction is not None else f"{'':>10}{'':>10}"))
+    print("  (total의 '±3 이내' 열은 ±10 이내 비율)")
+
+    gaps = sorted(
+        zip(scored, local),
+        key=lambda pair: -sum(abs(pair[0]["llm"][d] - pair[1]["breakdown"][d]) for d in DIMENSIONS),
+    )
+    print(f"\n가장 크게 어긋난 {worst}건 (항목 순서: {', '.join(d.split('_')[0] for d in DIMENSIONS)})")
+    for item, result in gaps[:worst]:
+        llm = [item["llm"][d] for d in DIMENSIONS]
+        ours = [result["breakdown"][d] for d in DIMENSIONS]
+        hits = ", ".join(f"{k}{w:+d}" for hits in result["evidence"].values() for k, w in hits) or "근거 없음"
+        print(f"  {item['user'][:40]}")
+        print(f"    LLM {llm}  휴리스틱 {ours}  [{hits}]")
+
+
+def time_heuristic(items: list, repeat: int = 20) -> float:
+    texts = [item["user"] for item in items]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            heuristic_score(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+async def run(args):
+    if args.fake:
+        from bench.fakes import install_fakes
+
+        install_fakes(latency=0.05, chunk_delay=0)
+
+    items = load_corpus(args.corpus)
+    if args.limit:
+        items = items[:args.limit]
+    pending = sum("llm" not in item for item in items)
+    if pending:
+        print(f"LLM 채점 {pending}건 ...")
+        start = time.perf_counter()
+        failed = await fill_llm_scores(items, args.concurrency)
+        print(f"  {time.perf_counter() - start:.1f}s, 실패 {failed}건")
+        if args.save:
+            with open(args.save, "w", encoding="utf-8") as f:
+                for item in items:
+                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            print(f"  저장: {args.save}")
+
+    report(items, args.worst)
+    print(f"\n휴리스틱 채점: {time_heuristic(items):.1f}µs/건")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--save", type=Path, help="LLM 점수를 채운 코퍼스 저장 경로")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--worst", type=int, default=5)
+    parser.add_argument("--fake", action="store_true", help="가짜 LLM으로 실행 (오프라인)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+일괄 재채점 처리량: 호출당 항목 수(batch size)별 건/s와 LLM 호출 수, 체크포인트 이어하기 / 장애 후 재채점 확인.
+
+    cd ai && python -m bench.score_batch --items 400 --latency 1.0
+
+가짜 score 모델은 항목 수와 무관하게 호출당 `latency`초 → 실제로는 출력 토큰이 늘어나는 만큼
+호출당 시간도 늘어나므로, 여기 숫자는 batch size 이득의 상한.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from bench.fakes import FakeChatModel, install_fakes
+from app.agent import registry
+from app.tools import batch_scorer
+from app.tools.batch_scorer import Checkpoint, score_items
+
+
+def make_items(n: int) -> list:
+    return [
+        {"id": f"msg-{i}", "user_message": f"내일부터 진짜 열심히 할 거야 {i}", "ai_response": "그 말 몇 번째야?"}
+        for i in range(n)
+    ]
+
+
+async def measure(items: list, concurrency: int, batch_size: int, model: FakeChatModel) -> tuple:
+    before = model.calls
+    start = time.perf_counter()
+    count = 0
+    async for _ in score_items(items, concurrency, batch_size):
+        count += 1
+    return count, time.perf_counter() - start, model.calls - before
+
+
+async def resume_check(items: list, concurrency: int, batch_size: int, model: FakeChatModel):
+    """절반쯤에서 끊고 같은 체크포인트로 다시 돌렸을 때 중복/누락 없이 이어지는지"""
+    path = Path(tempfile.mkdtemp()) / "scores.ndjson"
+    checkpoint = Checkpoint(path)
+    seen = 0
+    async for _ in score_items(items, concurrency, batch_size, checkpoint):
+        seen += 1
+        if seen >= len(items) // 2:
+            break  # 연결 끊김 흉내
+    checkpoint.close()
+    # 강제 종료로 마지막 줄이 잘린 상황도 흉내
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"id": "msg-')
+
+    checkpoint = Checkpoint(path)
+    done_before = len(checkpoint.done)
+    before = model.calls
+    async for _ in score_items(items, concurrency, batch_size, checkpoint):
+        pass
+    checkpoint.close()
+
+    ids = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                ids.append(json.loads(line)["id"])
+            except ValueError:
+                continue
+    ok = len(ids) == len(set(ids)) == len(items)
+    print(f"\n이어하기: 1차 {done_before}건 완료 → 2차 LLM {model.calls - before}회, "
+          f"최종 {len(set(ids))}/{len(items)}건, 중복 {len(ids) - len(set(ids))}건 → {'PASS' if ok else 'FAIL'}")
+
+
+async def outage_check(items: list, concurrency: int, batch_size: int, model: FakeChatModel):
+    """provider 장애 중 돌린 뒤 복구 후 같은 체크포인트로 다시 돌렸을 때 실패분만 재채점되는지 + 장애 중 호출 수"""
+    items = items[: batch_size * concurrency]
+    path = Path(tempfile.mkdtemp()) / "scores.ndjson"
+    batch_scorer.SCORE_BATCH_BACKOFF = 0.01
+    model.fail_calls = 10 ** 6
+    checkpoint = Checkpoint(path)
+    before = model.calls
+    failed = sum([1 async for record in score_items(items, concurrency, batch_size, checkpoint)
+                  if record["source"] in batch_scorer.FAILED_SOURCES])
+    checkpoint.close()
+    outage_calls = model.calls - before
+
+    model.fail_calls = 0
+    checkpoint = Checkpoint(path)
+    done_before = len(checkpoint.done)
+    rescored = sum([1 async for _ in score_items(items, concurrency, batch_size, checkpoint)])
+    checkpoint.close()
+    ok = failed == len(items) and done_before == 0 and rescored == len(items)
+    chunks = -(-len(items) // batch_size)
+    print(f"장애: {len(items)}건 실패, LLM {outage_calls}회 (chunk {chunks}개 x 시도 {batch_scorer.SCORE_BATCH_RETRIES + 1}), "
+          f"체크포인트 완료 {done_before}건 → 복구 후 {rescored}건 재채점 → {'PASS' if ok else 'FAIL'}")
+
+
+async def run(n: int, latency: float, concurrency: int, sizes: list):
+    install_fakes(latency=latency, chunk_delay=0)
+    model = FakeChatModel(latency=latency, chunk_delay=0)
+    registry.override("score", model)
+    items = make_items(n)
+
+    print(f"{n}건, 동시 호출 {concurrency}, 호출당 {latency:.1f}s")
+    print(f"{'batch':>6}{'시간':>9}{'건/s':>9}{'LLM 호출':>10}")
+    for size in sizes:
+        count, elapsed, calls = await measure(items, concurrency, size, model)
+        print(f"{size:>6}{elapsed:>8.2f}s{count / elapsed:>9.1f}{calls:>10}")
+
+    await resume_check(items, concurrency, max(sizes), model)
+    await outage_check(items, concurrency, max(sizes), model)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.latency, args.concurrency, args.sizes))
+
+
+if __name__ == "__main__":
+    main()
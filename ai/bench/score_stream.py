@@ -0,0 +1,65 @@
+"""
+채점 순차(sequential) vs 동시(concurrent) 모드의 SSE 완료 시간 비교.
+app.main.real_agent_generator를 그대로 돌려서 본문 done / score / 마지막 done 도착 시각을 잰다.
+
+    cd ai && python -m bench.score_stream --runs 5 --score-latency 2.0
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from bench.fakes import FakeChatModel, install_fakes
+from app import main as app_main
+from app.agent import registry
+from app.agent.graph import build_graph
+
+
+async def measure(runs: int) -> dict:
+    times = {"text_done": [], "score": [], "end": []}
+    for i in range(runs):
+        request = app_main.ChatRequest(
+            session_id=f"bench-score-{i}", user_message=f"내일부터 진짜 열심히 해서 유튜브로 월 1억 벌 거야 {i}",
+            level="spicy", category="career", history=[],
+        )
+        start = time.perf_counter()
+        async for event in app_main.real_agent_generator(request):
+            now = time.perf_counter() - start
+            if event["event"] == "done" and "text" in event["data"]:
+                times["text_done"].append(now)
+            elif event["event"] == "score":
+                times["score"].append(now)
+        times["end"].append(time.perf_counter() - start)
+    return {k: statistics.median(v) * 1000 for k, v in times.items() if v}
+
+
+async def run(runs: int, latency: float, score_latency: float):
+    install_fakes(latency=latency, chunk_delay=0.02, search_latency=0.3)
+    score_model = FakeChatModel(latency=score_latency, chunk_delay=0)
+    registry.override("score", score_model)
+
+    results = {}
+    for mode in ("sequential", "concurrent"):
+        app_main.agent_executor = build_graph(score_mode=mode)
+        before = score_model.calls
+        results[mode] = await measure(runs)
+        results[mode]["score_calls"] = (score_model.calls - before) / runs
+
+    print(f"\n{'mode':<12}{'text done':>12}{'score':>10}{'end':>10}{'score calls':>13}")
+    for mode, r in results.items():
+        print(f"{mode:<12}{r['text_done']:>10.0f}ms{r['score']:>8.0f}ms{r['end']:>8.0f}ms{r['score_calls']:>13.1f}")
+    saved = results["sequential"]["end"] - results["concurrent"]["end"]
+    print(f"완료 시간 단축: {saved:.0f}ms ({saved / results['sequential']['end']:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--score-latency", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.runs, args.latency, args.score_latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+응답 생성 sequential vs speculative(GENERATE_MODE) 모드 비교.
+검색어 추출이 다른 준비 단계보다 느릴 때, 검색이 필요 없는 메시지(hit)와 검색이 필요한 메시지(miss)에서
+app.main.real_agent_generator의 첫 token / 본문 done 도착 시각과 버린 추측 생성 토큰을 잰다.
+
+    cd ai && python -m bench.speculative --runs 5 --extract-latency 0.8
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from bench.fakes import fake_overrides
+from app import main as app_main
+from app.agent import graph
+from app.agent.graph import build_graph
+
+# 사전 필터(query_filter)가 바로 NONE으로 처리하지 않도록 처음 보는 단어가 들어간 메시지
+MESSAGE = "요즘 두바이쫀득쿠키 유행이라던데 그거 팔아서 월 천 벌 거야"
+EXTRACT_PROMPT_KEY = "실시간 정보나 최신 유행어"
+
+
+async def measure(runs: int, tag: str) -> dict:
+    times = {"ttft": [], "text_done": []}
+    for i in range(runs):
+        request = app_main.ChatRequest(
+            session_id=f"bench-spec-{tag}-{i}", user_message=f"{MESSAGE} {tag}{i}",  # 검색어 메모 캐시 안 타게
+            level="spicy", category="career", history=[],
+        )
+        start = time.perf_counter()
+        async for event in app_main.real_agent_generator(request):
+            now = time.perf_counter() - start
+            if event["event"] == "token" and not times["ttft"][i:]:
+                times["ttft"].append(now)
+            elif event["event"] == "done" and "text" in event["data"]:
+                times["text_done"].append(now)
+    return {k: statistics.median(v) * 1000 for k, v in times.items() if v}
+
+
+def _counter(metric, *labels) -> float:
+    return metric.values.get(labels, 0.0)
+
+
+async def run(args):
+    print(f"모델 {args.latency:.1f}s, 검색어 추출 {args.extract_latency:.1f}s, 검색 {args.search_latency:.1f}s, "
+          f"보류 상한 {graph.SPECULATIVE_HOLD_CHARS}자")
+    print(f"\n{'':<8}{'mode':<13}{'첫 token':>10}{'본문 done':>11}{'LLM 호출':>10}{'버린 토큰':>10}")
+    for case, query in (("hit", "NONE"), ("miss", "두바이쫀득쿠키")):
+        overrides = fake_overrides(latency=args.latency, chunk_delay=args.chunk_delay,
+                                   search_latency=args.search_latency, search_query=query, response_repeat=4)
+        overrides["mini"].prompt_latency = {EXTRACT_PROMPT_KEY: args.extract_latency}
+        results = {}
+        for mode in ("sequential", "speculative"):
+            app_main.agent_executor = build_graph(triage_mode="split", score_mode="sequential",
+                                                  overrides=overrides, generate_mode=mode)
+            calls = overrides["main"].calls
+            wasted = _counter(graph.speculation_wasted_tokens)
+            results[mode] = await measure(args.runs, f"{case}-{mode}")
+            results[mode]["llm_calls"] = (overrides["main"].calls - calls) / args.runs
+            results[mode]["wasted"] = (_counter(graph.speculation_wasted_tokens) - wasted) / args.runs
+        for mode, r in results.items():
+            print(f"{case:<8}{mode:<13}{r['ttft']:>8.0f}ms{r['text_done']:>9.0f}ms"
+                  f"{r['llm_calls']:>10.1f}{r['wasted']:>10.0f}")
+
+    hits, misses = _counter(graph.speculation_total, "hit"), _counter(graph.speculation_total, "miss")
+    print(f"\nhit {hits:.0f}, miss {misses:.0f}, skipped {_counter(graph.speculation_total, 'skipped'):.0f}"
+          f" → hit rate {hits / max(hits + misses, 1):.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3, help="검색어 추출 외 모델 첫 토큰 지연")
+    parser.add_argument("--extract-latency", type=float, default=0.8, help="검색어 추출 LLM 지연")
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--chunk-delay", type=float, default=0.01)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+SSE 스트리밍 비용: 동시 스트림 N개(기본 200)를 열고 응답 하나당 SSE 이벤트 수 / 전송 바이트 / 서버 CPU,
+초당 이벤트 수, TTFT를 token 묶기 설정(STREAM_COALESCE_MS)별로 비교.
+
+    cd ai && python -m bench.stream
+    cd ai && python -m bench.stream --streams 200 --windows 0 30 60 --chunk-size 2 --repeat 8
+
+설정마다 서버를 별도 프로세스로 띄움 (가짜 모델 주입, --serve 모드) → 서버 CPU는 /proc/<pid>/stat의
+utime+stime 차이라 클라이언트 파싱 비용이 섞이지 않음 (리눅스 전용).
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from bench.loadgen import _free_port, make_payload, percentile
+
+AI_ROOT = Path(__file__).resolve().parents[1]
+
+
+def server_cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # ")" 뒤 기준 utime=12번째, stime=13번째 (전체 필드 기준 14, 15)
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def one_stream(client: httpx.AsyncClient, url: str, payload: dict) -> dict:
+    start = time.perf_counter()
+    result = {"events": 0, "tokens": 0, "bytes": 0, "chars": 0, "ttft": None, "error": None}
+    event = None
+    buffer = b""
+    try:
+        async with client.stream("POST", url, json=payload) as response:
+            if response.status_code != 200:
+                result["error"] = f"HTTP {response.status_code}"
+                return result
+            async for raw in response.aiter_raw():
+                result["bytes"] += len(raw)
+                buffer += raw
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    line = line.rstrip(b"\r")
+                    if line.startswith(b"event:"):
+                        event = line[6:].strip()
+                        result["events"] += 1
+                    elif line.startswith(b"data:") and event == b"token":
+                        if result["ttft"] is None:
+                            result["ttft"] = time.perf_counter() - start
+                        result["tokens"] += 1
+                        result["chars"] += len(json.loads(line[5:]).get("content", ""))
+    except httpx.HTTPError as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+async def drive(base_url: str, pid: int, streams: int, total: int) -> dict:
+    url = f"{base_url}/agent/chat"
+    async with httpx.AsyncClient(timeout=300, limits=httpx.Limits(max_connections=streams)) as client:
+        for _ in range(50):  # 서버 기동 대기
+            try:
+                if (await client.get(f"{base_url}/agent/health")).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+        await asyncio.gather(*(one_stream(client, url, make_payload(i, 0, False)) for i in range(5)))  # 워밍업
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(i)
+        results: list = []
+
+        async def worker():
+            while not queue.empty():
+                i = queue.get_nowait()
+                results.append(await one_stream(client, url, make_payload(1000 + i, 0, False)))
+
+        cpu_before = server_cpu_seconds(pid)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(streams)))
+        wall = time.perf_counter() - start
+        cpu = server_cpu_seconds(pid) - cpu_before
+
+    ok = [r for r in results if r["error"] is None]
+    for error in sorted({r["error"] for r in results if r["error"]})[:3]:
+        print(f"  error: {error}")
+    n = max(len(ok), 1)
+    return {
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "wall_s": wall,
+        "events_per_s": sum(r["events"] for r in ok) / wall,
+        "events_per_response": sum(r["events"] for r in ok) / n,
+        "tokens_per_response": sum(r["tokens"] for r in ok) / n,
+        "bytes_per_response": sum(r["bytes"] for r in ok) / n,
+        "chars_per_response": sum(r["chars"] for r in ok) / n,
+        "cpu_ms_per_response": cpu * 1000 / n,
+        "ttft_p50_ms": percentile([r["ttft"] * 1000 for r in ok if r["ttft"]], 0.5),
+        "ttft_p95_ms": percentile([r["ttft"] * 1000 for r in ok if r["ttft"]], 0.95),
+    }
+
+
+def run_config(args, window: float) -> dict:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "STREAM_COALESCE_MS": str(window),
+        "ADMISSION_MAX_ACTIVE": str(args.streams * 2),  # 입장 대기가 측정에 끼지 않게
+        "ADMISSION_SESSION_MAX_ACTIVE": str(args.streams * 2),
+    }
+    command = [sys.executable, "-m", "bench.stream", "--serve", "--port", str(port),
+               "--chunk-size", str(args.chunk_size), "--chunk-delay", str(args.chunk_delay),
+               "--repeat", str(args.repeat)]
+    server = subprocess.Popen(command, cwd=AI_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        return asyncio.run(drive(f"http://127.0.0.1:{port}", server.pid, args.streams, args.requests))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def serve(args):
+    """설정 하나로 서버만 띄움 (run_config가 자식 프로세스로 실행)"""
+    import uvicorn
+
+    from app import main as app_main
+    from app.agent.graph import build_graph
+    from bench.fakes import fake_overrides
+
+    overrides = fake_overrides(latency=0.05, chunk_delay=args.chunk_delay, search_latency=0.05, search_query="NONE",
+                               chunk_size=args.chunk_size, response_repeat=args.repeat)
+    app_main.agent_executor = build_graph(overrides=overrides)
+    app_main.AI_WARMUP = "off"
+    uvicorn.run(app_main.app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=200, help="동시 스트림 수")
+    parser.add_argument("--requests", type=int, default=400, help="총 응답 수")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 30], help="비교할 STREAM_COALESCE_MS 값")
+    parser.add_argument("--chunk-size", type=int, default=2, help="가짜 모델 청크당 글자 수")
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="가짜 모델 청크 간격(초)")
+    parser.add_argument("--repeat", type=int, default=8, help="본 응답 길이 (기본 응답 x N)")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+        return
+
+    print(f"동시 {args.streams}스트림, 총 {args.requests}건, 청크 {args.chunk_size}자 / {args.chunk_delay * 1000:.0f}ms")
+    print(f"{'묶기':>6}{'이벤트/응답':>12}{'token/응답':>11}{'바이트/응답':>12}{'CPU/응답':>10}{'이벤트/s':>10}"
+          f"{'TTFT p50':>10}{'p95':>8}{'글자':>7}")
+    for window in args.windows:
+        r = run_config(args, window)
+        print(f"{window:>4.0f}ms{r['events_per_response']:>12.1f}{r['tokens_per_response']:>11.1f}"
+              f"{r['bytes_per_response']:>12.0f}{r['cpu_ms_per_response']:>8.1f}ms{r['events_per_s']:>10.0f}"
+              f"{r['ttft_p50_ms']:>8.0f}ms{r['ttft_p95_ms']:>6.0f}ms{r['chars_per_response']:>7.0f}"
+              + (f"  (오류 {r['errors']})" if r["errors"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+/agent/title 몰림 상황: 새 세션 N개가 거의 동시에 제목을 요청할 때
+요청마다 LLM 한 번(기존) vs 캐시 + 일괄 호출(title_generator)의 LLM 호출 수 / 응답 시간,
+모델이 TITLE_TIMEOUT보다 느릴 때 로컬 제목으로 응답하는 시간, 로컬 제목 회귀 케이스(LOCAL_CASES).
+
+    cd ai && python -m bench.title --requests 200 --latency 0.8
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from langchain_core.output_parsers import StrOutputParser
+
+from bench.fakes import FakeChatModel
+from bench.loadgen import percentile
+from app.agent import registry
+from app.tools import title_generator
+
+FIRST_MESSAGES = (
+    "도와줘", "취업 고민", "취업 고민 있어", "퇴사하고 유튜버 할래", "내일부터 진짜 열심히 할 거야",
+    "여자친구가 두쫀쿠 안 사줬다고 시간을 갖자고 하네", "코인으로 한방에 인생역전 해야지",
+    "자소서 첨삭 좀 해줘", "헤어진 남친한테 연락할까 말까", "카페인 너무 많이 마셔서 잠이 안 와",
+)
+
+# 로컬 제목 회귀 케이스: 메시지 → 기대 제목 (명사는 남기고, 조사를 떼도 용언 활용형이면 버림)
+LOCAL_CASES = (
+    ("에너지 드링크 하루에 5캔 마셔도 돼?", "에너지 드링크 하루"),
+    ("퇴사하고 유튜버 할래", "퇴사 유튜버"),
+    ("취업 고민 있는데 어떻게 해야 돼?", "취업 고민"),
+    ("여자친구가 두쫀쿠 안 사줬다고 시간을 갖자고 하네", "여자친구 두쫀쿠 시간"),
+    ("카페인 너무 많이 마셔서 잠이 안 와", "카페인 잠"),
+    ("영어 공부 어떻게 해야 돼?", "영어 공부"),
+    ("올해도 다이어트 실패했어", "올해 다이어트 실패"),
+    ("코인으로 한방에 인생역전 해야지", "코인 한방 인생역전"),
+    ("자소서 첨삭 좀 해줘", "자소서 첨삭"),
+    ("남자친구가 미래 얘기만 해", "남자친구 미래"),
+    ("라면 먹어도 돼?", "라면 고민"),
+    ("요즘 너무 지쳤어", title_generator.DEFAULT_TITLE),
+    ("살 빼고 싶어", title_generator.DEFAULT_TITLE),
+    ("대학원 갈지 취업할지", "대학원 취업"),
+    ("친구랑 놀고 싶어", "친구"),
+    ("광고 회사 이직 어떻게 해?", "광고 회사 이직"),
+    ("돼지 저금통 이름 추천", "돼지 저금통 이름"),
+)
+
+
+def local_check() -> bool:
+    failed = [(m, want, title_generator.local_title(m)) for m, want in LOCAL_CASES
+              if title_generator.local_title(m) != want]
+    for message, want, got in failed:
+        print(f"  {message} → {got} (기대: {want})")
+    print(f"로컬 제목 케이스 {len(LOCAL_CASES) - len(failed)}/{len(LOCAL_CASES)} → {'PASS' if not failed else 'FAIL'}")
+    return not failed
+
+
+def make_messages(n: int, unique_ratio: float, seed: int) -> list:
+    """흔한 첫 메시지(중복) + 사람마다 다른 메시지 섞기"""
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(FIRST_MESSAGES)} ({i})" if rng.random() < unique_ratio else rng.choice(FIRST_MESSAGES)
+        for i in range(n)
+    ]
+
+
+async def burst(messages: list, spread: float, call) -> tuple:
+    """spread초 동안 고르게 도착하는 요청들 → (요청별 응답 시간 ms, 전체 시간)"""
+    latencies = []
+
+    async def one(i: int, message: str):
+        await asyncio.sleep(spread * i / max(len(messages), 1))
+        start = time.perf_counter()
+        await call(message)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i, m) for i, m in enumerate(messages)))
+    return latencies, time.perf_counter() - start
+
+
+def _reset():
+    title_generator.title_cache._data.clear()
+    for key in title_generator.stats:
+        title_generator.stats[key] = 0
+
+
+def _row(label: str, latencies: list, calls: int):
+    print(f"{label:<22}{calls:>8}{percentile(latencies, 0.5):>9.0f}ms{percentile(latencies, 0.95):>9.0f}ms")
+
+
+async def run(args):
+    messages = make_messages(args.requests, args.unique, args.seed)
+    model = FakeChatModel(latency=args.latency, chunk_delay=0)
+    registry.override("mini", model)
+    print(f"요청 {len(messages)}건 / {args.spread:.1f}s, 서로 다른 메시지 {len(set(messages))}개, "
+          f"모델 {args.latency:.1f}s, 모으는 창 {title_generator.TITLE_BATCH_WINDOW * 1000:.0f}ms")
+    print(f"{'':<22}{'LLM 호출':>8}{'p50':>11}{'p95':>11}")
+
+    chain = title_generator.TITLE_PROMPT | model | StrOutputParser()
+    before = model.calls
+    latencies, _ = await burst(messages, args.spread, lambda m: chain.ainvoke({"input": m}))
+    _row("요청마다 호출", latencies, model.calls - before)
+
+    _reset()
+    before = model.calls
+    latencies, _ = await burst(messages, args.spread, title_generator.generate_title)
+    _row("캐시 + 일괄 호출", latencies, model.calls - before)
+    stats = title_generator.stats
+    print(f"  캐시 {stats['cache_hits']}, 합류 {stats['coalesced']}, 호출당 평균 "
+          f"{stats['llm_items'] / max(stats['llm_calls'], 1):.1f}건")
+
+    # 모델이 제한 시간보다 느림 → 로컬 제목
+    _reset()
+    slow = FakeChatModel(latency=title_generator.TITLE_TIMEOUT + 1, chunk_delay=0)
+    registry.override("mini", slow)
+    timeout, title_generator.TITLE_TIMEOUT = title_generator.TITLE_TIMEOUT, args.timeout
+    results = []
+
+    async def call_slow(message: str):
+        results.append(await title_generator.generate_title(message))
+
+    latencies, _ = await burst(messages[:20], 0, call_slow)
+    title_generator.TITLE_TIMEOUT = timeout
+    _row(f"느린 모델 (제한 {args.timeout:.1f}s)", latencies, slow.calls)
+    for message, result in list(zip(messages, results))[:5]:
+        print(f"  {message[:30]:<32} → {result['title']} ({result['source']})")
+    local_check()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--spread", type=float, default=1.0, help="요청이 도착하는 기간(초)")
+    parser.add_argument("--unique", type=float, default=0.5, help="사람마다 다른 메시지 비율")
+    parser.add_argument("--latency", type=float, default=0.8)
+    parser.add_argument("--timeout", type=float, default=0.5, help="느린 모델 시나리오의 TITLE_TIMEOUT")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
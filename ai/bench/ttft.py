@@ -0,0 +1,106 @@
+"""
+준비 단계 fan-out 전/후 time-to-first-token 비교 벤치마크.
+
+    cd ai && python -m bench.ttft --runs 5 --latency 0.3 --search-latency 0.5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from bench.fakes import install_fakes
+from app.agent import graph
+from langgraph.graph import END, StateGraph
+
+
+def build_sequential_graph():
+    """fan-out 이전의 직렬 토폴로지 (비교 기준)."""
+    workflow = StateGraph(graph.AgentState)
+    for name in ("crisis_check", "extract_pdf_text", "analyze_images", "analyze_input",
+                 "execute_tools", "generate_response", "calculate_score"):
+        workflow.add_node(name, getattr(graph, name))
+
+    workflow.set_entry_point("crisis_check")
+    workflow.add_conditional_edges(
+        "crisis_check",
+        lambda x: "safe" if x.get("crisis_level", "safe") == "safe" else "stop",
+        {"stop": END, "safe": "extract_pdf_text"},
+    )
+    workflow.add_edge("extract_pdf_text", "analyze_images")
+    workflow.add_edge("analyze_images", "analyze_input")
+    workflow.add_edge("analyze_input", "execute_tools")
+    workflow.add_edge("execute_tools", "generate_response")
+    workflow.add_edge("generate_response", "calculate_score")
+    workflow.add_edge("calculate_score", END)
+    return workflow.compile()
+
+
+def make_state(i: int, with_image: bool) -> dict:
+    return {
+        "session_id": f"bench-{i}",
+        "user_message": "여자친구가 두쫀쿠 안 사줬다고 시간을 갖자는데 내일부터 잘하면 되겠지?",
+        "level": "spicy",
+        "category": "etc",
+        "history": [],
+        "images": ["/9j/4AAQSkZJRgABAQ"] if with_image else [],
+        "pdfs": [],
+        "status": "starting",
+        "current_section": "diagnosis",
+    }
+
+
+async def measure(executor, state: dict) -> tuple[float, float]:
+    start = time.perf_counter()
+    ttft = None
+    async for event in executor.astream_events(state, version="v2"):
+        if (
+            ttft is None
+            and event["event"] == "on_chat_model_stream"
+            and event.get("metadata", {}).get("langgraph_node") == "generate_response"
+        ):
+            ttft = time.perf_counter() - start
+    return ttft or float("nan"), time.perf_counter() - start
+
+
+async def run(fake, runs: int, with_image: bool):
+    results = {}
+    topologies = (
+        ("sequential", build_sequential_graph()),
+        ("fan-out", graph.build_graph("split")),
+        ("fan-out+triage", graph.build_graph("fused")),
+    )
+    for label, executor in topologies:
+        ttfts, totals = [], []
+        fake.calls = 0
+        for i in range(runs):
+            ttft, total = await measure(executor, make_state(i, with_image))
+            ttfts.append(ttft)
+            totals.append(total)
+        results[label] = (statistics.median(ttfts), statistics.median(totals), fake.calls / runs)
+
+    print(f"{'topology':<16}{'TTFT p50':>12}{'total p50':>12}{'LLM calls':>11}")
+    for label, (ttft, total, calls) in results.items():
+        print(f"{label:<16}{ttft * 1000:>10.0f}ms{total * 1000:>10.0f}ms{calls:>11.1f}")
+    seq = results["sequential"][0]
+    for label in ("fan-out", "fan-out+triage"):
+        fan = results[label][0]
+        print(f"TTFT 감소 ({label}): {(seq - fan) * 1000:.0f}ms ({(1 - fan / seq) * 100:.0f}%)")
+    # fused는 호출 수를 줄이는 대신 triage 구조화 출력이 fan-out 앞 직렬 구간에 들어감 (graph.TRIAGE_MODE)
+    split, fused = results["fan-out"], results["fan-out+triage"]
+    print(f"triage 트레이드오프: 턴당 LLM 호출 {split[2] - fused[2]:.1f}회 절약, TTFT {(fused[0] - split[0]) * 1000:+.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3, help="가짜 LLM 첫 토큰 지연 (초)")
+    parser.add_argument("--search-latency", type=float, default=0.5, help="가짜 검색 지연 (초)")
+    parser.add_argument("--no-image", action="store_true", help="이미지 분석 노드를 건너뛰는 입력 사용")
+    args = parser.parse_args()
+
+    fake, _ = install_fakes(latency=args.latency, search_latency=args.search_latency)
+    asyncio.run(run(fake, args.runs, with_image=not args.no_image))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+과거 메시지 일괄 재채점 (채점 기준 변경 후 백필)
+
+    cd ai && python -m scripts.score_batch --input messages.jsonl --output scores.jsonl
+    cd ai && python -m scripts.score_batch --input messages.jsonl --output scores.jsonl --concurrency 8 --batch-size 10
+
+입력 (JSONL): {"id": 메시지 id, "user_message": ..., "ai_response": ...}
+출력 (JSONL): {"id", "total", "breakdown", "summary", "source"}
+출력 파일이 곧 체크포인트. 중간에 끊겨도 같은 명령을 다시 실행하면 끝난 id는 건너뛰고 이어서 채점.
+LLM 채점에 실패한 항목(source fallback/default)은 출력에 남기지 않음 → 장애가 끝난 뒤 같은 명령을 다시 실행하면 그 항목만 재채점.
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from app.env import load_env
+
+load_env()  # 아래 app 모듈들의 설정 상수보다 먼저
+
+from app.tools.batch_scorer import FAILED_SOURCES, SCORE_BATCH_CONCURRENCY, SCORE_BATCH_SIZE, Checkpoint, score_items
+
+PROGRESS_EVERY = 1000
+
+
+def read_items(path: Path):
+    """한 줄씩 읽어서 넘김 (큰 파일도 전부 메모리에 올리지 않음)"""
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                item["id"], item["user_message"]
+            except (ValueError, KeyError, TypeError):
+                print(f"[ScoreBatch] {path}:{lineno} 형식 오류 → 건너뜀")
+                continue
+            yield item
+
+
+async def run(args):
+    checkpoint = Checkpoint(args.output)
+    if checkpoint.done:
+        print(f"[ScoreBatch] 체크포인트에서 {len(checkpoint.done)}건 완료 확인 → 이어서 채점")
+
+    start = time.perf_counter()
+    count = 0
+    sources: dict = {}
+    try:
+        async for record in score_items(read_items(args.input), args.concurrency, args.batch_size, checkpoint):
+            count += 1
+            sources[record["source"]] = sources.get(record["source"], 0) + 1
+            if count % PROGRESS_EVERY == 0:
+                elapsed = time.perf_counter() - start
+                print(f"[ScoreBatch] {count}건 ({count / elapsed:.1f}건/s) {sources}")
+    finally:
+        checkpoint.close()
+    elapsed = time.perf_counter() - start
+    print(f"[ScoreBatch] 완료: {count}건 {elapsed:.1f}s ({count / max(elapsed, 1e-9):.1f}건/s) {sources}")
+    failed = sum(sources.get(source, 0) for source in FAILED_SOURCES)
+    if failed:
+        print(f"[ScoreBatch] {failed}건은 LLM 채점 실패로 출력에 남기지 않음 → 같은 명령으로 다시 실행하면 재채점")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", type=Path, required=True)
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument("--concurrency", type=int, default=SCORE_BATCH_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=SCORE_BATCH_SIZE)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
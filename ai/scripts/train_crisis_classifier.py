@@ -0,0 +1,41 @@
+"""
+위기 판별 로컬 분류기 학습 → app/data/crisis_classifier.npz
+
+    cd ai && python -m scripts.train_crisis_classifier
+    cd ai && python -m scripts.train_crisis_classifier --data my_labeled.csv --epochs 500
+
+CSV 형식: text,label  (label: SAFE / UNCLEAR / CRISIS)
+"""
+import argparse
+import time
+from collections import Counter
+from pathlib import Path
+
+from app.tools.crisis_classifier import CRISIS_MODEL_PATH, CRISIS_TRAIN_PATH, load_dataset, train
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", type=Path, default=CRISIS_TRAIN_PATH)
+    parser.add_argument("--out", type=Path, default=CRISIS_MODEL_PATH)
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--lr", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    texts, labels = load_dataset(args.data)
+    print(f"학습 데이터: {len(texts)}건 {dict(Counter(labels))}")
+
+    start = time.perf_counter()
+    model = train(texts, labels, epochs=args.epochs, lr=args.lr, l2=args.l2)
+    print(f"학습 완료: {time.perf_counter() - start:.1f}s")
+
+    correct = sum(model.predict(t)[0] == label for t, label in zip(texts, labels))
+    print(f"학습 데이터 정확도: {correct / len(texts):.3f} (일반화 성능은 bench.crisis_classifier로 확인)")
+
+    model.save(args.out)
+    print(f"저장: {args.out} ({args.out.stat().st_size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -99,8 +99,8 @@ async def test_agent_cli():
         }
         
         try:
-            # 동기식 호출로 결과 확인
-            result = await asyncio.to_thread(executor.invoke, state)
+            # 노드가 모두 async라 ainvoke로 호출
+            result = await executor.ainvoke(state)
 
             if result.get("is_crisis"):
                 print("\n[CRISIS] 위기 감지 보호 모드 작동 [CRISIS]")
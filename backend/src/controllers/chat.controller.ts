@@ -128,6 +128,13 @@ export const chatController = {
                 }
             });
         } catch (error: any) {
+            // AI 서버 대기열이 꽉 참 → 500이 아니라 429 + Retry-After 그대로 전달
+            if (error?.response?.status === 429) {
+                const retryAfter = error.response.headers?.["retry-after"];
+                if (retryAfter) res.setHeader("Retry-After", retryAfter);
+                res.status(429).json({ error: "지금 사람이 너무 많아. 잠깐 뒤에 다시 말 걸어줘." });
+                return;
+            }
             console.error("Chat Controller Error:", error);
             res.status(500).json({ error: error.message || "message send failed" });
         }
@@ -23,6 +23,7 @@ const envSchema = z.object({
   AI_SERVER_URL: z.string().url(),         // AI 서버 주소 (FastAPI 등)
   PORT: z.coerce.number().default(3000),   // 서버 포트 (기본 3000)
   FRONTEND_URL: z.string().optional(),     // 배포된 프론트엔드 URL (CORS용, 선택)
+  AI_HISTORY_DELTA: z.enum(["on", "off"]).default("off"), // on: AI 서버 세션 체크포인트 사용 (history 대신 버전만 전송)
 });
 
 // process.env를 스키마로 검증
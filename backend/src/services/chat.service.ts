@@ -7,6 +7,7 @@ type ChatSessionContext = {
     category: string;
     level: string;
     messages: Array<{ role: string; content: string }>;
+    messageCount: number; // 세션에 저장된 전체 메시지 수 (AI 서버 history_version 계산용)
     persist: boolean;
 };
 
@@ -49,6 +50,7 @@ function toMockContext(session: MockStoredSession): ChatSessionContext {
         category: session.category,
         level: session.level,
         messages: session.messages.map((m) => ({ role: m.role, content: m.content })),
+        messageCount: session.messages.length,
         persist: false,
     };
 }
@@ -126,13 +128,16 @@ export const chatService = {
                 resolvedUserId = devUser.id;
             }
 
+            // AI 서버에 보낼 history: 최근 20개 (AI 서버 체크포인트 이어받기의 CHECKPOINT_HISTORY_MESSAGES와 같은 창)
+            // 창은 턴마다 앞부분이 밀리므로 AI 서버의 history 요약은 위치 대신 메시지 내용으로 이어 씀
             const existing = await prisma.session.findUnique({
                 where: { id: sessionId },
                 include: {
                     messages: {
-                        orderBy: { createdAt: "asc" },
+                        orderBy: { createdAt: "desc" },
                         take: 20,
                     },
+                    _count: { select: { messages: true } },
                 },
             });
 
@@ -141,7 +146,8 @@ export const chatService = {
                     id: existing.id,
                     category: existing.category || "etc",
                     level: existing.level || "spicy",
-                    messages: existing.messages.map((m) => ({ role: m.role, content: m.content })),
+                    messages: existing.messages.reverse().map((m) => ({ role: m.role, content: m.content })),
+                    messageCount: existing._count.messages,
                     persist: true,
                 } as ChatSessionContext;
             }
@@ -166,6 +172,7 @@ export const chatService = {
                 category: created.category || "etc",
                 level: created.level || "spicy",
                 messages: [],
+                messageCount: 0,
                 persist: true,
             } as ChatSessionContext;
         } catch (error: any) {
@@ -268,18 +275,41 @@ export const chatService = {
             content: m.content,
         }));
 
+        const payload = {
+            session_id: sessionId,
+            user_message: userMessage,
+            level: session.level,
+            category: session.category,
+            images,
+            ocr_text,
+            pdfs,
+        };
+
+        // AI 서버 세션 체크포인트: history 대신 버전(이번 user 메시지 전까지 저장된 메시지 수)만 보냄
+        // 서버에 이어받을 상태가 없거나 버전이 다르면 409 → history 전체로 한 번 더 요청
+        if (env.AI_HISTORY_DELTA === "on" && session.persist) {
+            const historyVersion = Math.max(session.messageCount - 1, 0); // 방금 저장한 user 메시지 제외
+            try {
+                const response = await axios.post(
+                    `${aiBaseUrl}/agent/chat`,
+                    { ...payload, history: [], history_version: historyVersion },
+                    { responseType: "stream" }
+                );
+                return response.data;
+            } catch (error: any) {
+                if (error?.response?.status !== 409) throw error;
+            }
+            const response = await axios.post(
+                `${aiBaseUrl}/agent/chat`,
+                { ...payload, history, history_version: historyVersion },
+                { responseType: "stream" }
+            );
+            return response.data;
+        }
+
         const response = await axios.post(
             `${aiBaseUrl}/agent/chat`,
-            {
-                session_id: sessionId,
-                user_message: userMessage,
-                level: session.level,
-                category: session.category,
-                history,
-                images,
-                ocr_text,
-                pdfs,
-            },
+            { ...payload, history },
             {
                 responseType: "stream",
             }